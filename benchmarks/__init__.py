@@ -0,0 +1,5 @@
+"""
+benchmarks
+Micro-benchmarks for the chatbot. Run from the repository root, e.g.
+python -m benchmarks.bench_router
+"""
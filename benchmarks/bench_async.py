@@ -0,0 +1,98 @@
+"""
+bench_async.py
+Load test for ChatBot.aget_bot_response: N concurrent simulated sessions
+(one ChatBot each) against the local mock server, compared with the sync
+API driven from a thread pool.
+Usage: python -m benchmarks.bench_async [sessions] [server_latency_ms] [sync_threads]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_server import MockServer
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_http import AsyncHttpClient, HttpClient
+
+
+def script(session):
+    return [
+        "hello",
+        "what is a dictionary?",
+        f"search wikipedia for topic {session}",
+        "explain again",
+        f"search python docs for module{session % 50}",
+        "solve: 2**10 + 3",
+    ]
+
+
+def make_bot(server, **kwargs):
+    bot = ChatBot(search_cache=SearchCache(maxsize=100000), pydocs=False, **kwargs)  # docs searches go to the mock server
+    bot.wikipedia_url = server.url + "/wiki/{}"
+    bot.python_docs_url = server.url + "/search.html?q={}"
+    return bot
+
+
+async def run_async(server, sessions):
+    client = AsyncHttpClient(max_connections=sessions, max_per_host=sessions)
+    cache = SearchCache(maxsize=100000)
+    latencies = []
+
+    async def session(i):
+        bot = make_bot(server, async_http=client)
+        bot.search_cache = cache
+        for message in script(i):
+            start = time.perf_counter()
+            await bot.aget_bot_response(message)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed, latencies
+
+
+def run_threads(server, sessions, threads):
+    client = HttpClient(max_per_host=threads)
+    cache = SearchCache(maxsize=100000)
+    latencies = []
+
+    def session(i):
+        bot = make_bot(server, http=client)
+        bot.search_cache = cache
+        for message in script(i):
+            start = time.perf_counter()
+            bot.get_bot_response(message)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed, latencies
+
+
+def report(name, elapsed, latencies):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<22}{len(latencies) / elapsed:>10.0f}{statistics.median(latencies) * 1e3:>10.1f}{p99 * 1e3:>10.1f}")
+
+
+def main(argv):
+    sessions = int(argv[1]) if len(argv) > 1 else 500
+    latency = float(argv[2]) / 1000 if len(argv) > 2 else 0.05
+    threads = int(argv[3]) if len(argv) > 3 else 32
+    print(f"{sessions} sessions x {len(script(0))} messages, server latency {latency * 1e3:.0f} ms")
+    print(f"{'mode':<22}{'msg/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    with MockServer(latency=latency) as server:
+        report("async", *asyncio.run(run_async(server, sessions)))
+    with MockServer(latency=latency) as server:
+        report(f"sync, {threads} threads", *run_threads(server, sessions, threads))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
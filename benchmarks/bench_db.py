@@ -0,0 +1,121 @@
+"""
+bench_db.py
+Concurrent read QPS and write throughput of chatbot_db.ChatDatabase
+against the original design: one module-level connection (rollback
+journal, default synchronous) shared by every thread behind a lock, and a
+commit per write. Reads are fact lookups by full-text search over a
+pre-loaded table; writes are conversation log inserts, alone and while
+readers run.
+Usage: python -m benchmarks.bench_db [facts] [seconds per run]
+    e.g. python -m benchmarks.bench_db 100000 2
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_facts import corpus
+from chatbot_db import INSERT_LOG_SQL, LOG_SCHEMA, ChatDatabase
+from chatbot_facts import FactStore
+
+WRITES = 5000
+
+
+class SingleConnection:
+    """The original: one shared connection, a lock around every use, a commit per write."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.store = FactStore(self.conn)
+        with self.conn:
+            for statement in LOG_SCHEMA:
+                self.conn.execute(statement)
+
+    def find_fact(self, text):
+        with self.lock:
+            return self.store.find_fact(text)
+
+    def log_message(self, session_id, role, message):
+        with self.lock, self.conn:
+            self.conn.execute(INSERT_LOG_SQL, (session_id, role, message, time.time()))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+
+def make_database(path, facts):
+    conn = sqlite3.connect(path)
+    FactStore(conn).bulk_load("facts", corpus(random.Random(1), facts, {}))
+    conn.close()
+
+
+def read_qps(db, keys, threads, seconds):
+    counts = [0] * threads
+    stop = time.perf_counter() + seconds
+
+    def reader(n):
+        rng = random.Random(n)
+        while time.perf_counter() < stop:
+            db.find_fact(rng.choice(keys))
+            counts[n] += 1
+    workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds
+
+
+def write_rate(db, readers=0, keys=()):
+    stop = threading.Event()
+
+    def reader():
+        rng = random.Random()
+        while not stop.is_set():
+            db.find_fact(rng.choice(keys))
+    workers = [threading.Thread(target=reader) for _ in range(readers)]
+    for worker in workers:
+        worker.start()
+    start = time.perf_counter()
+    for i in range(WRITES):
+        db.log_message(f"session{i % 50}", "user", f"message number {i}")
+    db.flush()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return WRITES / elapsed
+
+
+def main():
+    facts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    words = ("list", "loop", "json", "queue", "thread", "socket", "lambda", "heap")
+    keys = [f"{a} {b}" for a in words for b in words if a != b]
+    keys += [f"nothing like {word}" for word in words]  # misses, the common case
+    print(f"{facts} facts; {os.cpu_count()} CPUs")
+    for name, open_db in (("single connection", SingleConnection), ("ChatDatabase", ChatDatabase)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "chatbot.db")
+            make_database(path, facts)
+            db = open_db(path)
+            try:
+                reads = ", ".join(f"{threads} threads {read_qps(db, keys, threads, seconds):,.0f}/s" for threads in (1, 4, 8))
+                print(f"{name}:\n  read QPS: {reads}")
+                print(f"  log writes: {write_rate(db):,.0f}/s alone, {write_rate(db, 4, keys):,.0f}/s with 4 readers")
+                if isinstance(db, ChatDatabase):
+                    stats = db.stats()
+                    print(f"  {stats['writes']} writes in {stats['batches']} transactions")
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    main()
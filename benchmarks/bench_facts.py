@@ -0,0 +1,101 @@
+"""
+bench_facts.py
+Fact and code-example lookup latency at growing table sizes: the original
+LIKE '%input%' queries from chatbotV2 against FactStore's FTS5 index, for
+messages that hit a row and messages that miss (the common case, since
+lookups only run for otherwise unmatched messages).
+Usage: python -m benchmarks.bench_facts [sizes] [queries]
+    e.g. python -m benchmarks.bench_facts 1000,100000,1000000 200
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from chatbot_facts import FactStore
+
+WORDS = (
+    "list dict set tuple loop function class module import string integer float async await generator "
+    "iterator decorator context manager exception lambda closure scope thread process socket file path "
+    "json regex sort search parse format slice index key value queue stack heap tree graph"
+).split()
+
+
+def corpus(rng, count, sample):
+    """Yields (key, value) rows; keys of the rows whose index is in sample are put in it."""
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        key = f"{' '.join(words)} {i}"
+        if i in sample:
+            sample[i] = key
+        yield key, f"{words[0]} fact number {i}"
+
+
+def code_corpus(rng, count):
+    for i in range(count):
+        words = rng.sample(WORDS, 4)
+        yield rng.choice(["python", "javascript", "rust", "go"]), f"# snippet {i}", f"how to {' '.join(words)} ({i})"
+
+
+def legacy_lookup(conn, text):
+    """The original chatbotV2 queries."""
+    row = conn.execute("SELECT value FROM facts WHERE key LIKE ?", (f"%{text}%",)).fetchone()
+    if row:
+        return row
+    return conn.execute(
+        "SELECT snippet, explanation FROM code_examples WHERE language LIKE ? OR explanation LIKE ?",
+        (f"%{text}%", f"%{text}%"),
+    ).fetchone()
+
+
+def fts_lookup(store, text):
+    return store.find_fact(text) or store.find_code_example(text)
+
+
+def timed(fn, queries):
+    times = []
+    for text in queries:
+        start = time.perf_counter()
+        fn(text)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times):
+    times = sorted(times)
+    p50 = statistics.median(times) * 1e3
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1e3
+    print(f"  {name:<22}{p50:>12.3f}{p99:>12.3f}")
+
+
+def main(argv):
+    sizes = [int(n) for n in argv[1].split(",")] if len(argv) > 1 else [1000, 100000, 1000000]
+    query_count = int(argv[2]) if len(argv) > 2 else 200
+    rng = random.Random(42)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "facts.db"))
+            store = FactStore(conn)
+            start = time.perf_counter()
+            sample = dict.fromkeys(rng.sample(range(size), min(size, query_count)))
+            store.bulk_load("facts", corpus(rng, size, sample))
+            store.bulk_load("code_examples", code_corpus(rng, size))
+            print(f"{size} facts + {size} code examples (bulk load {time.perf_counter() - start:.1f} s); milliseconds")
+            # The tail of a key, as a user would type it
+            hits = [key.split(" ", 1)[1] for key in sample.values()]
+            misses = [f"what is a {rng.choice(['monad', 'borrow checker', 'vtable'])} {i}" for i in range(query_count)]
+            # The legacy scans get slow at the larger sizes, so they see fewer queries
+            legacy_count = max(5, query_count * 1000 // size)
+            print(f"  {'':<22}{'p50':>12}{'p99':>12}")
+            report("LIKE, hit", timed(lambda t: legacy_lookup(conn, t), hits[:legacy_count]))
+            report("LIKE, miss", timed(lambda t: legacy_lookup(conn, t), misses[:legacy_count]))
+            report("FTS5, hit", timed(lambda t: fts_lookup(store, t), hits))
+            report("FTS5, miss", timed(lambda t: fts_lookup(store, t), misses))
+            conn.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
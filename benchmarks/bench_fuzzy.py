@@ -0,0 +1,133 @@
+"""
+bench_fuzzy.py
+Accuracy and latency of the token-aware, typo-tolerant IntentRouter
+against the original substring chain. Accuracy is measured on a labelled
+set of messages (typos, plurals, words that contain a greeting or a topic);
+latency per message and index size at growing vocabularies of synthetic
+topics, for exact hits, typo hits and misses.
+Usage: python -m benchmarks.bench_fuzzy [vocabulary sizes]
+    e.g. python -m benchmarks.bench_fuzzy 1000,10000,50000
+"""
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_router import build_router, legacy_route, synthetic_topics
+from chatbot_core import TOPICS, default_router
+from chatbot_router import TOPIC
+
+# message -> expected topic or intent
+LABELLED = {
+    "what is a variable?": "variable",
+    "how do loops work": "loop",
+    "what are dictionaries?": "dictionary",
+    "what is a dictonary": "dictionary",
+    "explain dictionnary": "dictionary",
+    "tell me about tupels": "tuple",
+    "tupel vs list": "list",
+    "whats a varaible": "variable",
+    "explain functoins": "function",
+    "how do classes work": "class",
+    "explain comprehensoin": "comprehension",
+    "how do i raise an excpetion": "exception",
+    "how do exceptions work in python": "exception",
+    "how do i imprt a module": "import",
+    "hi": "greeting",
+    "hey there": "greeting",
+    "hello, what is a list?": "greeting",
+    "this is confusing": "fallback",
+    "while we are at it, what is python?": "fallback",
+    "tell me something interesting": "fallback",
+    "which one should i pick?": "fallback",
+    "what was the last thing you said": "fallback",
+    "the settings menu is broken": "fallback",
+    "i have a sunset photo": "fallback",
+    "thanks, that helped": "fallback",
+    "please explain again": "explain_again",
+    "explian again": "explain_again",
+    "search wikipedia for guido": "search_wikipedia",
+    "solve: 2 + 2": "solve",
+    "run code: x = 1": "run_code",
+    "what's the difference between a tuple and a set": "tuple",
+    "i want to learn about the import system": "import",
+    "can you show a for loop with a while condition": "loop",
+    "important question about python": "fallback",
+    "is a lists mutable": "list",
+}
+
+
+def fuzzy_route(router, message):
+    intent, key = router.route(message)
+    return key if intent == TOPIC else intent
+
+
+def accuracy():
+    router = default_router()
+    legacy_ok = fuzzy_ok = 0
+    wrong = []
+    for message, expected in LABELLED.items():
+        legacy_ok += legacy_route(message, TOPICS) == expected
+        got = fuzzy_route(router, message)
+        fuzzy_ok += got == expected
+        if got != expected:
+            wrong.append((message, expected, got))
+    total = len(LABELLED)
+    print(f"Accuracy on {total} labelled messages: substring {legacy_ok / total:.0%}, token-aware fuzzy {fuzzy_ok / total:.0%}")
+    for message, expected, got in wrong:
+        print(f"  still wrong: {message!r}: expected {expected}, got {got}")
+
+
+def typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]  # swap two letters
+
+
+def latency(sizes):
+    rng = random.Random(7)
+    print("Microseconds per message (p50 / p99) and index build")
+    print(f"  {'vocabulary':>10}{'build s':>9}{'index MB':>10}{'exact hit':>16}{'typo hit':>16}{'miss':>16}{'substring':>16}")
+    for size in sizes:
+        topics = dict(TOPICS)
+        topics.update(synthetic_topics(size))
+        words = list(topics)
+        typo_words = [w for w in words if len(w) >= 5]  # shorter words get no typo allowance
+        tracemalloc.start()
+        start = time.perf_counter()
+        router = build_router(topics)
+        build = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+        cases = {
+            "exact": [f"tell me about {rng.choice(words)} please" for _ in range(300)],
+            "typo": [f"tell me about {typo(rng.choice(typo_words), rng)} please" for _ in range(300)],
+            "miss": [f"tell me about {rng.choice(['quantum', 'gardening', 'weather'])} {i} please" for i in range(300)],
+        }
+        row = [f"  {len(topics):>10}{build:>9.2f}{memory:>10.1f}"]
+        for messages in cases.values():
+            row.append(format_times(router.route, messages))
+        legacy_messages = cases["miss"][:20]
+        row.append(format_times(lambda m: legacy_route(m, topics), legacy_messages))
+        print("".join(row))
+
+
+def format_times(fn, messages):
+    times = []
+    for message in messages:
+        start = time.perf_counter()
+        fn(message)
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return f"{statistics.median(times):>8.1f} /{times[int(len(times) * 0.99)]:>6.0f}"
+
+
+def main(argv):
+    sizes = [int(n) for n in argv[1].split(",")] if len(argv) > 1 else [0, 1000, 10000, 50000]
+    accuracy()
+    print()
+    latency(sizes)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
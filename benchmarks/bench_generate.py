@@ -0,0 +1,102 @@
+"""
+bench_generate.py
+GPT-2 fallback costs: startup (the old import-time pipeline build against
+the lazy GenerationWorker), latency of one prompt on a warm worker, and
+throughput at 1/8/32 concurrent prompts with and without micro-batching,
+and, for streaming, time to first visible text against total generation
+time: straight from the stream, and through a StreamingBubble on the fake
+Tk canvas (with the number of repaints it took).
+Uses the real model when transformers is installed (or with --stub),
+otherwise benchmarks.stub_model.
+Usage: python -m benchmarks.bench_generate [--stub]
+"""
+import sys
+import time
+
+from benchmarks.fake_tk import FakeCanvas, FakeLabel
+from benchmarks.stub_model import StubModel
+from chatbot_generate import GenerationWorker, TransformersModel
+from chatbot_transcript import StreamingBubble, VirtualTranscript
+
+PROMPT = "tell me something about python"
+
+
+def pick_model(argv):
+    if "--stub" not in argv:
+        try:
+            import transformers  # noqa: F401
+            return "gpt2", TransformersModel
+        except ImportError:
+            pass
+    return "stub", lambda: StubModel(load_seconds=2.0)
+
+
+def throughput(load_model, concurrency, max_batch_size, rounds=3):
+    worker = GenerationWorker(load_model, max_batch_size=max_batch_size)
+    worker.generate(PROMPT)  # load the model outside the timing
+    start = time.perf_counter()
+    for _ in range(rounds):
+        futures = [worker.submit(f"{PROMPT} {i}") for i in range(concurrency)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+    worker.close()
+    return concurrency * rounds / elapsed
+
+
+def streaming(worker, runs=5, interval_ms=50):
+    print(f"streaming, mean of {runs} prompts:  first text      total   repaints  chunks")
+    first, total, repaints, chunks = [], [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        stream = worker.stream(PROMPT)
+        chunks.append(len(list(stream)))
+        first.append(stream.first_text_at - start)
+        total.append(time.perf_counter() - start)
+    print(f"  {'stream':<30}{mean_ms(first):>10.1f} ms{mean_ms(total):>8.1f} ms{'-':>10}{sum(chunks) / runs:>8.1f}")
+    first, total = [], []
+    for _ in range(runs):
+        canvas = FakeCanvas()
+        transcript = VirtualTranscript(canvas, label_factory=FakeLabel)
+        start = time.perf_counter()
+        bubble = StreamingBubble(transcript, transcript.append("…"), worker.stream(PROMPT), interval_ms).start()
+        while bubble.finished_at is None:
+            time.sleep(interval_ms / 1000)
+            canvas.advance(interval_ms)
+        first.append(bubble.first_text_at - start)
+        total.append(bubble.finished_at - start)
+        repaints.append(bubble.updates)
+    print(f"  {f'bubble, {interval_ms} ms polling':<30}{mean_ms(first):>10.1f} ms{mean_ms(total):>8.1f} ms"
+          f"{sum(repaints) / runs:>10.1f}{'-':>8}")
+
+
+def mean_ms(times):
+    return sum(times) / len(times) * 1e3
+
+
+def main(argv):
+    name, load_model = pick_model(argv)
+    print(f"model: {name}")
+
+    start = time.perf_counter()
+    worker = GenerationWorker(load_model)
+    print(f"startup, lazy worker:          {(time.perf_counter() - start) * 1e3:10.1f} ms")
+    start = time.perf_counter()
+    worker.generate(PROMPT)
+    print(f"first prompt, cold (loads):    {(time.perf_counter() - start) * 1e3:10.1f} ms")
+    print(f"  of which model load:         {worker.load_seconds * 1e3:10.1f} ms (paid at import before)")
+    start = time.perf_counter()
+    worker.generate(PROMPT)
+    print(f"one prompt, warm:              {(time.perf_counter() - start) * 1e3:10.1f} ms")
+    streaming(worker)
+    worker.close()
+
+    print(f"{'concurrent':>10}{'unbatched/s':>14}{'batched/s':>12}")
+    for concurrency in (1, 8, 32):
+        unbatched = throughput(load_model, concurrency, max_batch_size=1)
+        batched = throughput(load_model, concurrency, max_batch_size=concurrency)
+        print(f"{concurrency:>10}{unbatched:>14.1f}{batched:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
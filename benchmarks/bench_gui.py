@@ -0,0 +1,58 @@
+"""
+bench_gui.py
+Input-to-paint latency of ChatApp while slow requests are outstanding.
+Sends a message every `interval` ms to a bot whose answers take `delay` s,
+and reports how long each Send took to show the user's bubble and how late
+Tk timer callbacks ran (a frozen main thread shows up as large lateness).
+Needs a display and customtkinter.
+Usage: python -m benchmarks.bench_gui [messages] [delay_s] [interval_ms]
+"""
+import statistics
+import sys
+import time
+
+import customtkinter as ctk
+
+from chatbot_gui import ChatApp
+
+
+class SlowBot:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_bot_response(self, message):
+        time.sleep(self.delay)
+        return f"Slow answer to {message!r}"
+
+
+def main(argv):
+    messages = int(argv[1]) if len(argv) > 1 else 20
+    delay = float(argv[2]) if len(argv) > 2 else 2.0
+    interval = int(argv[3]) if len(argv) > 3 else 100
+    root = ctk.CTk()
+    app = ChatApp(root)
+    app.worker.respond = SlowBot(delay).get_bot_response
+    lateness = []
+    sent = [0]
+
+    def tick(expected):
+        lateness.append(time.perf_counter() - expected)
+        if sent[0] < messages:
+            app.user_entry.insert(0, f"message {sent[0]}")
+            app.send_message()
+            sent[0] += 1
+            root.after(interval, tick, time.perf_counter() + interval / 1000)
+        else:
+            root.after(int(delay * 1000) + 200, root.quit)
+
+    root.after(500, tick, time.perf_counter() + 0.5)
+    root.mainloop()
+    paint = sorted(app.paint_latencies)
+    print(f"messages sent:          {messages} (bot delay {delay:.1f} s, every {interval} ms)")
+    print(f"input-to-paint p50/max: {statistics.median(paint) * 1e3:.1f} / {paint[-1] * 1e3:.1f} ms")
+    print(f"timer lateness p50/max: {statistics.median(lateness) * 1e3:.1f} / {max(lateness) * 1e3:.1f} ms")
+    app.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,81 @@
+"""
+bench_html.py
+Parse time and peak memory for pulling the first <p> / li.search-hit out of
+Wikipedia- and docs-sized fixture pages: full BeautifulSoup tree versus the
+streaming chatbot_html extractor fed in 16 KB chunks.
+Usage: python -m benchmarks.bench_html [page_kb]
+"""
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from chatbot_html import CHUNK_SIZE, first_element
+
+
+def wikipedia_fixture(kb):
+    head = "<html><head><style>" + ".mw-parser-output .x{color:red}" * 400 + "</style>"
+    head += "<script>" + "var wgConfig = {'a': 1};" * 400 + "</script></head><body>"
+    infobox = "<table class='infobox'>" + "<tr><th>Key</th><td><a href='/wiki/V'>Value</a></td></tr>" * 60 + "</table>"
+    lead = "<p><b>Python</b> is a high-level, general-purpose programming language. Its design philosophy emphasizes code readability.</p>"
+    body = []
+    size = len(head) + len(infobox) + len(lead)
+    i = 0
+    while size < kb * 1024:
+        section = (f"<h2 id='s{i}'>Section {i}</h2><p>Paragraph {i} with <a href='/wiki/L{i}'>links</a>, "
+                   f"<i>markup</i> and references<sup>[{i}]</sup>. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>")
+        body.append(section)
+        size += len(section)
+        i += 1
+    return head + infobox + lead + "".join(body) + "</body></html>"
+
+
+def docs_fixture(kb):
+    hits = "".join(f"<li class='search-hit'><a href='library/m{i}.html'>module{i}</a> &mdash; Summary {i}</li>"
+                   for i in range(kb * 12))
+    return "<html><head><script>" + "x();" * 2000 + "</script></head><body><ul class='search'>" + hits + "</ul></body></html>"
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = min(_time(func) for _ in range(5))
+    return result, min(elapsed, best), peak
+
+
+def _time(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def chunks(page):
+    return (page[i:i + CHUNK_SIZE] for i in range(0, len(page), CHUNK_SIZE))
+
+
+def main(argv):
+    kb = int(argv[1]) if len(argv) > 1 else 500
+    cases = [
+        ("wikipedia first <p>", wikipedia_fixture(kb),
+         lambda page: BeautifulSoup(page, "html.parser").find("p").text,
+         lambda page: first_element(chunks(page), "p").text),
+        ("docs first search-hit", docs_fixture(kb // 4),
+         lambda page: BeautifulSoup(page, "html.parser").find_all("li", class_="search-hit")[0].get_text(strip=True),
+         lambda page: first_element(chunks(page), "li", "search-hit").stripped_text),
+    ]
+    print(f"{'page':<24}{'KB':>6}{'method':>12}{'ms':>10}{'peak MB':>10}")
+    for name, page, full, streaming in cases:
+        expected, full_s, full_peak = measure(lambda: full(page))
+        got, stream_s, stream_peak = measure(lambda: streaming(page))
+        assert got == expected, (got, expected)
+        print(f"{name:<24}{len(page) // 1024:>6}{'bs4 tree':>12}{full_s * 1e3:>10.2f}{full_peak / 2**20:>10.2f}")
+        print(f"{'':<24}{'':>6}{'streaming':>12}{stream_s * 1e3:>10.2f}{stream_peak / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
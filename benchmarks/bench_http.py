@@ -0,0 +1,59 @@
+"""
+bench_http.py
+Latency of N sequential and concurrent lookups against the local mock
+server, with a bare requests.get per lookup versus the pooled HttpClient.
+Usage: python -m benchmarks.bench_http [lookups] [concurrency] [server_latency_ms]
+"""
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.mock_server import MockServer
+from chatbot_http import HttpClient
+
+
+def run(fetch, urls, concurrency):
+    latencies = []
+
+    def one(url):
+        start = time.perf_counter()
+        fetch(url).content
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        for url in urls:
+            one(url)
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(one, urls))
+    return time.perf_counter() - start, latencies
+
+
+def main(argv):
+    lookups = int(argv[1]) if len(argv) > 1 else 200
+    concurrency = int(argv[2]) if len(argv) > 2 else 8
+    latency = float(argv[3]) / 1000 if len(argv) > 3 else 0.0
+    print(f"{'client':<10}{'mode':<14}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'conns':>7}")
+    for name in ("bare", "pooled"):
+        for mode, workers in (("sequential", 1), (f"concurrent{concurrency}", concurrency)):
+            with MockServer(latency=latency) as server:
+                urls = [f"{server.url}/wiki/Topic_{i % 50}" for i in range(lookups)]
+                if name == "bare":
+                    fetch = lambda url: requests.get(url, timeout=5)
+                    total, lat = run(fetch, urls, workers)
+                else:
+                    client = HttpClient(max_per_host=concurrency)
+                    total, lat = run(client.get, urls, workers)
+                    client.close()
+                lat.sort()
+                p95 = lat[int(len(lat) * 0.95) - 1]
+                print(f"{name:<10}{mode:<14}{total:>9.3f}{statistics.median(lat) * 1e3:>9.2f}"
+                      f"{p95 * 1e3:>9.2f}{server.connections:>7}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,69 @@
+"""
+bench_knowledge.py
+Loads a 10k-topic knowledge base and reports load/compile time, per-message
+lookup latency and the memory held by the index.
+Usage: python -m benchmarks.bench_knowledge [topic_count]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from benchmarks.bench_router import synthetic_topics
+from chatbot_core import ChatBot, router_for
+from chatbot_knowledge import KnowledgeBase
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return float("nan")
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 10000
+    topics = synthetic_topics(count)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({"topics": [{"keyword": k, "answer": v} for k, v in topics.items()]}, f)
+    try:
+        rss_before = rss_mb()
+        tracemalloc.start()
+        start = time.perf_counter()
+        kb = KnowledgeBase(f.name)
+        created = time.perf_counter()
+        len(kb)
+        loaded = time.perf_counter()
+        router = router_for(kb)
+        compiled = time.perf_counter()
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = rss_mb()
+
+        keywords = list(topics)[::max(1, count // 100)]
+        messages = [f"tell me about {k} please" for k in keywords] + ["something unrelated to any topic"]
+        number = 20
+        total = min(timeit.repeat(lambda: [router.route(m) for m in messages], number=number, repeat=5))
+        route_us = total / (number * len(messages)) * 1e6
+        bot = ChatBot(kb)
+        total = min(timeit.repeat(lambda: [bot.get_bot_response(m) for m in messages], number=number, repeat=5))
+        response_us = total / (number * len(messages)) * 1e6
+    finally:
+        os.unlink(f.name)
+
+    print(f"topics:               {count}")
+    print(f"construct (lazy):     {(created - start) * 1e3:.3f} ms")
+    print(f"first-use load:       {(loaded - created) * 1e3:.1f} ms")
+    print(f"router compile:       {(compiled - loaded) * 1e3:.1f} ms")
+    print(f"route latency:        {route_us:.2f} us/msg")
+    print(f"get_bot_response:     {response_us:.2f} us/msg")
+    print(f"index + router heap:  {held / 2**20:.1f} MB (tracemalloc)")
+    print(f"RSS growth:           {rss_after - rss_before:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,77 @@
+"""
+bench_math.py
+"solve:" latency for common homework expressions: the original in-process
+sympy.sympify against MathEngine (arithmetic fast path, first call through
+the sympy worker, and cached repeats), plus how long a pathological
+expression holds things up under each.
+Usage: python -m benchmarks.bench_math [runs]
+"""
+import statistics
+import sys
+import time
+
+import sympy
+
+from chatbot_math import MathEngine, MathError, SOLVE
+
+ARITHMETIC = ["2+2", "2**10 + 3", "10/4", "(3+4)*5 - 6/2", "17 % 5", "2^16 - 1"]
+SYMBOLIC = ["sqrt(8)", "0.1 + 0.2", "x**2 + 2*x*x", "integrate(x**2, x)", "factor(x**2 - 1)", "pi/2"]
+PATHOLOGICAL = "10**10**10"
+
+
+def legacy(expr):
+    """The original ChatBot._solve_math."""
+    try:
+        return f"Math result: {sympy.sympify(expr)}"
+    except Exception as e:
+        return f"Error solving math: {e}"
+
+
+def timed(fn, exprs, runs):
+    times = []
+    for _ in range(runs):
+        for expr in exprs:
+            start = time.perf_counter()
+            fn(expr)
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times):
+    times = sorted(times)
+    p50 = statistics.median(times) * 1e6
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1e6
+    print(f"{name:<40}{p50:>12.1f}{p99:>12.1f}")
+
+
+def compute(engine):
+    def run(expr):
+        try:
+            return engine.compute(SOLVE, expr)
+        except MathError as e:
+            return str(e)
+    return run
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 200
+    engine = MathEngine()
+    engine.compute(SOLVE, "x")  # start the workers and import sympy there
+    print(f"{runs} runs per expression; microseconds")
+    print(f"{'':<40}{'p50':>12}{'p99':>12}")
+    report("arithmetic, sympify in-process", timed(legacy, ARITHMETIC, runs))
+    report("arithmetic, fast path", timed(compute(engine), ARITHMETIC, runs))
+    report("symbolic, sympify in-process", timed(legacy, SYMBOLIC, runs))
+    report("symbolic, worker (first call)", timed(compute(engine), SYMBOLIC, 1))
+    report("symbolic, cached", timed(compute(engine), SYMBOLIC, runs))
+    print(engine.stats())
+
+    start = time.perf_counter()
+    answer = compute(engine)(PATHOLOGICAL)
+    print(f"{PATHOLOGICAL} through the engine: {time.perf_counter() - start:.2f} s -> {answer}")
+    print(f"{PATHOLOGICAL} in-process sympify would run until the process is killed; not timed")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,71 @@
+"""
+bench_memo.py
+Hit ratio and latency saved by ChatBot's response memo on a replayed
+message log. The log mixes popular messages (greetings, topics, typos,
+follow-ups, near misses answered by retrieval, arithmetic and sympy math)
+with a long tail of one-off arithmetic and unmatched chatter, over many
+sessions; it is replayed through one bot with the memo and without it.
+Usage: python -m benchmarks.bench_memo [records]
+"""
+import json
+import random
+import statistics
+import sys
+import time
+
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_replay import DEFAULT_SESSION, parse_record
+from chatbot_sessions import SessionManager
+
+POPULAR = [
+    "hello", "hi there", "what is a list?", "explain again", "how do loops work?", "what is a dictonary",
+    "tell me about tupels", "how do i store key value pairs", "solve: 12*7 + 3", "simplify: (x**2 - 1)/(x - 1)",
+    "differentiate: sin(x)*x**2", "what is a class?", "thanks", "how do exceptions work?",
+]
+
+
+def generate(count, sessions, rng):
+    weights = [1 / (rank + 1) for rank in range(len(POPULAR))]
+    for _ in range(count):
+        if rng.random() < 0.8:
+            message = rng.choices(POPULAR, weights)[0]
+        elif rng.random() < 0.5:
+            message = f"solve: {rng.randrange(1000)} * {rng.randrange(1000)}"
+        else:
+            message = f"random chatter number {rng.randrange(10**6)}"
+        yield json.dumps({"session_id": f"user-{rng.randrange(sessions)}", "message": message})
+
+
+def run(bot, lines):
+    sessions = SessionManager()
+    latencies = []
+    for line in lines:
+        record = parse_record(line)
+        session = sessions.get(record.get("session_id", DEFAULT_SESSION))
+        start = time.perf_counter()
+        bot.get_bot_response(record["message"], session)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 20000
+    lines = list(generate(count, count // 20, random.Random(7)))
+    warm = ChatBot(memo=False)
+    for message in POPULAR:
+        warm.get_bot_response(message)  # load the router, retrieval index and sympy workers for both runs
+    print(f"{count} records over {count // 20} sessions")
+    print(f"  {'memo':<10}{'seconds':>9}{'mean us':>10}{'p50 us':>9}{'p99 us':>10}{'hit ratio':>11}")
+    for name, memo in (("off", False), ("on", SearchCache(maxsize=8192, ttl=float("inf")))):
+        start = time.perf_counter()
+        latencies = run(ChatBot(memo=memo), lines)
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        ratio = f"{memo.stats()['hit_ratio']:.1%}" if memo else "-"
+        print(f"  {name:<10}{elapsed:>9.2f}{statistics.mean(latencies) * 1e6:>10.1f}"
+              f"{latencies[len(latencies) // 2] * 1e6:>9.1f}{latencies[int(len(latencies) * 0.99)] * 1e6:>10.1f}{ratio:>11}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
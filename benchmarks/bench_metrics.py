@@ -0,0 +1,58 @@
+"""
+bench_metrics.py
+Overhead of chatbot_metrics on the cheapest answers (greeting, topic,
+fallback), where it would show the most: the uninstrumented answer path,
+get_bot_response with metrics disabled (the default), enabled, and enabled
+with a cProfile sample every 100 answers. Also prints an example export.
+Usage: python -m benchmarks.bench_metrics [iterations]
+"""
+import statistics
+import sys
+import time
+
+from chatbot_core import ChatBot
+from chatbot_metrics import METRICS, SamplingProfiler
+
+MESSAGES = ["hello", "what is a list?", "what about cobol?"]
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(MESSAGES[i % len(MESSAGES)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(argv):
+    iterations = int(argv[1]) if len(argv) > 1 else 100000
+    rounds = 7
+    bot = ChatBot()
+    session = bot.session
+    scenarios = [
+        ("uninstrumented", None, lambda m: bot._answer(session, m.strip().lower())),
+        ("metrics disabled", False, bot.get_bot_response),
+        ("metrics enabled", True, bot.get_bot_response),
+        ("enabled + cProfile 1/100", SamplingProfiler(every=100), bot.get_bot_response),
+    ]
+    # Interleaved rounds, so drift in machine speed hits every scenario alike
+    times = {name: [] for name, _, _ in scenarios}
+    for _ in range(rounds):
+        for name, mode, fn in scenarios:
+            if mode is None or mode is False:
+                METRICS.disable()
+            else:
+                METRICS.enable(profiler=mode if isinstance(mode, SamplingProfiler) else None)
+            times[name].append(timed(fn, iterations // rounds))
+    METRICS.disable()
+    baseline = statistics.median(times["uninstrumented"])
+    print(f"{iterations} cheap answers per scenario; microseconds per answer")
+    print(f"  {'':<28}{'best':>8}{'median':>8}{'overhead (median)':>19}")
+    for name, _, _ in scenarios:
+        median = statistics.median(times[name])
+        print(f"  {name:<28}{min(times[name]):>8.2f}{median:>8.2f}{(median / baseline - 1) * 100:>18.1f}%")
+    print("\nExample export:")
+    print("\n".join(line for line in METRICS.to_prometheus().splitlines() if "_count" in line or "_sum" in line))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
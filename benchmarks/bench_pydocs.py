@@ -0,0 +1,76 @@
+"""
+bench_pydocs.py
+Size, build time and query latency of the offline Python docs index
+(chatbot_pydocs) over the installed standard library: a full build, a
+rebuild with nothing changed, and a rebuild after a tenth of the modules
+changed (as after a Python patch release), then opening the index and
+searching it.
+Usage: python -m benchmarks.bench_pydocs [queries]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from chatbot_pydocs import DocsIndex, build
+
+QUERIES = [
+    "json dumps", "sort a list", "sorted", "how do i split a string", "defaultdict", "regular expression",
+    "list append", "open a file", "asyncio gather", "read csv file", "random number", "sqrt", "os.path.join",
+    "datetime now", "subprocess run", "thread lock", "dataclass", "itertools chain", "pathlib", "zip",
+    "http server", "sqlite3 connect", "nothing like this at all",
+]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "pydocs")
+        (count, parsed), seconds = timed(build, directory)
+        print(f"full build: {count} entries from {parsed} modules in {seconds:.2f} s")
+        (_, parsed), seconds = timed(build, directory)
+        print(f"rebuild, nothing changed: {parsed} modules re-read, {seconds:.2f} s")
+        cache_path = os.path.join(directory, "modules.json")
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+        for key in random.Random(0).sample(sorted(cache), len(cache) // 10):
+            del cache[key]
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        (_, parsed), seconds = timed(build, directory)
+        print(f"rebuild, a tenth changed: {parsed} modules re-read, {seconds:.2f} s")
+
+        sizes = {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+        mapped = sum(size for name, size in sizes.items() if not name.endswith(".json"))
+        print(f"index: {mapped / 2**20:.2f} MiB memory-mapped "
+              f"(+ {sizes['modules.json'] / 2**20:.2f} MiB build cache, read only when rebuilding)")
+        for name, size in sizes.items():
+            print(f"  {name:14} {size / 1024:8.0f} KiB")
+
+        index, seconds = timed(DocsIndex, directory)
+        print(f"open: {seconds * 1e3:.2f} ms")
+        latencies = []
+        for _ in range(rounds):
+            for query in QUERIES:
+                _, seconds = timed(index.search, query, 1)
+                latencies.append(seconds)
+        latencies.sort()
+        print(f"query: p50 {statistics.median(latencies) * 1e3:.3f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms, max {latencies[-1] * 1e3:.3f} ms")
+        for query in QUERIES[:8]:
+            hits = index.search(query, 1)
+            print(f"  {query!r}: {hits[0].name if hits else None}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+bench_replay.py
+Throughput of chatbot_replay on a generated log of offline messages
+(greetings, topics, follow-ups, arithmetic), in-process and with growing
+numbers of worker processes, plus the peak memory of the parent process,
+which stays flat as the log grows because of the in-flight window.
+Usage: python -m benchmarks.bench_replay [records] [workers,...]
+"""
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+from chatbot_replay import replay
+
+MESSAGES = ["hello", "what is a list?", "explain again", "how do loops work?", "what is a dictionary?",
+            "solve: 12*7 + 3", "tell me about functions", "thanks"]
+
+
+def generate(count, sessions, rng):
+    for _ in range(count):
+        yield json.dumps({"session_id": f"user-{rng.randrange(sessions)}", "message": rng.choice(MESSAGES)})
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 50000
+    worker_counts = [int(n) for n in argv[2].split(",")] if len(argv) > 2 else [0, 1, 2, os.cpu_count() or 4]
+    print(f"{count} records over {count // 10} sessions")
+    print(f"  {'workers':<10}{'seconds':>10}{'records/s':>12}{'parent peak MB':>16}")
+    for workers in worker_counts:
+        written = 0
+
+        def write(result):
+            nonlocal written
+            written += 1
+        start = time.perf_counter()
+        replay(generate(count, count // 10, random.Random(42)), write, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert written == count
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"  {workers:<10}{elapsed:>10.2f}{count / elapsed:>12.0f}{peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
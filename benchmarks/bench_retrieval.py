@@ -0,0 +1,109 @@
+"""
+bench_retrieval.py
+Recall and latency of chatbot_retrieval's VectorIndex on a synthetic
+corpus. Documents are random phrases over a Zipf-distributed vocabulary;
+each query is a few words of one document, one of them misspelled, plus
+words from elsewhere, and counts as recalled when that document is in the
+top k. Also times building, saving and memory-mapping the index, and
+single queries against batches.
+Usage: python -m benchmarks.bench_retrieval [documents] [dim]
+    e.g. python -m benchmarks.bench_retrieval 100000 256
+"""
+import itertools
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+from chatbot_retrieval import VectorIndex, available
+
+VOCABULARY = 20000
+QUERIES = 1000
+
+
+def make_corpus(count, rng):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))) for _ in range(VOCABULARY)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    docs = [" ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(8, 24))) for _ in range(count)]
+    return words, docs
+
+
+def misspell(word, rng):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def make_queries(docs, words, rng):
+    queries = []
+    for _ in range(QUERIES):
+        target = rng.randrange(len(docs))
+        picked = rng.sample(docs[target].split(), 4)
+        picked[0] = misspell(picked[0], rng)
+        picked.append(rng.choice(words))  # a word the document probably lacks
+        queries.append((" ".join(picked), target))
+    return queries
+
+
+def recall(index, queries, k):
+    hits = index.search_many([text for text, _ in queries], k=k)
+    return sum(target in [doc_id for _, doc_id in found] for found, (_, target) in zip(hits, queries)) / len(queries)
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def main():
+    if not available():
+        sys.exit("numpy is not installed")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    rng = random.Random(42)
+    words, docs = make_corpus(count, rng)
+    queries = make_queries(docs, words, rng)
+
+    start = time.perf_counter()
+    built = VectorIndex.build(enumerate(docs), dim=dim)
+    build_s = time.perf_counter() - start
+    print(f"{count} documents, dim {dim}: built in {build_s:.2f} s ({built.matrix.nbytes / 2**20:.0f} MiB matrix)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index")
+        start = time.perf_counter()
+        built.save(path)
+        print(f"  saved in {time.perf_counter() - start:.2f} s")
+        del built
+        start = time.perf_counter()
+        index = VectorIndex.open(path)
+        open_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        index.search(queries[0][0])
+        first_ms = (time.perf_counter() - start) * 1e3
+        print(f"  memory-mapped in {open_ms:.2f} ms; first query (cold pages) {first_ms:.1f} ms")
+
+        for k in (1, 5):
+            print(f"  recall@{k}: {recall(index, queries, k):.1%}")
+
+        latencies = []
+        for text, _ in queries:
+            start = time.perf_counter()
+            index.search(text, k=5)
+            latencies.append(time.perf_counter() - start)
+        print(f"  single query: p50 {statistics.median(latencies) * 1e3:.2f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1e3:.2f} ms")
+        for batch in (16, 64):
+            texts = [text for text, _ in queries]
+            start = time.perf_counter()
+            for i in range(0, len(texts), batch):
+                index.search_many(texts[i:i + batch], k=5)
+            per_query = (time.perf_counter() - start) / len(texts)
+            print(f"  batches of {batch}: {per_query * 1e3:.3f} ms per query")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
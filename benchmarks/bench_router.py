@@ -0,0 +1,88 @@
+"""
+bench_router.py
+Compares the compiled IntentRouter against the original if/for chain from
+ChatBot.get_bot_response, with the shipped topics and with thousands of
+synthetic ones.
+Usage: python -m benchmarks.bench_router [synthetic_topic_count]
+"""
+import random
+import string
+import sys
+import timeit
+
+from chatbot_core import GREETINGS, TOPICS, default_router
+from chatbot_router import IntentRouter, SEARCH_WIKIPEDIA, SEARCH_DOCS, RUN_CODE, SOLVE, EXPLAIN_AGAIN
+
+MESSAGES = [
+    "what is a variable?",
+    "show me a loop example",
+    "search wikipedia for guido van rossum",
+    "run code: x = 1 + 2",
+    "solve: 2*x + 3",
+    "explain again",
+    "how do exceptions work in python",
+    "tell me something interesting about programming languages",
+]
+
+
+def legacy_route(user_input, topics):
+    """The original classification chain, with the per-call dict rebuild."""
+    topics = dict(topics)
+    if any(greet in user_input for greet in ["hello", "hi", "hey"]):
+        return "greeting"
+    if user_input.startswith("search wikipedia for "):
+        return "search_wikipedia"
+    if user_input.startswith("search python docs for "):
+        return "search_docs"
+    for key in topics:
+        if key in user_input:
+            return key
+    if user_input.startswith("run code:"):
+        return "run_code"
+    if user_input.startswith("solve:"):
+        return "solve"
+    if "explain again" in user_input:
+        return "explain_again"
+    return "fallback"
+
+
+def synthetic_topics(count, seed=0):
+    rng = random.Random(seed)
+    topics = {}
+    while len(topics) < count:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(7, 12)))
+        topics[word] = f"Explanation of {word}."
+    return topics
+
+
+def build_router(topics):
+    return IntentRouter(
+        GREETINGS, topics,
+        priority_prefixes=[(SEARCH_WIKIPEDIA, "search wikipedia for "), (SEARCH_DOCS, "search python docs for ")],
+        prefixes=[(RUN_CODE, "run code:"), (SOLVE, "solve:")],
+        phrases=[(EXPLAIN_AGAIN, "explain again")],
+    )
+
+
+def per_message_us(func, number):
+    total = min(timeit.repeat(lambda: [func(m) for m in MESSAGES], number=number, repeat=5))
+    return total / (number * len(MESSAGES)) * 1e6
+
+
+def main(argv):
+    synthetic = int(argv[1]) if len(argv) > 1 else 5000
+    cases = [("shipped", TOPICS, default_router())]
+    topics = dict(TOPICS)
+    topics.update(synthetic_topics(synthetic))
+    cases.append((f"+{synthetic} synthetic", topics, build_router(topics)))
+
+    print(f"{'topics':<22}{'legacy us/msg':>16}{'router us/msg':>16}{'speedup':>10}")
+    for name, topics, router in cases:
+        number = 2000 if len(topics) < 100 else 20
+        legacy = per_message_us(lambda m: legacy_route(m, topics), number)
+        compiled = per_message_us(router.route, number)
+        print(f"{name:<22}{legacy:>16.2f}{compiled:>16.2f}{legacy / compiled:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,66 @@
+"""
+bench_sandbox.py
+Latency of "run code:" in the warm worker pool against the old in-process
+exec, the cost of a cold worker spawn, and how long a trivial snippet waits
+while other pool workers are busy with hostile ones.
+Usage: python -m benchmarks.bench_sandbox [runs]
+"""
+import statistics
+import sys
+import time
+
+from chatbot_sandbox import ALLOWED_BUILTINS, SandboxPool
+
+SNIPPET = "total = 0\nfor i in range(100):\n    total += i"
+HOSTILE = ["while True: pass", "s = 'x' * (10 ** 9)", "while 1:\n    try:\n        while 1: pass\n    except:\n        pass"]
+
+
+def legacy_exec(code):
+    """The original ChatBot._run_code."""
+    builtins = __builtins__ if isinstance(__builtins__, dict) else vars(__builtins__)
+    local_vars = {}
+    exec(code, {'__builtins__': {name: builtins[name] for name in ALLOWED_BUILTINS}}, local_vars)
+    return local_vars
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times):
+    times = sorted(times)
+    p50 = statistics.median(times) * 1e3
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1e3
+    print(f"{name:<34}{p50:>10.3f}{p99:>10.3f}")
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 1000
+    print(f"{runs} runs; milliseconds")
+    print(f"{'':<34}{'p50':>10}{'p99':>10}")
+    report("in-process exec (unsafe)", timed(lambda: legacy_exec(SNIPPET), runs))
+
+    start = time.perf_counter()
+    pool = SandboxPool(size=4)
+    spawn = time.perf_counter() - start
+    pool.run("x = 1")  # first reply includes interpreter start-up
+    print(f"cold start of 4 workers: {(time.perf_counter() - start) * 1e3:.1f} ms (spawn calls {spawn * 1e3:.1f} ms)")
+    report("warm pool", timed(lambda: pool.run(SNIPPET), runs))
+
+    # Three workers busy with hostile snippets; the fourth keeps serving
+    hostile = [pool.submit(code) for code in HOSTILE]
+    busy = timed(lambda: pool.run(SNIPPET), min(runs, 200))
+    report("warm pool, 3 workers under attack", busy)
+    for future in hostile:
+        print(f"  hostile snippet -> {future.result()['error']}")
+    print(f"workers restarted: {pool.restarts}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
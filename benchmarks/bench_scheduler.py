@@ -0,0 +1,107 @@
+"""
+bench_scheduler.py
+Latency of cheap messages (greetings, topics, arithmetic) on chatbot_server
+while many connections saturate it with expensive ones (uncached Wikipedia
+searches against a slow mock server, and sympy math), with the admission
+scheduler and without it (every message alike behind max_inflight). The
+heavy connections share a few sessions and retry as soon as they are
+answered or refused, like a misbehaving client; the light ones send one
+message at a time. Reports cheap-message p50/p99/max and how many expensive
+messages were answered and shed.
+Usage: python -m benchmarks.bench_scheduler [--heavy 200] [--light 10] [--seconds 5] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import threading
+import time
+
+from benchmarks.load_server import HttpChat
+from benchmarks.mock_server import MockServer
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_server import ChatServer
+
+CHEAP = ["hello", "what is a list?", "how do loops work?", "explain again", "solve: 12*7 + 3"]
+
+
+def start_server(mock, scheduler):
+    """ChatServer on its own loop in a thread; returns (server, loop, thread)."""
+    bot = ChatBot(search_cache=SearchCache(ttl=0, negative_ttl=0), memo=False, pydocs=False)
+    bot.wikipedia_url = mock.url + "/wiki/{}"
+    server = ChatServer(bot=bot, port=0, scheduler=None if scheduler else False)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(server.shutdown())
+        loop.close()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+    return server, loop, thread
+
+
+async def heavy(server, session, counter, stop, counts):
+    chat = HttpChat()
+    await chat.connect(server.host, server.port)
+    while time.perf_counter() < stop:
+        n = next(counter)
+        message = f"simplify: (x**{n % 50 + 2} - 1)/(x - 1)" if n % 10 == 0 else f"search wikipedia for topic {n}"
+        counts["answered" if await chat.send(message, session) else "shed"] += 1
+    chat.writer.close()
+
+
+async def light(server, session, stop, latencies):
+    chat = HttpChat()
+    await chat.connect(server.host, server.port)
+    for message in itertools.cycle(CHEAP):
+        if time.perf_counter() >= stop:
+            break
+        start = time.perf_counter()
+        await chat.send(message, session)
+        latencies.append(time.perf_counter() - start)
+    chat.writer.close()
+
+
+async def load(server, heavies, lights, seconds):
+    stop = time.perf_counter() + seconds
+    latencies, counts, counter = [], {"answered": 0, "shed": 0}, itertools.count()
+    await asyncio.gather(
+        *(heavy(server, f"heavy-{i % 10}", counter, stop, counts) for i in range(heavies)),
+        *(light(server, f"light-{i}", stop, latencies) for i in range(lights)),
+    )
+    return latencies, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--heavy", type=int, default=200, help="connections sending expensive messages")
+    parser.add_argument("--light", type=int, default=10, help="connections sending cheap messages")
+    parser.add_argument("--seconds", type=float, default=5.0, help="per run")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock Wikipedia response time")
+    args = parser.parse_args(argv)
+    print(f"{args.heavy} heavy + {args.light} light connections for {args.seconds:g} s; "
+          f"mock search latency {args.latency * 1e3:.0f} ms")
+    print(f"  {'scheduler':<10}{'cheap':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'expensive ok':>14}{'shed':>8}")
+    for scheduler in (False, True):
+        with MockServer(latency=args.latency) as mock:
+            server, loop, thread = start_server(mock, scheduler)
+            try:
+                latencies, counts = asyncio.run(load(server, args.heavy, args.light, args.seconds))
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"  {'on' if scheduler else 'off':<10}{len(latencies):>8}{statistics.median(latencies) * 1e3:>9.2f}"
+              f"{p99 * 1e3:>9.2f}{latencies[-1] * 1e3:>9.2f}{counts['answered']:>14}{counts['shed']:>8}")
+
+
+if __name__ == "__main__":
+    main()
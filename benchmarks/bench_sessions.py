@@ -0,0 +1,95 @@
+"""
+bench_sessions.py
+Cost of many concurrent conversations: memory per session for the old
+list-based state against SessionState's slotted deque, SessionManager.get()
+latency with 100k live sessions (hits, new sessions and LRU evictions) and
+the cost of spilling evicted sessions to SQLite and restoring them.
+Usage: python -m benchmarks.bench_sessions [sessions]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from chatbot_sessions import SessionManager, SessionState
+
+MESSAGES = [("user", "what is a list?"), ("bot", "A list is an ordered, mutable collection of items."),
+            ("user", "explain again"), ("bot", "A list is an ordered, mutable collection of items."),
+            ("user", "thanks"), ("bot", "Hello! How can I help you learn Python today?")]
+
+
+class LegacyState:
+    """The per-bot state before sessions: a list trimmed by slicing, plus loose attributes."""
+
+    def __init__(self):
+        self.history = []
+        self.last_topic = None
+        self.awaiting_visual_example = False
+        self.last_visual_request = None
+
+    def add(self, message):
+        self.history.append(message)
+        self.history = self.history[-6:]
+
+
+def bytes_per_state(make, add, count=20000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    states = []
+    for _ in range(count):
+        state = make()
+        for role, text in MESSAGES:
+            # Distinct strings, as real messages would be
+            add(state, (role, text + " "))
+        states.append(state)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return used / count
+
+
+def timed(fn, keys):
+    times = []
+    for key in keys:
+        start = time.perf_counter()
+        fn(key)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times) * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def report(name, result):
+    print(f"  {name:<30}{result[0]:>10.2f}{result[1]:>10.2f}")
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 100000
+    rng = random.Random(42)
+    legacy = bytes_per_state(LegacyState, LegacyState.add)
+    slotted = bytes_per_state(SessionState, lambda state, message: state.history.append(message))
+    print(f"Memory per session with {len(MESSAGES)} messages: list {legacy:.0f} B, SessionState {slotted:.0f} B")
+
+    manager = SessionManager(max_sessions=count)
+    for i in range(count):
+        manager.get(i)
+    print(f"\nSessionManager.get() with {count} sessions; microseconds")
+    print(f"  {'':<30}{'p50':>10}{'p99':>10}")
+    report("hit", timed(manager.get, [rng.randrange(count) for _ in range(20000)]))
+    report("new session (evicts LRU)", timed(manager.get, range(count, count + 20000)))
+    print(f"  evictions: {manager.evictions}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spilling = SessionManager(max_sessions=count // 10, spill_path=os.path.join(tmp, "sessions.db"))
+        for i in range(count // 10):
+            spilling.get(i).history.extend(MESSAGES)
+        report("new session (spills LRU)", timed(spilling.get, range(count, count + 5000)))
+        report("restore spilled session", timed(spilling.get, range(5000)))
+        print(f"  spilled: {len(spilling.spill)}, restored: {spilling.restored}")
+        spilling.spill.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
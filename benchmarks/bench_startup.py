@@ -0,0 +1,90 @@
+"""
+bench_startup.py
+Cold-start cost of the chatbot, each scenario in a fresh interpreter:
+time to import chatbot_core, to the first rendered ChatApp window (when a
+display and customtkinter are available) and to the first response, with
+the current lazy imports against the old eager ones (requests, bs4, sympy,
+aiohttp, pygments, transformers, torch, whichever are installed). The
+slowest imports come from python -X importtime.
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EAGER = ["requests", "bs4", "sympy", "aiohttp", "pygments", "transformers", "torch"]
+
+# Prints "<event> <epoch seconds>" as the app comes up
+CHILD = r"""
+import importlib, os, sys, time
+def mark(event):
+    print(event, time.time(), flush=True)
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+import chatbot_core
+mark("import")
+if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+    try:
+        import customtkinter as ctk
+        from chatbot_gui import ChatApp
+        root = ctk.CTk()
+        app = ChatApp(root, preload_after_ms=None)
+        root.update()
+        mark("window")
+        root.destroy()
+    except Exception:
+        pass
+chatbot_core.ChatBot().get_bot_response("hello")
+mark("response")
+"""
+
+
+def run_child(preimports, importtime=False):
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD] + preimports
+    start = time.time()
+    done = subprocess.run(args, cwd=ROOT, capture_output=True, text=True, check=True)
+    marks = {}
+    for line in done.stdout.splitlines():
+        event, at = line.split()
+        marks[event] = float(at) - start
+    return marks, done.stderr
+
+
+def slowest_imports(stderr, count=8):
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 5
+    installed = [name for name in EAGER if subprocess.run(
+        [sys.executable, "-c", f"import {name}"], capture_output=True).returncode == 0]
+    print(f"eager imports available: {', '.join(installed) or 'none'}")
+    print(f"{runs} fresh interpreters each; milliseconds from process start")
+    print(f"{'':<8}{'import':>10}{'window':>10}{'response':>10}")
+    for name, preimports in (("lazy", []), ("eager", installed)):
+        results = [run_child(preimports)[0] for _ in range(runs)]
+        cells = []
+        for event in ("import", "window", "response"):
+            times = [r[event] for r in results if event in r]
+            cells.append(f"{statistics.median(times) * 1e3:>10.1f}" if times else f"{'-':>10}")
+        print(f"{name:<8}{''.join(cells)}")
+    _, stderr = run_child([], importtime=True)
+    print("slowest imports, lazy (cumulative us):")
+    for cumulative, module in slowest_imports(stderr):
+        print(f"{cumulative:>10}  {module}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,89 @@
+"""
+bench_transcript.py
+Appends 10k messages and reports per-append time, comparing the old
+Label-per-message frame (pack + update_idletasks + bbox scrollregion) with
+VirtualTranscript. Uses real Tk when a display is available; otherwise only
+the virtual transcript runs, against the fake canvas in fake_tk.
+Usage: python -m benchmarks.bench_transcript [messages]
+"""
+import statistics
+import sys
+import time
+import tkinter as tk
+
+from benchmarks.fake_tk import FakeCanvas, FakeLabel
+from chatbot_transcript import VirtualTranscript
+
+
+class LegacyTranscript:
+    """The original add_chat_bubble from chatbot_gui/chatbotV2."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.frame = tk.Frame(canvas, bg="#23272f")
+        self.frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=self.frame, anchor="nw")
+
+    def append(self, text, sender="bot"):
+        anchor = "w" if sender == "bot" else "e"
+        bubble = tk.Label(
+            self.frame, text=text, bg="#3a3f4b" if sender == "bot" else "#1976d2",
+            fg="#eeeeee", font=("Segoe UI", 13), wraplength=340,
+            justify=tk.LEFT if sender == "bot" else tk.RIGHT,
+            padx=12, pady=8, bd=0, relief=tk.FLAT, anchor=anchor,
+        )
+        bubble.pack(anchor=anchor, padx=(12, 60) if sender == "bot" else (60, 12), pady=4)
+        self.canvas.update_idletasks()
+        self.canvas.yview_moveto(1.0)
+
+
+def message(i):
+    if i % 2:
+        return f"user message {i}"
+    return f"Bot answer {i}: A list holds items. Example: fruits = ['apple', 'banana']" + " more" * (i % 7)
+
+
+def run(transcript, count, settle):
+    times = []
+    for i in range(count):
+        start = time.perf_counter()
+        transcript.append(message(i), sender="user" if i % 2 else "bot")
+        settle()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(name, times):
+    chunk = max(1, len(times) // 10)
+    first = statistics.mean(times[:chunk]) * 1e6
+    last = statistics.mean(times[-chunk:]) * 1e6
+    print(f"{name:<24}{statistics.mean(times) * 1e6:>12.1f}{first:>14.1f}{last:>14.1f}")
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 10000
+    print(f"{count} appends; microseconds per append")
+    print(f"{'transcript':<24}{'mean':>12}{'first 10%':>14}{'last 10%':>14}")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        root = None
+    if root is None:
+        canvas = FakeCanvas()
+        transcript = VirtualTranscript(canvas, label_factory=FakeLabel)
+        report("virtual (fake Tk)", run(transcript, count, lambda: None))
+        print(f"label widgets: {transcript.widget_count}; no display, so the Tk comparison was skipped")
+        return
+    root.geometry("500x650")
+    for name, factory in (("legacy Label per msg", LegacyTranscript), ("virtual", VirtualTranscript)):
+        canvas = tk.Canvas(root, bg="#23272f", highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True)
+        root.update()
+        transcript = factory(canvas)
+        report(name, run(transcript, count, root.update_idletasks))
+        canvas.destroy()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
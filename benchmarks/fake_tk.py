@@ -0,0 +1,118 @@
+"""
+fake_tk.py
+Minimal stand-ins for the Tk canvas and label calls the chat GUIs make, so
+transcript logic can be tested and benchmarked without a display.
+"""
+import math
+
+LINE_HEIGHT = 22
+CHAR_WIDTH = 8
+
+
+class FakeLabel:
+    created = 0
+
+    def __init__(self, master=None, **options):
+        FakeLabel.created += 1
+        self.options = dict(options)
+        self.bindings = {}
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def pack(self, **options):
+        self.options["packed"] = True
+
+    def winfo_reqheight(self):
+        wrap = self.options.get("wraplength", 340)
+        lines = sum(max(1, math.ceil(len(line) * CHAR_WIDTH / wrap)) for line in str(self.options.get("text", "")).split("\n"))
+        return lines * LINE_HEIGHT + 2 * self.options.get("pady", 0)
+
+
+class FakeCanvas:
+    def __init__(self, width=476, height=560):
+        self.width = width
+        self.height = height
+        self.top = 0.0
+        self.scroll_height = 0
+        self.items = {}
+        self.bindings = {}
+        self.pending = []  # (due_ms, callback) from after()
+        self.now_ms = 0
+
+    def configure(self, **options):
+        if "scrollregion" in options:
+            self.scroll_height = options["scrollregion"][3]
+            self._clamp()
+
+    config = configure
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def create_window(self, x, y, window=None, **options):
+        item = len(self.items) + 1
+        self.items[item] = {"coords": (x, y), "window": window, "state": "normal", **options}
+        return item
+
+    def coords(self, item, x, y):
+        self.items[item]["coords"] = (x, y)
+
+    def itemconfigure(self, item, **options):
+        self.items[item].update(options)
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def yview(self, *args):
+        if not args:
+            if not self.scroll_height:
+                return (0.0, 1.0)
+            return (self.top / self.scroll_height, min(1.0, (self.top + self.height) / self.scroll_height))
+        if args[0] == "moveto":
+            self.yview_moveto(float(args[1]))
+        elif args[0] == "scroll":
+            self.top += int(args[1]) * 20
+            self._clamp()
+
+    def yview_moveto(self, fraction):
+        self.top = fraction * self.scroll_height
+        self._clamp()
+
+    def update_idletasks(self):
+        pass
+
+    def after(self, ms, func):
+        self.pending.append((self.now_ms + ms, func))
+
+    def advance(self, ms):
+        """Move the fake clock forward, running the after() callbacks that come due."""
+        end = self.now_ms + ms
+        while self.pending:
+            due, func = min(self.pending, key=lambda p: p[0])
+            if due > end:
+                break
+            self.pending.remove((due, func))
+            self.now_ms = due
+            func()
+        self.now_ms = end
+
+    def bbox(self, tag):
+        return (0, 0, self.width, self.scroll_height)
+
+    def _clamp(self):
+        self.top = max(0.0, min(self.top, self.scroll_height - self.height))
+
+    def visible_windows(self):
+        return [i for i in self.items.values() if i["state"] == "normal"]
@@ -0,0 +1,144 @@
+"""
+load_server.py
+Load generator for chatbot_server: concurrent keep-alive HTTP (or
+WebSocket) clients send a mixed workload of topic questions, math and
+cached searches, and the script reports requests/sec and p50/p95/p99
+latency overall and per kind. By default it starts its own server, in a
+thread with its own event loop, with searches answered by the local mock
+server; pass --url to load an already running server instead.
+Usage: python -m benchmarks.load_server [--clients 50] [--requests 200] [--websocket] [--url http://host:port]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.mock_server import MockServer
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_server import TEXT, ChatServer, encode_frame, read_frame
+
+WORKLOAD = {
+    "topic": ["what is a list?", "how do loops work?", "what is a dictionary?", "explain again", "hello"],
+    "math": ["solve: 12*7 + 3", "solve: 2**64 - 1", "solve: x**2 = 4", "differentiate: x**3"],
+    "search": [f"search wikipedia for topic {i}" for i in range(20)] + [f"search python docs for module{i}" for i in range(20)],
+}
+
+
+def start_server(mock, workers):
+    """ChatServer on its own loop in a thread; returns (server, loop, thread)."""
+    bot = ChatBot(search_cache=SearchCache(maxsize=100000), pydocs=False)  # docs searches go to the mock server
+    bot.wikipedia_url = mock.url + "/wiki/{}"
+    bot.python_docs_url = mock.url + "/search.html?q={}"
+    server = ChatServer(bot=bot, port=0, workers=workers, max_queued=100000)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(server.shutdown())
+        loop.close()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+    return server, loop, thread
+
+
+class HttpChat:
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def send(self, message, session_id=None):
+        body = json.dumps({"message": message, "session_id": session_id}).encode()
+        self.writer.write(f"POST /chat HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while (line := await self.reader.readline()) != b"\r\n":
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await self.reader.readexactly(length)
+        return status == 200
+
+
+class WebSocketChat:
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /chat HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                           f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await self.reader.readuntil(b"\r\n\r\n")
+
+    async def send(self, message):
+        self.writer.write(encode_frame(TEXT, message, mask=True))
+        _, _, payload = await read_frame(self.reader, 1 << 24)
+        return "response" in json.loads(payload)
+
+
+async def client(host, port, transport, count, rng, latencies, failures):
+    chat = transport()
+    await chat.connect(host, port)
+    for _ in range(count):
+        kind = rng.choices(list(WORKLOAD), weights=[6, 2, 2])[0]
+        start = time.perf_counter()
+        ok = await chat.send(rng.choice(WORKLOAD[kind]))
+        latencies[kind].append(time.perf_counter() - start)
+        failures[kind] += not ok
+    chat.writer.close()
+
+
+def report(name, times, failures):
+    times = sorted(times)
+    pick = lambda q: times[min(len(times) - 1, int(len(times) * q))] * 1e3
+    print(f"  {name:<8}{len(times):>8}{failures:>8}{statistics.median(times) * 1e3:>10.2f}{pick(0.95):>10.2f}{pick(0.99):>10.2f}")
+
+
+async def run_load(host, port, clients, requests, transport):
+    latencies = {kind: [] for kind in WORKLOAD}
+    failures = dict.fromkeys(WORKLOAD, 0)
+    rng = random.Random(42)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, transport, requests, random.Random(rng.random()), latencies, failures) for _ in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+    total = clients * requests
+    print(f"{total} requests from {clients} clients in {elapsed:.2f} s: {total / elapsed:.0f} requests/s")
+    print(f"  {'kind':<8}{'count':>8}{'failed':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind in WORKLOAD:
+        report(kind, latencies[kind], failures[kind])
+    report("all", [t for times in latencies.values() for t in times], sum(failures.values()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="per client")
+    parser.add_argument("--workers", type=int, default=4, help="server worker threads (own server only)")
+    parser.add_argument("--websocket", action="store_true")
+    parser.add_argument("--url", help="load this server instead of starting one")
+    args = parser.parse_args(argv)
+    transport = WebSocketChat if args.websocket else HttpChat
+    if args.url:
+        url = urlsplit(args.url)
+        asyncio.run(run_load(url.hostname, url.port, args.clients, args.requests, transport))
+        return
+    with MockServer(latency=0.01) as mock:
+        server, loop, thread = start_server(mock, args.workers)
+        try:
+            asyncio.run(run_load(server.host, server.port, args.clients, args.requests, transport))
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+mock_server.py
+Local stand-in for en.wikipedia.org and docs.python.org, used by the tests
+and benchmarks so nothing touches the real network.
+
+    with MockServer(latency=0.01) as server:
+        bot.wikipedia_url = server.url + "/wiki/{}"
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WIKI_PAGE = """<!DOCTYPE html>
+<html><head><title>{title} - Wikipedia</title></head>
+<body><div id="content"><table class="infobox"><tr><td>infobox</td></tr></table>
+<p><b>{title}</b> is a topic served by the local mock server for testing the chatbot.</p>
+<p>Second paragraph.</p>{padding}</div></body></html>
+"""
+
+DOCS_PAGE = """<!DOCTYPE html>
+<html><body><ul class="search">
+<li class="search-hit"><a href="library/{q}.html">{q}</a> &mdash; Documentation for {q}.</li>
+<li class="search-hit"><a href="other.html">other</a></li>
+</ul></body></html>
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            flaky = server.fail_next > 0
+            if flaky:
+                server.fail_next -= 1
+        if server.latency:
+            time.sleep(server.latency)
+        url = urlparse(self.path)
+        if flaky:
+            self._send(503, "busy")
+        elif url.path.startswith("/wiki/"):
+            title = url.path[len("/wiki/"):].replace("_", " ")
+            if title.startswith("missing"):
+                self._send(404, "<html><body>Not found</body></html>")
+            else:
+                self._send(200, WIKI_PAGE.format(title=title, padding=server.padding))
+        elif url.path == "/search.html":
+            q = parse_qs(url.query).get("q", [""])[0]
+            self._send(200, DOCS_PAGE.format(q=q))
+        else:
+            self._send(404, "not found")
+
+    def _send(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # load tests open hundreds of connections at once
+
+
+class MockServer:
+    def __init__(self, latency=0.0, padding_kb=0):
+        self.httpd = _Server(("127.0.0.1", 0), _Handler)
+        self.httpd.lock = threading.Lock()
+        self.httpd.latency = latency
+        self.httpd.padding = "<div>" + "lorem ipsum " * (padding_kb * 85) + "</div>" if padding_kb else ""
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.fail_next = 0
+        self.url = "http://127.0.0.1:%d" % self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def fail(self, count):
+        """Answer the next `count` requests with 503."""
+        self.httpd.fail_next = count
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
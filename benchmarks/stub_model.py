@@ -0,0 +1,39 @@
+"""
+stub_model.py
+Tiny stand-in for the GPT-2 model in chatbot_generate, so the inference
+worker can be tested and benchmarked without transformers. Generating a
+batch costs one fixed per-token step plus a small per-row amount, like a
+forward pass on CPU, so batching pays off the way it does for the real model. With on_text it
+reports one word per step, like a streaming generate.
+"""
+import threading
+import time
+
+WORDS = "python is a language that makes code easy to read and write".split()
+
+
+class StubModel:
+    def __init__(self, step_seconds=0.002, row_seconds=0.0002, new_tokens=20, load_seconds=0.0):
+        self.step_seconds = step_seconds
+        self.row_seconds = row_seconds
+        self.new_tokens = new_tokens
+        self.batches = []
+        self.lock = threading.Lock()
+        time.sleep(load_seconds)
+
+    def _continuation(self, i):
+        return " ".join(WORDS[(i + j) % len(WORDS)] for j in range(self.new_tokens))
+
+    def generate_batch(self, prompts, max_length, on_text=None):
+        with self.lock:
+            self.batches.append(list(prompts))
+        step = self.step_seconds + self.row_seconds * len(prompts)
+        if on_text is None:
+            time.sleep(self.new_tokens * step)
+        else:
+            for t in range(self.new_tokens):
+                time.sleep(step)
+                for i, prompt in enumerate(prompts):
+                    word = WORDS[(i + t) % len(WORDS)]
+                    on_text(i, f"{prompt} {word}" if t == 0 else f" {word}")
+        return [f"{prompt} {self._continuation(i)}" for i, prompt in enumerate(prompts)]
@@ -0,0 +1,405 @@
+"""
+suite.py
+Reproducible benchmark suite over every ChatBot code path: each
+get_bot_response intent (greeting, topic, explain-again, fallback,
+Wikipedia and Python docs search against benchmarks.mock_server and the
+offline docs index, solve, sympy math, run code), chatbotV2's database
+lookup and GPT-2 fallback (with benchmarks.stub_model), and transcript
+bubble insertion on the fake Tk canvas, so it runs without a display.
+
+Each case is timed the way pyperf and timeit do it: warm up, calibrate a
+loop count so one run takes at least --min-time, then time --runs runs
+with the garbage collector off. Caches that would turn the work under test
+into a lookup are switched off (the memo case measures the memo itself).
+Results go to a JSON file with the interpreter, machine and git commit;
+compare reads two of them and exits 1 when any case's median slowed down
+by more than --threshold.
+
+Usage:
+    python -m benchmarks.suite run [-o results.json] [-k pattern] [--quick]
+    python -m benchmarks.suite compare base.json new.json [--threshold 0.10]
+    python -m benchmarks.suite list
+"""
+import argparse
+import fnmatch
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+
+from benchmarks.bench_db import make_database
+from benchmarks.fake_tk import FakeCanvas, FakeLabel
+from benchmarks.mock_server import MockServer
+from benchmarks.stub_model import StubModel
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot, default_router
+from chatbot_db import ChatDatabase
+from chatbot_generate import GenerationWorker
+from chatbot_http import HttpClient
+from chatbot_math import MathEngine
+from chatbot_pydocs import DocsIndex, build
+from chatbot_sandbox import SandboxPool
+from chatbot_transcript import VirtualTranscript
+
+FORMAT_VERSION = 1
+
+CASES = {}
+
+
+def case(name):
+    """Registers a generator that sets up a case, yields the function to time, then cleans up."""
+    def register(setup):
+        CASES[name] = contextmanager(setup)
+        return setup
+    return register
+
+
+def uncached_bot(**kwargs):
+    return ChatBot(search_cache=SearchCache(ttl=0, negative_ttl=0), memo=False, **kwargs)
+
+
+def ask(bot, message):
+    return lambda: bot.get_bot_response(message)
+
+
+# --- Intents answered in-process ---
+
+@case("intent.greeting")
+def greeting():
+    yield ask(uncached_bot(), "hello")
+
+
+@case("intent.topic")
+def topic():
+    yield ask(uncached_bot(), "what is a list?")
+
+
+@case("intent.topic_typo")
+def topic_typo():
+    yield ask(uncached_bot(), "what is a dictonary")
+
+
+@case("intent.explain_again")
+def explain_again():
+    bot = uncached_bot()
+    bot.get_bot_response("what is a list?")
+    yield ask(bot, "explain again")
+
+
+@case("intent.fallback")
+def fallback():
+    # Nearest-topic retrieval when NumPy is installed, then the canned reply
+    yield ask(uncached_bot(), "tell me something about the weather")
+
+
+@case("intent.memo_hit")
+def memo_hit():
+    bot = ChatBot(memo=SearchCache(maxsize=64, ttl=float("inf")))
+    yield ask(bot, "what is a list?")
+
+
+# --- Searches, against the local mock server ---
+
+@contextmanager
+def mock_web():
+    with MockServer() as server:
+        client = HttpClient(backoff_factor=0)
+        try:
+            yield server, client
+        finally:
+            client.close()
+
+
+@case("search.wikipedia")
+def search_wikipedia():
+    with mock_web() as (server, client):
+        bot = uncached_bot(http=client, pydocs=False)
+        bot.wikipedia_url = server.url + "/wiki/{}"
+        yield ask(bot, "search wikipedia for python")
+
+
+@case("search.docs_online")
+def search_docs_online():
+    with mock_web() as (server, client):
+        bot = uncached_bot(http=client, pydocs=False)
+        bot.python_docs_url = server.url + "/search.html?q={}"
+        yield ask(bot, "search python docs for json")
+
+
+@case("search.docs_offline")
+def search_docs_offline():
+    with tempfile.TemporaryDirectory() as tmp:
+        build(tmp)
+        index = DocsIndex(tmp)
+        try:
+            yield ask(uncached_bot(pydocs=index), "search python docs for json dumps")
+        finally:
+            index.close()
+
+
+# --- Work done in worker processes ---
+
+@case("math.solve")
+def solve():
+    engine = MathEngine(cache_size=0)
+    try:
+        yield ask(uncached_bot(math=engine), "solve: 12*7 + 3")
+    finally:
+        engine.close()
+
+
+@case("math.simplify")
+def simplify():
+    engine = MathEngine(cache_size=0)
+    try:
+        yield ask(uncached_bot(math=engine), "simplify: (x**2 - 1)/(x - 1)")
+    finally:
+        engine.close()
+
+
+@case("code.run")
+def run_code():
+    pool = SandboxPool(size=1)
+    try:
+        yield ask(uncached_bot(sandbox=pool), "run code: print(sum(range(100)))")
+    finally:
+        pool.close()
+
+
+# --- chatbotV2 (which builds its window at import, so its lookups are replayed here) ---
+
+@contextmanager
+def fact_database(facts=10000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chatbot.db")
+        make_database(path, facts)
+        db = ChatDatabase(path)
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+@case("v2.db_lookup")
+def db_lookup():
+    with fact_database() as db:
+        keys = itertools.cycle(["list dict", "loop thread", "json parse", "nothing like this"])  # the last one misses
+        yield lambda: db.find_fact(next(keys))
+
+
+@case("v2.gpt2_fallback")
+def gpt2_fallback():
+    """An unmatched message down chatbotV2's chain: topics, facts, code examples, then GPT-2."""
+    worker = GenerationWorker(lambda: StubModel(step_seconds=0.0001, row_seconds=0, new_tokens=20))
+    with fact_database() as db:
+        worker.generate("warm up")
+
+        def reply(text="tell me a joke about the weather"):
+            # Matches no topic, fact or code example
+            return (default_router().find_topic(text) or db.find_fact(text) or db.find_code_example(text)
+                    or worker.generate(text))
+        try:
+            yield reply
+        finally:
+            worker.close()
+
+
+# --- GUI, on the fake canvas ---
+
+def message(i):
+    if i % 2:
+        return f"user message {i}"
+    return f"Bot answer {i}: A list holds items. Example: fruits = ['apple', 'banana']" + " more" * (i % 7)
+
+
+@case("gui.append")
+def gui_append():
+    transcript = VirtualTranscript(FakeCanvas(), label_factory=FakeLabel)
+    count = itertools.count()
+
+    def append():
+        i = next(count)
+        transcript.append(message(i), sender="user" if i % 2 else "bot")
+    yield append
+
+
+@case("gui.stream_update")
+def gui_stream_update():
+    """Repainting the newest bubble as streamed words arrive."""
+    transcript = VirtualTranscript(FakeCanvas(), label_factory=FakeLabel)
+    for i in range(200):
+        transcript.append(message(i), sender="user" if i % 2 else "bot")
+    index = transcript.append("", sender="bot")
+    words = (message(0) + " ").split(" ") * 8
+    count = itertools.count()
+    yield lambda: transcript.update(index, " ".join(words[:next(count) % len(words)]))
+
+
+# --- Timing ---
+
+def timed(fn, loops):
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - start
+
+
+def measure(fn, runs=10, min_time=0.1, warmups=1):
+    """Seconds per call, one value per run, each run looping enough calls to last min_time."""
+    for _ in range(warmups):
+        fn()
+    loops = 1
+    while True:
+        elapsed = timed(fn, loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / elapsed) if elapsed else 0)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return loops, [timed(fn, loops) / loops for _ in range(runs)]
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def summarize(loops, values):
+    return {
+        "loops": loops,
+        "values": values,
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": min(values),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(runs, min_time):
+    return {
+        "format": FORMAT_VERSION,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": git_commit(),
+        "runs": runs,
+        "min_time": min_time,
+    }
+
+
+def select(patterns):
+    if not patterns:
+        return list(CASES)
+    return [name for name in CASES if any(fnmatch.fnmatch(name, p) or p in name for p in patterns)]
+
+
+def run(names, runs=10, min_time=0.1, out=print):
+    """Runs the named cases; returns the results document."""
+    random.seed(0)
+    results = {}
+    for name in names:
+        with ExitStack() as stack:
+            fn = stack.enter_context(CASES[name]())
+            results[name] = summarize(*measure(fn, runs, min_time))
+        gc.collect()
+        out(f"{name:<24}{format_time(results[name]['median']):>12} +- {format_time(results[name]['stdev'])}")
+    return {"metadata": metadata(runs, min_time), "benchmarks": results}
+
+
+# --- Comparing runs ---
+
+def compare(base, new, threshold=0.10):
+    """(name, base median, new median, ratio, status) for every case in either run."""
+    rows = []
+    old, cur = base["benchmarks"], new["benchmarks"]
+    for name in list(old) + [name for name in cur if name not in old]:
+        if name not in cur or name not in old:
+            rows.append((name, old.get(name, {}).get("median"), cur.get(name, {}).get("median"), None,
+                         "only in base" if name not in cur else "only in new"))
+            continue
+        ratio = cur[name]["median"] / old[name]["median"]
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "same"
+        rows.append((name, old[name]["median"], cur[name]["median"], ratio, status))
+    return rows
+
+
+def format_time(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and save the results as JSON")
+    run_parser.add_argument("-o", "--output", default="benchmark-results.json")
+    run_parser.add_argument("-k", dest="patterns", action="append", help="only cases matching this (repeatable)")
+    run_parser.add_argument("--runs", type=int, default=10)
+    run_parser.add_argument("--min-time", type=float, default=0.1, help="seconds per run")
+    run_parser.add_argument("--quick", action="store_true", help="3 runs of 0.02 s, for smoke testing")
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, as a fraction")
+    commands.add_parser("list", help="list the cases")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(CASES))
+        return 0
+    if args.command == "run":
+        names = select(args.patterns)
+        if not names:
+            parser.error(f"no case matches {args.patterns}")
+        runs, min_time = (3, 0.02) if args.quick else (args.runs, args.min_time)
+        results = run(names, runs, min_time)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {len(names)} results to {args.output}")
+        return 0
+
+    rows = compare(load(args.base), load(args.new), args.threshold)
+    print(f"{'case':<24}{'base':>12}{'new':>12}{'change':>9}  status")
+    for name, old, cur, ratio, status in rows:
+        change = f"{ratio - 1:+.1%}" if ratio is not None else "-"
+        print(f"{name:<24}{format_time(old):>12}{format_time(cur):>12}{change:>9}  {status}")
+    regressions = [row[0] for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,8 @@
 # --- Hugging Face GPT-2 Setup ---
-from transformers import pipeline, set_seed
-import torch
-
-# Load GPT-2 model and pipeline (only once, at startup)
-try:
-    gpt2_pipe = pipeline('text-generation', model='gpt2', device=0 if torch.cuda.is_available() else -1)
-except Exception as e:
-    gpt2_pipe = None
-    print(f"GPT-2 model could not be loaded: {e}")
+from chatbot_generate import GenerationWorker, ModelUnavailable
+
+# Loaded by its own inference thread on first use, or warmed once the UI is up
+gpt2 = GenerationWorker(max_length=60)
 # --- Simple code example handler ---
 def get_code_example(user_input):
     # This is a placeholder. You can expand this with more logic or database queries.
@@ -23,74 +18,96 @@ def get_code_example(user_input):
 # --- No NLTK: All tokenization and complexity checks removed ---
 
 # --- Imports ---
-import requests
 import customtkinter as ctk
-import sqlite3
 import tkinter as tk
-import sympy
 from tkinter import scrolledtext, Canvas
-from bs4 import BeautifulSoup
-from pygments import highlight
-from pygments.lexers import PythonLexer
-from pygments.formatters import HtmlFormatter
+from chatbot_core import default_router, preload
+from chatbot_db import ChatDatabase
+from chatbot_html import first_paragraph_text, release
+from chatbot_http import default_client
+from chatbot_knowledge import TOPICS_PATH, default_knowledge_base
+from chatbot_math import EVALUATE, MathError, default_engine
+from chatbot_retrieval import MIN_SCORE, chatbot_documents, open_or_build
+from chatbot_sessions import SessionManager
+from chatbot_transcript import StreamingBubble, VirtualTranscript
 
 
 # --- Database setup ---
-conn = sqlite3.connect('chatbot.db')
-cursor = conn.cursor()
-cursor.execute('''CREATE TABLE IF NOT EXISTS facts (key TEXT PRIMARY KEY, value TEXT)''')
-cursor.execute('''CREATE TABLE IF NOT EXISTS code_examples (id INTEGER PRIMARY KEY, language TEXT, snippet TEXT, explanation TEXT)''')
-conn.commit()
-
-
-# --- Responses dictionary ---
-responses = {
-    'hello': 'Hello! How can I help you learn Python today?',
-    'variable': 'A variable stores data. Example: x = 5',
-    'loop': 'A loop repeats code. Example: for i in range(5): print(i)',
-    'function': 'A function is a block of code. Example: def greet(): print("Hi")',
-    'list': 'A list holds items. Example: fruits = ["apple", "banana"]',
-    'tuple': 'A tuple is like a list but unchangeable. Example: coords = (1, 2)',
-    'bye': 'Goodbye! Happy coding!'
-}
-
-
-# --- Global state for visual confirmation ---
-awaiting_visual_example = False
-last_visual_request = None
-
+# Facts, code examples (with full-text indexes) and the conversation log;
+# pooled reads and batched background writes, so any thread may use it
+db = ChatDatabase('chatbot.db')
+
+
+# --- Retrieval over topics, facts and code examples (needs numpy) ---
+INDEX_DIR = 'chatbot_index'
+_retrieval_index = None
+
+def retrieval_index():
+    # Memory-mapped from INDEX_DIR, rebuilt there first if topics.json or the facts or code examples
+    # changed since (not on every logged message, as the file's mtime would)
+    global _retrieval_index
+    if _retrieval_index is None:
+        _retrieval_index = open_or_build(
+            INDEX_DIR, lambda: chatbot_documents(default_knowledge_base(), db), [TOPICS_PATH], db.version()
+        )
+    return _retrieval_index
+
+def retrieve(user_input):
+    # Answer from the closest document, or None if nothing is close enough
+    index = retrieval_index()
+    if index is None:
+        return None
+    hits = index.search(user_input, k=1)
+    if not hits or hits[0][0] < MIN_SCORE:
+        return None
+    kind, _, key = hits[0][1].partition(':')
+    if kind == 'topic' and key in default_knowledge_base():
+        return f"I think you're asking about: {key}. {default_knowledge_base()[key]}"
+    if kind == 'fact':
+        value = db.get_fact(key)
+        if value is not None:
+            return f"From my database: {value}"
+    if kind == 'code':
+        example = db.get_code_example(int(key))
+        if example:
+            return f"Code example: {example[0]}\nExplanation: {example[1]}"
+    return None  # removed from the database since the index was built
+
+
+# --- Per-session state (visual confirmation), keyed by session id ---
+sessions = SessionManager()
+LOCAL_SESSION = "local"  # the one user of this window
+
+
+
+FALLBACK_RESPONSE = (
+    "I'm not sure about that. Try rephrasing, ask about Python basics, or request an example!\n"
+    "You can ask about variables, loops, functions, lists, tuples, dictionaries, sets, or request code examples."
+)
 
 
 # --- Bot logic ---
-def get_bot_response(user_input, depth=0):
-    global awaiting_visual_example, last_visual_request
+def get_bot_response(user_input, depth=0, stream=False, session_id=LOCAL_SESSION):
+    # With stream=True a GPT-2 answer comes back as a TextStream instead of a string
+    session = sessions.get(session_id)
     user_input = user_input.strip()
     # Handle confirmation for visual example
-    if awaiting_visual_example:
+    if session.awaiting_visual_example:
         if "yes" in user_input.lower():
-            awaiting_visual_example = False
-            return generate_visual_example_response(last_visual_request)
+            session.awaiting_visual_example = False
+            return generate_visual_example_response(session.last_visual_request)
         elif "no" in user_input.lower():
-            awaiting_visual_example = False
+            session.awaiting_visual_example = False
             return "Okay, let me know if you want a visual example later."
         else:
             return "Please answer 'yes' or 'no' if you want a visual example."
 
-    # Python help topics (fallback)
-    topics = {
-        "variable": "A variable stores data. Example: x = 5",
-        "loop": "A loop repeats code. Example: for i in range(5): print(i)",
-        "function": "A function is a block of code. Example: def greet(): print('Hi')",
-        "list": "A list holds items. Example: fruits = ['apple', 'banana']",
-        "tuple": "A tuple is like a list but unchangeable. Example: coords = (1, 2)",
-        "dictionary": "A dictionary stores key-value pairs. Example: ages = {'Alice': 30, 'Bob': 25}",
-        "set": "A set is a collection of unique items. Example: nums = {1, 2, 3}"
-    }
-    for key, val in topics.items():
-        if key in user_input.lower():
-            awaiting_visual_example = True
-            last_visual_request = key
-            return val + "\nWould you like a visual example? (yes/no)"
+    # Python help topics (fallback), shared with chatbot_core via topics.json; whole words, typos allowed
+    key = default_router().find_topic(user_input.lower())
+    if key is not None:
+        session.awaiting_visual_example = True
+        session.last_visual_request = key
+        return default_knowledge_base()[key] + "\nWould you like a visual example? (yes/no)"
 
     # Wikipedia search
     if "wikipedia" in user_input.lower() or "wiki" in user_input.lower() or user_input.lower().startswith('search'):
@@ -98,11 +115,11 @@ def get_bot_response(user_input, depth=0):
         if topic:
             url = f"https://en.wikipedia.org/wiki/{topic.replace(' ', '_')}"
             try:
-                response = requests.get(url)
+                response = default_client().get(url, stream=True)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    summary = soup.find('p').text[:200] + '...'
+                    summary = first_paragraph_text(response)[:200] + '...'
                     return f"Summary on {topic}: {summary}"
+                release(response)
                 return "Couldn't find that on Wikipedia."
             except Exception as e:
                 return f"Error searching: {str(e)}"
@@ -115,9 +132,9 @@ def get_bot_response(user_input, depth=0):
     # Math evaluation
     if any(op in user_input for op in ["+", "-", "*", "/", "^"]):
         try:
-            result = sympy.sympify(user_input)
+            result = default_engine().compute(EVALUATE, user_input)
             return f"Math result: {result}"
-        except Exception:
+        except MathError:
             pass
 
     # Goodbye
@@ -125,31 +142,33 @@ def get_bot_response(user_input, depth=0):
         return "Goodbye! Happy coding!"
 
     # Query DB for facts
-    cursor.execute("SELECT value FROM facts WHERE key LIKE ?", (f"%{user_input}%",))
-    db_result = cursor.fetchone()
-    if db_result:
-        return f"From my database: {db_result[0]}"
+    db_result = db.find_fact(user_input)
+    if db_result is not None:
+        return f"From my database: {db_result}"
 
     # Query DB for code examples
-    cursor.execute("SELECT snippet, explanation FROM code_examples WHERE language LIKE ? OR explanation LIKE ?", (f"%{user_input}%", f"%{user_input}%"))
-    code_result = cursor.fetchone()
+    code_result = db.find_code_example(user_input)
     if code_result:
         snippet, explanation = code_result
         return f"Code example: {snippet}\nExplanation: {explanation}"
 
+    # Nearest topic, fact or code example by meaning, before paying for GPT-2
+    retrieved = retrieve(user_input)
+    if retrieved is not None:
+        return retrieved
+
     # --- GPT-2 fallback for general conversation ---
-    if gpt2_pipe:
-        try:
-            gpt2_out = gpt2_pipe(user_input, max_length=60, num_return_sequences=1, pad_token_id=50256)
-            return gpt2_out[0]['generated_text'].strip()
-        except Exception as e:
-            return f"[GPT-2 error: {e}]"
+    if stream and not gpt2.failed:
+        return gpt2.stream(user_input)
+    try:
+        return gpt2.generate(user_input)
+    except ModelUnavailable:
+        pass  # no model; use the canned fallback below
+    except Exception as e:
+        return f"[GPT-2 error: {e}]"
 
     # Fallback
-    return (
-        "I'm not sure about that. Try rephrasing, ask about Python basics, or request an example!\n"
-        "You can ask about variables, loops, functions, lists, tuples, dictionaries, sets, or request code examples."
-    )
+    return FALLBACK_RESPONSE
 
 
 
@@ -179,12 +198,9 @@ main_frame.pack(padx=12, pady=12, fill=ctk.BOTH, expand=True)
 
 # Scrollable chat area (using Canvas for chat bubbles)
 chat_canvas = tk.Canvas(main_frame, bg="#23272f", highlightthickness=0)
-chat_scrollbar = ctk.CTkScrollbar(main_frame, command=chat_canvas.yview)
-chat_bubble_frame = tk.Frame(chat_canvas, bg="#23272f")
-chat_bubble_frame.bind(
-    "<Configure>", lambda e: chat_canvas.configure(scrollregion=chat_canvas.bbox("all"))
-)
-chat_canvas.create_window((0, 0), window=chat_bubble_frame, anchor="nw")
+# Virtualized: only bubbles in view have widgets, the history lives in transcript.model
+transcript = VirtualTranscript(chat_canvas)
+chat_scrollbar = ctk.CTkScrollbar(main_frame, command=transcript.yview)
 chat_canvas.configure(yscrollcommand=chat_scrollbar.set)
 chat_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0,0), pady=(0,0))
 chat_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -221,29 +237,19 @@ user_entry.bind('<Return>', on_enter)
 
 # --- Chat bubble display logic ---
 def add_chat_bubble(text, sender="bot"):
-    bubble_color = "#3a3f4b" if sender == "bot" else "#1976d2"
-    text_color = "#eeeeee" if sender == "bot" else "#ffffff"
-    anchor = "w" if sender == "bot" else "e"
-    padx = (12, 60) if sender == "bot" else (60, 12)
-    bubble = tk.Label(
-        chat_bubble_frame,
-        text=text,
-        bg=bubble_color,
-        fg=text_color,
-        font=("Segoe UI", 13),
-        wraplength=340,
-        justify=tk.LEFT if sender == "bot" else tk.RIGHT,
-        padx=12, pady=8,
-        bd=0,
-        relief=tk.FLAT,
-        anchor=anchor
-    )
-    bubble.pack(anchor=anchor, padx=padx, pady=4, fill=None)
-    chat_canvas.update_idletasks()
-    chat_canvas.yview_moveto(1.0)
+    return transcript.append(text, sender)
+
+def gpt2_error_text(error):
+    if isinstance(error, ModelUnavailable):
+        return FALLBACK_RESPONSE
+    return f"[GPT-2 error: {error}]"
+
+def show_stream(stream):
+    # The bubble grows as GPT-2 generates; the Tk loop keeps running meanwhile
+    bubble = add_chat_bubble("…", sender="bot")
+    return StreamingBubble(transcript, bubble, stream, on_error=gpt2_error_text).start()
 
 def send_message():
-    global awaiting_visual_example, last_visual_request
     try:
         user_msg = user_entry.get()
         if user_msg.strip() == '':
@@ -251,8 +257,16 @@ def send_message():
         if len(user_msg) > 200:
             raise ValueError("Message too long! Keep it under 200 chars.")
         add_chat_bubble(user_msg, sender="user")
-        bot_response = get_bot_response(user_msg)
-        add_chat_bubble(bot_response, sender="bot")
+        db.log_message(LOCAL_SESSION, "user", user_msg)
+        bot_response = get_bot_response(user_msg, stream=True)
+        if isinstance(bot_response, str):
+            add_chat_bubble(bot_response, sender="bot")
+            db.log_message(LOCAL_SESSION, "bot", bot_response)
+        else:
+            show_stream(bot_response)
+            bot_response.future.add_done_callback(
+                lambda f: f.exception() is None and db.log_message(LOCAL_SESSION, "bot", f.result())
+            )
         user_entry.delete(0, tk.END)
     except ValueError as e:
         add_chat_bubble('Error - ' + str(e), sender="bot")
@@ -261,5 +275,8 @@ def send_message():
 # --- Welcome message ---
 add_chat_bubble('Hello! Ask me about Python basics or say "search [topic]" for info.', sender="bot")
 
+# Heavy imports (requests, sympy, transformers) happen in the background once the window is up
+root.after(500, lambda: (gpt2.warm(), preload()))
 root.mainloop()
+db.close()  # commits the last of the conversation log
 # --- End of chatbot code ---
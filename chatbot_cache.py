@@ -0,0 +1,258 @@
+"""
+chatbot_cache.py
+Response cache for the external search helpers.
+An in-memory LRU with per-entry TTL, an optional SQLite tier that survives
+restarts, and coalescing so concurrent lookups of one key share a fetch.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+_ABANDONED = object()  # an aget_or_fetch leader's result when it was cancelled
+
+
+def cache_key(source, topic):
+    """Normalize a search topic so 'List  Comprehension' and 'list comprehension' share an entry."""
+    return f"{source}:{' '.join(topic.lower().split())}"
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            if item[0] <= self.clock():
+                del self._data[key]
+                self.expirations += 1
+                return MISSING
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (self.clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def discard(self, predicate):
+        """Drop every entry whose key predicate(key) is true for."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def __contains__(self, key):
+        """Whether key holds an unexpired value; unlike get(), leaves its LRU position alone."""
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[0] > self.clock()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """On-disk tier; uses wall-clock expiry so entries stay valid across restarts."""
+
+    def __init__(self, path, clock=time.time):
+        self.clock = clock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+
+    def get(self, key):
+        """Return (value, seconds_left) or MISSING."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return MISSING
+        left = row[1] - self.clock()
+        return (row[0], left) if left > 0 else MISSING
+
+    def set(self, key, value, ttl):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, self.clock() + ttl),
+            )
+
+    def purge_expired(self):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (self.clock(),)).rowcount
+
+    def close(self):
+        self._conn.close()
+
+
+class InFlight:
+    """Runs func once per key at a time; concurrent callers wait for and share its result."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.coalesced += 1
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+        try:
+            call[1] = func()
+            return call[1]
+        except BaseException as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+
+
+class SearchCache:
+    """
+    Two-tier cache for search answers. fetch() returns (value, found): found
+    results are kept for ttl seconds, misses (found=False) for negative_ttl,
+    and found=None marks a transient failure that is not cached at all.
+    Exceptions from fetch() propagate and are never cached.
+    """
+
+    def __init__(self, maxsize=1024, ttl=6 * 3600, negative_ttl=10 * 60, disk_path=None, memory=None, disk=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = memory if memory is not None else LRUCache(maxsize)
+        self.disk = disk if disk is not None else (SQLiteCache(disk_path) if disk_path else None)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._inflight = InFlight()
+        self._afutures = {}
+
+    def __contains__(self, key):
+        """Whether key would be answered from memory, without counting a hit or refreshing its LRU position."""
+        return key in self.memory
+
+    def discard(self, predicate):
+        """Forget the in-memory entries whose key predicate(key) is true for."""
+        self.memory.discard(predicate)
+
+    def get_or_fetch(self, key, fetch):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        return self._inflight.run(key, lambda: self._load(key, fetch))
+
+    async def aget_or_fetch(self, key, afetch):
+        """
+        get_or_fetch for coroutines: concurrent awaits of one key share a
+        single afetch(). If the caller running it is cancelled, the others
+        are not; one of them runs afetch() instead.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            value = self.memory.get(key)
+            if value is not MISSING:
+                self.hits += 1
+                return value
+            pending = self._afutures.get((loop, key))
+            if pending is None:
+                return await self._alead(loop, key, afetch)
+            value = await asyncio.shield(pending)
+            if value is not _ABANDONED:
+                self._inflight.coalesced += 1
+                return value
+
+    async def _alead(self, loop, key, afetch):
+        pending = self._afutures[(loop, key)] = loop.create_future()
+        # Mark a failure as retrieved even when nobody else was waiting on it
+        pending.add_done_callback(lambda f: f.exception())
+        try:
+            value = self._cached(key)
+            if value is MISSING:
+                self.misses += 1
+                value, found = await afetch()
+                self._store(key, value, found)
+            pending.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Only this caller was cancelled; the ones waiting on it try again
+            pending.set_result(_ABANDONED)
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            del self._afutures[(loop, key)]
+
+    def _load(self, key, fetch):
+        value = self._cached(key)
+        if value is MISSING:
+            self.misses += 1
+            value, found = fetch()
+            self._store(key, value, found)
+        return value
+
+    def _cached(self, key):
+        # Another caller may have filled the entry while we waited to lead
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        if self.disk is not None:
+            item = self.disk.get(key)
+            if item is not MISSING:
+                self.disk_hits += 1
+                self.memory.set(key, item[0], item[1])
+                return item[0]
+        return MISSING
+
+    def _store(self, key, value, found):
+        if found is not None:
+            ttl = self.ttl if found else self.negative_ttl
+            self.memory.set(key, value, ttl)
+            if self.disk is not None:
+                self.disk.set(key, value, ttl)
+
+    def stats(self):
+        answered = self.hits + self.disk_hits + self._inflight.coalesced  # without a fetch of their own
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self._inflight.coalesced,
+            "hit_ratio": answered / (answered + self.misses) if answered + self.misses else 0.0,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+            "size": len(self.memory),
+        }
@@ -0,0 +1,244 @@
+"""
+chatbot_db.py
+Thread-safe access to chatbotV2's SQLite database.
+Reads borrow a connection from a small pool, so any thread (the GUI, a
+server worker, the retrieval index builder) can query at once; WAL mode
+lets them read while a write is committing, and each pooled connection
+keeps its prepared statements cached between queries. Writes (facts, code
+examples and the conversation log) are queued to one background writer,
+which commits everything waiting in a single transaction, so a burst of
+writes costs one commit instead of one each.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from chatbot_facts import INSERT_CODE_EXAMPLE_SQL, UPSERT_FACT_SQL, FactStore
+
+LOG_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS conversation_log (id INTEGER PRIMARY KEY, session_id TEXT, role TEXT, "
+    "message TEXT, created_at REAL)",
+    "CREATE INDEX IF NOT EXISTS conversation_log_session ON conversation_log (session_id, id)",
+]
+INSERT_LOG_SQL = "INSERT INTO conversation_log (session_id, role, message, created_at) VALUES (?, ?, ?, ?)"
+
+STATEMENT_CACHE = 128  # prepared statements kept per connection
+
+
+def connect(path, readonly=False):
+    conn = sqlite3.connect(path, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+    conn.execute("PRAGMA busy_timeout=5000")
+    # With WAL a commit needs no fsync of the main file; a power cut can lose the last commits, not corrupt
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if readonly:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+class ConnectionPool:
+    """Up to size connections made by connect(), lent to one thread at a time."""
+
+    def __init__(self, connect, size=4):
+        self._connect = connect
+        self.size = size
+        self._idle = queue.LifoQueue()  # the most recently used connection has the warmest cache
+        self._all = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        return self._idle.get()
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+
+
+class _Flush:
+    """Queue marker; its future completes once everything queued before it is committed."""
+
+    def __init__(self):
+        self.future = Future()
+
+
+class BatchWriter:
+    """
+    Runs write statements on one connection in a background thread. Each
+    transaction commits every write queued by the time the previous one
+    finished (up to batch_size), so writes batch up under load with no
+    added wait when idle. A failed batch is retried a statement at a time,
+    so one bad write doesn't take the others with it.
+    """
+
+    def __init__(self, conn, batch_size=1000, max_queued=100000):
+        self._conn = conn
+        self.batch_size = batch_size
+        self.writes = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue = queue.Queue(max_queued)  # put() blocks when the writer falls this far behind
+        self._thread = threading.Thread(target=self._run, name="chatbot-db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=()):
+        """Queue a write; returns a Future of its lastrowid."""
+        future = Future()
+        self._queue.put((sql, params, future))
+        return future
+
+    def flush(self, timeout=None):
+        """Wait until every write submitted so far is committed."""
+        marker = _Flush()
+        self._queue.put(marker)
+        marker.future.result(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+            if item is None:
+                return
+
+    def _commit(self, batch):
+        writes = [item for item in batch if not isinstance(item, _Flush)]
+        try:
+            with self._conn:
+                results = [self._conn.execute(sql, params).lastrowid for sql, params, _ in writes]
+        except sqlite3.Error:
+            results = None
+        if results is None:
+            results = []
+            for sql, params, future in writes:
+                try:
+                    with self._conn:
+                        results.append(self._conn.execute(sql, params).lastrowid)
+                except sqlite3.Error as e:
+                    self.errors += 1
+                    results.append(e)
+        for (_, _, future), result in zip(writes, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        self.writes += len(writes)
+        self.batches += 1
+        for item in batch:
+            if isinstance(item, _Flush):
+                item.future.set_result(None)
+
+
+class ChatDatabase:
+    """chatbotV2's facts, code examples and conversation log, safe to use from any thread."""
+
+    def __init__(self, path, pool_size=4, batch_size=1000):
+        self.path = path
+        conn = connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")  # persistent: stored in the database file
+        self.fts = FactStore(conn).fts
+        with conn:
+            for statement in LOG_SCHEMA:
+                conn.execute(statement)
+        self.pool = ConnectionPool(lambda: connect(path, readonly=True), pool_size)
+        self.writer = BatchWriter(conn, batch_size)
+        self._writer_conn = conn
+
+    @contextmanager
+    def _store(self):
+        with self.pool.connection() as conn:
+            yield FactStore(conn, fts=self.fts)
+
+    # --- Reads ---
+
+    def find_fact(self, text):
+        with self._store() as store:
+            return store.find_fact(text)
+
+    def find_code_example(self, text):
+        with self._store() as store:
+            return store.find_code_example(text)
+
+    def get_fact(self, key):
+        with self._store() as store:
+            return store.get_fact(key)
+
+    def get_code_example(self, rowid):
+        with self._store() as store:
+            return store.get_code_example(rowid)
+
+    def documents(self):
+        with self._store() as store:
+            yield from store.documents()
+
+    def version(self):
+        with self._store() as store:
+            return store.version()
+
+    def conversation(self, session_id, limit=50):
+        """The last limit (role, message, created_at) rows logged for a session, oldest first."""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT role, message, created_at FROM conversation_log WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+        return rows[::-1]
+
+    # --- Writes, committed in the background; each returns a Future ---
+
+    def add_fact(self, key, value):
+        return self.writer.submit(UPSERT_FACT_SQL, (key, value))
+
+    def add_code_example(self, language, snippet, explanation):
+        return self.writer.submit(INSERT_CODE_EXAMPLE_SQL, (language, snippet, explanation))
+
+    def log_message(self, session_id, role, message):
+        return self.writer.submit(INSERT_LOG_SQL, (session_id, role, message, time.time()))
+
+    def flush(self, timeout=None):
+        self.writer.flush(timeout)
+
+    def stats(self):
+        return {
+            "writes": self.writer.writes, "batches": self.writer.batches, "write_errors": self.writer.errors,
+            "connections": len(self.pool._all),
+        }
+
+    def close(self):
+        """Commit what is queued and close every connection."""
+        self.writer.close()
+        self._writer_conn.close()
+        self.pool.close()
@@ -0,0 +1,230 @@
+"""
+chatbot_facts.py
+Full-text lookup over chatbotV2's facts and code_examples tables.
+Each table gets an external-content FTS5 index that triggers keep in step
+with every insert, update and delete, and lookups return the best match by
+BM25 instead of the first row a LIKE '%...%' scan happens to reach. SQLite
+builds without FTS5 fall back to the original LIKE queries.
+Bulk load a corpus from JSON lines with:
+    python chatbot_facts.py load facts facts.jsonl [--db chatbot.db]
+"""
+import argparse
+import json
+import re
+import sqlite3
+from itertools import islice
+
+BASE_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS facts (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS code_examples (id INTEGER PRIMARY KEY, language TEXT, snippet TEXT, explanation TEXT)",
+]
+
+# table -> (indexed columns, rowid column)
+INDEXES = {
+    "facts": (("key",), "rowid"),
+    "code_examples": (("language", "explanation"), "id"),
+}
+
+TOKEN_RE = re.compile(r"\w+")
+
+# An upsert fires the update trigger; INSERT OR REPLACE would skip the delete trigger
+UPSERT_FACT_SQL = "INSERT INTO facts (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+INSERT_CODE_EXAMPLE_SQL = "INSERT INTO code_examples (language, snippet, explanation) VALUES (?, ?, ?)"
+
+
+def _triggers(table):
+    columns, rowid = INDEXES[table]
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {table}_fts({table}_fts, rowid, {cols}) VALUES ('delete', old.{rowid}, {old});"
+    insert = f"INSERT INTO {table}_fts(rowid, {cols}) VALUES (new.{rowid}, {new});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def match_query(text, columns):
+    """
+    FTS5 query requiring every word of text, the last one as a prefix, in
+    any of columns; None if text has no words. Words are quoted, so user
+    input can't inject FTS operators.
+    """
+    words = TOKEN_RE.findall(text.lower())
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return "{%s} : (%s)" % (" ".join(columns), " AND ".join(terms))
+
+
+class FactStore:
+    def __init__(self, conn, fts=None):
+        """
+        Creates the tables and indexes, unless fts says whether they are
+        already there (for another connection to a set-up database).
+        """
+        self.conn = conn
+        if fts is not None:
+            self.fts = fts
+            return
+        with conn:
+            for statement in BASE_SCHEMA:
+                conn.execute(statement)
+        self.fts = self._create_indexes()
+
+    def _create_indexes(self):
+        try:
+            with self.conn:
+                for table, (columns, rowid) in INDEXES.items():
+                    exists = self.conn.execute(
+                        "SELECT 1 FROM sqlite_master WHERE name = ?", (f"{table}_fts",)
+                    ).fetchone()
+                    self.conn.execute(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5("
+                        f"{', '.join(columns)}, content='{table}', content_rowid='{rowid}')"
+                    )
+                    for statement in _triggers(table):
+                        self.conn.execute(statement)
+                    if not exists:
+                        # Index the rows of a database created before the index existed
+                        self.conn.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            if "fts5" not in str(e):
+                raise
+            return False
+        return True
+
+    def find_fact(self, text):
+        """Value of the best-matching fact, or None."""
+        if not self.fts:
+            row = self.conn.execute("SELECT value FROM facts WHERE key LIKE ?", (f"%{text}%",)).fetchone()
+            return row[0] if row else None
+        query = match_query(text, ["key"])
+        if query is None:
+            return None
+        row = self.conn.execute(
+            "SELECT facts.value FROM facts_fts JOIN facts ON facts.rowid = facts_fts.rowid "
+            "WHERE facts_fts MATCH ? ORDER BY facts_fts.rank LIMIT 1",
+            (query,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def find_code_example(self, text):
+        """(snippet, explanation) of the best-matching code example, or None."""
+        if not self.fts:
+            return self.conn.execute(
+                "SELECT snippet, explanation FROM code_examples WHERE language LIKE ? OR explanation LIKE ?",
+                (f"%{text}%", f"%{text}%"),
+            ).fetchone()
+        query = match_query(text, ["language", "explanation"])
+        if query is None:
+            return None
+        return self.conn.execute(
+            "SELECT c.snippet, c.explanation FROM code_examples_fts JOIN code_examples c ON c.id = code_examples_fts.rowid "
+            "WHERE code_examples_fts MATCH ? ORDER BY code_examples_fts.rank LIMIT 1",
+            (query,),
+        ).fetchone()
+
+    def documents(self):
+        """(doc_id, text) of every fact and code example, for chatbot_retrieval."""
+        for key, value in self.conn.execute("SELECT key, value FROM facts"):
+            yield f"fact:{key}", f"{key} {value}"
+        for rowid, language, explanation in self.conn.execute("SELECT id, language, explanation FROM code_examples"):
+            yield f"code:{rowid}", f"{language} {explanation}"
+
+    def version(self):
+        """
+        [rows, max rowid] of facts and of code examples, which changes when
+        either gains or loses rows; chatbot_retrieval rebuilds its index
+        when it does. Unlike the file's mtime it ignores other tables.
+        """
+        return [
+            list(self.conn.execute(f"SELECT count(*), coalesce(max({rowid}), 0) FROM {table}").fetchone())
+            for table, (_, rowid) in INDEXES.items()
+        ]
+
+    def get_fact(self, key):
+        row = self.conn.execute("SELECT value FROM facts WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_code_example(self, rowid):
+        """(snippet, explanation) of the code example with this id, or None."""
+        return self.conn.execute("SELECT snippet, explanation FROM code_examples WHERE id = ?", (rowid,)).fetchone()
+
+    def add_fact(self, key, value):
+        with self.conn:
+            self._upsert_facts([(key, value)])
+
+    def add_code_example(self, language, snippet, explanation):
+        with self.conn:
+            self.conn.execute(INSERT_CODE_EXAMPLE_SQL, (language, snippet, explanation))
+
+    def _upsert_facts(self, rows):
+        self.conn.executemany(UPSERT_FACT_SQL, rows)
+
+    def bulk_load(self, table, rows, batch_size=50000):
+        """
+        Load an iterable of rows, (key, value) for facts or (language,
+        snippet, explanation) for code_examples, in one transaction. The
+        triggers are dropped for the load and the index is rebuilt once at
+        the end, which is much faster than updating it row by row.
+        Returns the number of rows read.
+        """
+        if table == "facts":
+            insert = self._upsert_facts
+        elif table == "code_examples":
+            def insert(batch):
+                self.conn.executemany(INSERT_CODE_EXAMPLE_SQL, batch)
+        else:
+            raise ValueError(f"unknown table: {table}")
+        rows = iter(rows)
+        count = 0
+        with self.conn:
+            # Explicit, so the trigger DDL rolls back with the rows if the load fails
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            if self.fts:
+                for suffix in ("ai", "ad", "au"):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                insert(batch)
+                count += len(batch)
+            if self.fts:
+                self.conn.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+                for statement in _triggers(table):
+                    self.conn.execute(statement)
+        return count
+
+
+def _read_jsonl(path, fields):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield tuple(record[name] for name in fields)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk load facts or code examples into the chatbot database.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="load a JSON lines file")
+    load.add_argument("table", choices=["facts", "code_examples"])
+    load.add_argument("path", help='one object per line: {"key", "value"} or {"language", "snippet", "explanation"}')
+    load.add_argument("--db", default="chatbot.db")
+    args = parser.parse_args(argv)
+    fields = ("key", "value") if args.table == "facts" else ("language", "snippet", "explanation")
+    conn = sqlite3.connect(args.db)
+    try:
+        count = FactStore(conn).bulk_load(args.table, _read_jsonl(args.path, fields))
+    finally:
+        conn.close()
+    print(f"Loaded {count} rows into {args.table}")
+
+
+if __name__ == "__main__":
+    main()
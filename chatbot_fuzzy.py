@@ -0,0 +1,218 @@
+"""
+chatbot_fuzzy.py
+Token-aware, typo-tolerant keyword matching for the intent router.
+Messages and keywords are split into word tokens, so "hi" no longer
+matches inside "this" or "while". Each token is looked up exactly, then
+(only when nothing matched exactly) in a SymSpell deletion index of the
+keyword vocabulary: every word is stored under all the strings left after
+deleting up to two characters from its first few letters, so the words
+within a couple of typos of a token are found with a handful of dict
+lookups however large the vocabulary is. Candidates are confirmed with a
+bounded Damerau-Levenshtein distance.
+"""
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+MAX_TYPOS = 2
+PREFIX_LENGTH = 7  # letters of each word that go into the deletion index
+FUZZY_CACHE_SIZE = 4096
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def allowed_typos(word):
+    """Typos tolerated in a keyword word: none for short words, where a typo is usually another word."""
+    if len(word) <= 4:
+        return 0
+    return 1 if len(word) <= 8 else 2
+
+
+def word_forms(token):
+    """token and its naive singulars, which count as exact matches ("loops", "classes", "dictionaries")."""
+    forms = [token]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        forms.append(token[:-1])
+        if token.endswith("ies"):
+            forms.append(token[:-3] + "y")
+        elif token.endswith("es"):
+            forms.append(token[:-2])
+    return forms
+
+
+def osa_distance(a, b, limit):
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions) between a and b, or None if it is over limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if a == b:
+        return 0
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        ca = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return None
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def deletes(word, distance):
+    """word and every string made by deleting up to distance characters from it."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+class SymSpellIndex:
+    """Words within max_distance typos of a query, by symmetric deletion."""
+
+    def __init__(self, words=(), max_distance=MAX_TYPOS, prefix_length=PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = set()
+        self._deletes = {}  # deleted prefix -> the word (or list of words) it came from
+        for word in words:
+            self.add(word)
+
+    def add(self, word, max_distance=None):
+        """Index word to be found within max_distance typos (at most the index's own)."""
+        if word in self.words:
+            return
+        self.words.add(word)
+        distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        for key in deletes(word[:self.prefix_length], distance):
+            bucket = self._deletes.get(key)
+            if bucket is None:
+                self._deletes[key] = word  # most keys have one word; a str saves a list per key
+            elif isinstance(bucket, str):
+                self._deletes[key] = [bucket, word]
+            else:
+                bucket.append(word)
+
+    def lookup(self, token, max_distance=None):
+        """[(distance, word)] within max_distance of token, closest first."""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if token in self.words:
+            results = [(0, token)]
+            if max_distance == 0:
+                return results
+        else:
+            results = []
+        seen = {token}
+        for key in deletes(token[:self.prefix_length], max_distance):
+            bucket = self._deletes.get(key)
+            if bucket is None:
+                continue
+            for word in (bucket,) if isinstance(bucket, str) else bucket:
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = osa_distance(token, word, max_distance)
+                if distance is not None:
+                    results.append((distance, word))
+        results.sort()
+        return results
+
+    def __len__(self):
+        return len(self.words)
+
+
+class KeywordIndex:
+    """
+    Ranked keywords (single words or phrases) matched against whole tokens.
+    best(text) returns the rank of the best keyword in text, or None: an
+    exact match (plurals included) always beats a fuzzy one, exact matches
+    go by rank and fuzzy ones by typo count, then rank.
+    """
+
+    def __init__(self, keywords):
+        # keywords: iterable of (phrase, rank); lower rank wins
+        self._keywords = []  # (tokens, rank)
+        self._by_first = {}  # first token -> indexes into _keywords
+        for phrase, rank in keywords:
+            tokens = tokenize(phrase)
+            if tokens:
+                self._by_first.setdefault(tokens[0], []).append(len(self._keywords))
+                self._keywords.append((tokens, rank))
+        self.spelling = SymSpellIndex()
+        for tokens, _ in self._keywords:
+            for token in tokens:
+                # Deletes only as deep as the word's own allowance; most words need one level, not two
+                self.spelling.add(token, allowed_typos(token))
+        self._fuzzy_cache = {}
+
+    def best(self, text, ranks=None):
+        """Rank of the best keyword in text, optionally only among ranks (a range or set)."""
+        tokens = tokenize(text)
+        found = self._best(tokens, ranks, fuzzy=False)
+        if found is None:
+            found = self._best(tokens, ranks, fuzzy=True)
+        return None if found is None else found[1]
+
+    def _best(self, tokens, ranks, fuzzy):
+        found = None  # (typos, rank)
+        for i, token in enumerate(tokens):
+            for word, typos in (self._fuzzy_words(token) if fuzzy else self._exact_words(token)):
+                for k in self._by_first.get(word, ()):
+                    keyword, rank = self._keywords[k]
+                    if ranks is not None and rank not in ranks:
+                        continue
+                    rest = self._rest(tokens, i, keyword, fuzzy)
+                    if rest is not None and (found is None or (typos + rest, rank) < found):
+                        found = (typos + rest, rank)
+        return found
+
+    def _exact_words(self, token):
+        return [(form, 0) for form in word_forms(token) if form in self.spelling.words]
+
+    def _fuzzy_words(self, token):
+        words = self._fuzzy_cache.get(token)
+        if words is None:
+            closest = {}
+            for form in word_forms(token):  # "tupels" is one typo from "tuple" once singular
+                if len(form) < 4:
+                    continue
+                for distance, word in self.spelling.lookup(form, 1 if len(form) < 8 else 2):
+                    if distance <= allowed_typos(word) and distance < closest.get(word, distance + 1):
+                        closest[word] = distance
+            words = list(closest.items())
+            if len(self._fuzzy_cache) >= FUZZY_CACHE_SIZE:
+                self._fuzzy_cache.clear()
+            self._fuzzy_cache[token] = words
+        return words
+
+    def _rest(self, tokens, i, keyword, fuzzy):
+        """Typos in the rest of a phrase keyword starting at tokens[i], or None if it doesn't match."""
+        if len(keyword) == 1:
+            return 0
+        if i + len(keyword) > len(tokens):
+            return None
+        total = 0
+        for token, word in zip(tokens[i + 1:], keyword[1:]):
+            if word in word_forms(token):
+                continue
+            if not fuzzy:
+                return None
+            distance = osa_distance(token, word, allowed_typos(word))
+            if distance is None:
+                return None
+            total += distance
+        return total
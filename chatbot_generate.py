@@ -0,0 +1,251 @@
+"""
+chatbot_generate.py
+GPT-2 fallback generation for chatbotV2.
+The model is loaded on first use, or ahead of time with warm(), by a
+dedicated inference thread instead of at import. Prompts that arrive
+together are micro-batched: the thread waits up to max_wait seconds for up
+to max_batch_size prompts and runs them through the model in one call.
+stream() and astream() hand out the text as the model produces it.
+Any object with generate_batch(prompts, max_length, on_text=None) -> list
+of texts can stand in for the model; it calls on_text(row, chunk) as each
+row's text grows.
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+_END = object()
+
+
+class ModelUnavailable(Exception):
+    """The model could not be loaded (e.g. transformers is not installed)."""
+
+
+class TextStream:
+    """
+    One prompt's generated text, in chunks as the model produces them. The
+    chunks join up to the full text, prompt included. Iterate it from a
+    thread, or poll drain() from a GUI loop; future holds the final text or
+    the error.
+    """
+
+    def __init__(self):
+        self.future = Future()
+        self.first_text_at = None  # perf_counter() when the first chunk arrived
+        self.finished = False  # set by drain() once it has seen the end
+        self._chunks = queue.SimpleQueue()
+        self._wake = None
+
+    def _put(self, chunk):
+        if self.first_text_at is None and chunk is not _END:
+            self.first_text_at = time.perf_counter()
+        self._chunks.put(chunk)
+        if self._wake is not None:
+            self._wake()
+
+    def __iter__(self):
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _END:
+                break
+            yield chunk
+        self.future.result()  # raise the error, if any
+
+    def drain(self):
+        """Text that arrived since the last call, without blocking; '' if none."""
+        parts = []
+        while True:
+            try:
+                chunk = self._chunks.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is _END:
+                self.finished = True
+                break
+            parts.append(chunk)
+        return "".join(parts)
+
+
+class _BatchStreamer:
+    """transformers streamer that reports each row's text as tokens are generated."""
+
+    def __init__(self, tokenizer, on_text):
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self.rows = None  # token ids per row
+        self.sent = None  # characters already reported per row
+
+    def put(self, value):
+        if self.rows is None:
+            # The first call carries the (padded) prompts
+            self.rows = [list(row) for row in value.tolist()]
+            self.sent = [0] * len(self.rows)
+            return
+        for i, token in enumerate(value.tolist()):
+            self.rows[i].append(token)
+            self._report(i, final=False)
+
+    def end(self):
+        for i in range(len(self.rows or ())):
+            self._report(i, final=True)
+
+    def _report(self, i, final):
+        text = self.tokenizer.decode(self.rows[i], skip_special_tokens=True)
+        # Hold back a partly decoded multi-byte character until its other tokens arrive
+        if len(text) > self.sent[i] and (final or not text.endswith("\ufffd")):
+            self.on_text(i, text[self.sent[i]:])
+            self.sent[i] = len(text)
+
+
+class TransformersModel:
+    """GPT-2 (or another causal LM) through transformers, batched with left padding."""
+
+    def __init__(self, name="gpt2"):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        self.torch = torch
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.tokenizer = AutoTokenizer.from_pretrained(name, padding_side="left")
+        self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(name).to(self.device).eval()
+
+    def generate_batch(self, prompts, max_length, on_text=None):
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+        # Like the pipeline's max_length, counted from the longest prompt in the batch
+        new_tokens = max(1, max_length - inputs["input_ids"].shape[1])
+        streamer = _BatchStreamer(self.tokenizer, on_text) if on_text is not None else None
+        with self.torch.inference_mode():
+            output = self.model.generate(
+                **inputs, max_new_tokens=new_tokens, do_sample=True, pad_token_id=self.tokenizer.eos_token_id,
+                streamer=streamer,
+            )
+        return [text.strip() for text in self.tokenizer.batch_decode(output, skip_special_tokens=True)]
+
+
+class GenerationWorker:
+    def __init__(self, load_model=TransformersModel, max_batch_size=8, max_wait=0.01, max_length=60):
+        self.load_model = load_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_length = max_length
+        self.load_seconds = None
+        self.batch_sizes = Counter()
+        self._model = None
+        self._load_error = None
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Start loading the model in the background; returns at once."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="gpt2-worker", daemon=True)
+                self._thread.start()
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    @property
+    def failed(self):
+        """True once loading the model has failed."""
+        return self._load_error is not None
+
+    def submit(self, prompt):
+        """Queue prompt; returns a Future for the generated text."""
+        self.warm()
+        future = Future()
+        self._queue.put((prompt, future, None))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        return self.submit(prompt).result(timeout)
+
+    def stream(self, prompt):
+        """Queue prompt; returns a TextStream of its text."""
+        self.warm()
+        stream = TextStream()
+        self._queue.put((prompt, stream.future, stream))
+        return stream
+
+    async def astream(self, prompt):
+        """Async iterator over the text chunks of prompt."""
+        loop = asyncio.get_running_loop()
+        arrived = asyncio.Event()
+        stream = TextStream()
+        stream._wake = lambda: loop.call_soon_threadsafe(arrived.set)
+        self.warm()
+        self._queue.put((prompt, stream.future, stream))
+        while not stream.finished:
+            await arrived.wait()
+            arrived.clear()
+            text = stream.drain()
+            if text:
+                yield text
+        stream.future.result()
+
+    def close(self):
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self._model = self.load_model()
+        except Exception as e:
+            self._load_error = ModelUnavailable(f"GPT-2 model could not be loaded: {e}")
+        self.load_seconds = time.perf_counter() - start
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self._generate(batch)
+            if stop:
+                return
+
+    def _next_batch(self):
+        """Block for one prompt, then gather more until the batch is full or max_wait passes."""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _generate(self, batch):
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            if self._load_error is not None:
+                raise self._load_error
+            self.batch_sizes[len(batch)] += 1
+            streams = [stream for _, _, stream in batch]
+            on_text = None
+            if any(streams):
+                def on_text(row, chunk):
+                    if streams[row] is not None:
+                        streams[row]._put(chunk)
+            texts = self._model.generate_batch([prompt for prompt, _, _ in batch], self.max_length, on_text=on_text)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for (_, future, _), text in zip(batch, texts):
+                future.set_result(text)
+        for _, _, stream in batch:
+            if stream is not None:
+                stream._put(_END)
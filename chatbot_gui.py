@@ -1,16 +1,28 @@
+import time
 import tkinter as tk
+from collections import deque
 import customtkinter as ctk
-from chatbot_core import ChatBot
+from chatbot_core import ChatBot, preload
+from chatbot_transcript import VirtualTranscript
+from chatbot_worker import ResponseWorker
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+POLL_MS = 20  # how often finished responses are picked up while any are pending
+TYPING_TEXT = "typing…"
+PRELOAD_MS = 500  # heavy imports start this long after the window is up
+
 class ChatApp:
-    def __init__(self, root):
+    def __init__(self, root, preload_after_ms=PRELOAD_MS):
         self.root = root
         self.root.title("Python Learning Chatbot")
         self.root.geometry("500x650")
         self.bot = ChatBot()
+        self.worker = ResponseWorker(self.bot.get_bot_response)
+        self.paint_latencies = deque(maxlen=500)  # seconds from Send to the user's bubble on screen
+        self._poll_id = None
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         # Main frame
         main_frame = ctk.CTkFrame(root, corner_radius=15)
@@ -18,12 +30,9 @@ class ChatApp:
 
         # Chat area
         self.chat_canvas = tk.Canvas(main_frame, bg="#23272f", highlightthickness=0)
-        self.chat_scrollbar = ctk.CTkScrollbar(main_frame, command=self.chat_canvas.yview)
-        self.chat_bubble_frame = tk.Frame(self.chat_canvas, bg="#23272f")
-        self.chat_bubble_frame.bind(
-            "<Configure>", lambda e: self.chat_canvas.configure(scrollregion=self.chat_canvas.bbox("all"))
-        )
-        self.chat_canvas.create_window((0, 0), window=self.chat_bubble_frame, anchor="nw")
+        # Only the bubbles in view have widgets; the full history lives in transcript.model
+        self.transcript = VirtualTranscript(self.chat_canvas)
+        self.chat_scrollbar = ctk.CTkScrollbar(main_frame, command=self.transcript.yview)
         self.chat_canvas.configure(yscrollcommand=self.chat_scrollbar.set)
         self.chat_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.chat_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -46,23 +55,17 @@ class ChatApp:
 
         # Welcome message
         self.add_chat_bubble('Hello! Ask me about Python basics or request a code example.', sender="bot")
+        if preload_after_ms is not None:
+            self.root.after(preload_after_ms, preload)
 
     def add_chat_bubble(self, text, sender="bot"):
-        bubble_color = "#3a3f4b" if sender == "bot" else "#1976d2"
-        text_color = "#eeeeee" if sender == "bot" else "#ffffff"
-        anchor = "w" if sender == "bot" else "e"
-        padx = (12, 60) if sender == "bot" else (60, 12)
-        bubble = tk.Label(
-            self.chat_bubble_frame, text=text, bg=bubble_color, fg=text_color,
-            font=("Segoe UI", 13), wraplength=340,
-            justify=tk.LEFT if sender == "bot" else tk.RIGHT,
-            padx=12, pady=8, bd=0, relief=tk.FLAT, anchor=anchor
-        )
-        bubble.pack(anchor=anchor, padx=padx, pady=4, fill=None)
-        self.chat_canvas.update_idletasks()
-        self.chat_canvas.yview_moveto(1.0)
+        return self.transcript.append(text, sender)
+
+    def set_bubble_text(self, bubble, text):
+        self.transcript.update(bubble, text)
 
     def send_message(self):
+        start = time.perf_counter()
         user_msg = self.user_entry.get()
         if not user_msg.strip():
             return
@@ -70,9 +73,31 @@ class ChatApp:
             self.add_chat_bubble("Message too long! Keep it under 200 chars.", sender="bot")
             return
         self.add_chat_bubble(user_msg, sender="user")
-        bot_response = self.bot.get_bot_response(user_msg)
-        self.add_chat_bubble(bot_response, sender="bot")
+        self.chat_canvas.update_idletasks()
+        self.paint_latencies.append(time.perf_counter() - start)
+        # The bot answers on a worker thread; the placeholder is filled in by _poll
+        placeholder = self.add_chat_bubble(TYPING_TEXT, sender="bot")
+        self.worker.submit(
+            user_msg,
+            on_done=lambda response: self.set_bubble_text(placeholder, response),
+            on_cancel=lambda: self.set_bubble_text(placeholder, "(Skipped, you sent a newer message.)"),
+        )
         self.user_entry.delete(0, tk.END)
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        self.worker.poll()
+        if self.worker.pending:
+            self._schedule_poll()
+
+    def close(self):
+        self.worker.shutdown()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = ctk.CTk()
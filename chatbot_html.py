@@ -0,0 +1,128 @@
+"""
+chatbot_html.py
+Streaming HTML extraction for the search helpers.
+Feeds the page to the stdlib HTMLParser chunk by chunk and stops as soon as
+the first matching element is closed, instead of building a full tree.
+The text matches BeautifulSoup's .text / get_text(strip=True).
+"""
+import time
+from html.parser import HTMLParser
+
+_SKIPPED = frozenset({"script", "style", "template"})
+CHUNK_SIZE = 16 * 1024
+DRAIN_LIMIT = 64 * 1024  # read up to this much leftover body to keep the connection pooled
+
+
+class FirstElementParser(HTMLParser):
+    def __init__(self, tag, css_class=None):
+        super().__init__(convert_charrefs=True)
+        self.tag = tag
+        self.css_class = css_class
+        self.found = False
+        self.done = False
+        self._depth = 0
+        self._skip = 0
+        self._segments = []
+        self._open = False  # whether the last segment is still receiving data
+        self.parse_seconds = 0.0  # time spent parsing, as opposed to waiting for the page
+
+    def feed(self, data):
+        start = time.perf_counter()
+        super().feed(data)
+        self.parse_seconds += time.perf_counter() - start
+
+    def close(self):
+        start = time.perf_counter()
+        super().close()
+        self.parse_seconds += time.perf_counter() - start
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self._depth:
+            self._open = False
+            if tag == self.tag:
+                self._depth += 1
+            elif tag in _SKIPPED:
+                self._skip += 1
+        elif tag == self.tag and self._matches(attrs):
+            self.found = True
+            self._depth = 1
+
+    def handle_endtag(self, tag):
+        if not self._depth or self.done:
+            return
+        self._open = False
+        if tag == self.tag:
+            self._depth -= 1
+            if not self._depth:
+                self.done = True
+        elif tag in _SKIPPED and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._depth and not self._skip and not self.done:
+            if self._open:
+                self._segments[-1] += data
+            else:
+                self._segments.append(data)
+                self._open = True
+
+    def handle_comment(self, data):
+        self._open = False
+
+    def _matches(self, attrs):
+        if self.css_class is None:
+            return True
+        for name, value in attrs:
+            if name == "class" and value and self.css_class in value.split():
+                return True
+        return False
+
+    @property
+    def text(self):
+        return "".join(self._segments)
+
+    @property
+    def stripped_text(self):
+        return "".join(s.strip() for s in self._segments)
+
+
+def first_element(chunks, tag, css_class=None):
+    """Return the parser after feeding chunks until the first tag[.css_class] closes."""
+    parser = FirstElementParser(tag, css_class)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            return parser
+    parser.close()
+    return parser
+
+
+def iter_response_text(response, chunk_size=CHUNK_SIZE):
+    if response.encoding is None:
+        response.encoding = "utf-8"
+    return response.iter_content(chunk_size=chunk_size, decode_unicode=True)
+
+
+def release(response):
+    """Finish a streamed response, draining a small remainder so keep-alive survives."""
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit() and int(length) <= DRAIN_LIMIT:
+        response.raw.drain_conn()
+        response.raw.release_conn()
+    else:
+        response.close()
+
+
+def extract(response, tag, css_class=None):
+    """Stream a requests response into a FirstElementParser and release it."""
+    try:
+        return first_element(iter_response_text(response), tag, css_class)
+    finally:
+        release(response)
+
+
+def first_paragraph_text(response):
+    parser = extract(response, "p")
+    return parser.text if parser.found else None
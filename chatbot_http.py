@@ -0,0 +1,181 @@
+"""
+chatbot_http.py
+Shared HTTP client for the search helpers.
+A pooled requests.Session with keep-alive, retry with backoff, a per-host
+connection limit and one timeout policy for every fetch path.
+The async client uses aiohttp when it is installed.
+requests and aiohttp are imported on first use, not with this module.
+"""
+import asyncio
+import codecs
+import threading
+import weakref
+
+from chatbot_html import CHUNK_SIZE, FirstElementParser, extract, release
+
+_NOT_LOADED = object()
+aiohttp = _NOT_LOADED  # the module, or None when it is not installed
+
+DEFAULT_TIMEOUT = (3.05, 5)  # (connect, read) seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "PythonLearningChatbot/2 (+https://github.com/lukewarmbro/vibrating-Scoliosis)"
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=2, backoff_factor=0.3,
+                 pool_connections=8, max_per_host=8, headers=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_connections = pool_connections
+        self.max_per_host = max_per_host
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=self.retries, backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES, allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        # pool_block caps open connections per host at max_per_host
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.max_per_host,
+            pool_block=True, max_retries=retry,
+        )
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def extract(self, url, tag, css_class=None):
+        """GET url and stream it into a FirstElementParser; returns (status, parser or None)."""
+        r = self.get(url, stream=True)
+        if r.status_code != 200:
+            release(r)
+            return r.status_code, None
+        return 200, extract(r, tag, css_class)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_default_client = HttpClient()
+
+
+def default_client():
+    return _default_client
+
+
+def configure(**kwargs):
+    """Replace the process-wide client, e.g. configure(timeout=10, max_per_host=4)."""
+    global _default_client
+    old, _default_client = _default_client, HttpClient(**kwargs)
+    old.close()
+    return _default_client
+
+
+def _aiohttp():
+    global aiohttp
+    if aiohttp is _NOT_LOADED:
+        try:
+            import aiohttp as module
+        except ImportError:  # AsyncHttpClient falls back to the sync client in an executor
+            module = None
+        aiohttp = module
+    return aiohttp
+
+
+class AsyncHttpClient:
+    """
+    asyncio counterpart of HttpClient with the same timeout/retry policy.
+    Without aiohttp it runs the pooled sync client in the loop's executor, so
+    callers never block the event loop either way. One instance per loop.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=2, backoff_factor=0.3,
+                 max_connections=100, max_per_host=8, headers=None, sync_client=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self.sync_client = sync_client
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            aiohttp = _aiohttp()
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_per_host)
+            timeout = aiohttp.ClientTimeout(connect=self.timeout[0], sock_read=self.timeout[1])
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers)
+        return self._session
+
+    async def extract(self, url, tag, css_class=None):
+        """GET url and stream it into a FirstElementParser; returns (status, parser or None)."""
+        aiohttp = _aiohttp()
+        if aiohttp is None:
+            loop = asyncio.get_running_loop()
+            sync_client = self.sync_client or default_client()
+            return await loop.run_in_executor(None, sync_client.extract, url, tag, css_class)
+        session = self._get_session()
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return 200, await self._feed(resp, FirstElementParser(tag, css_class))
+                    if last or resp.status not in RETRY_STATUSES:
+                        return resp.status, None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last:
+                    raise
+            await asyncio.sleep(self.backoff_factor * 2 ** attempt)
+
+    async def _feed(self, resp, parser):
+        decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                return parser
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+        return parser
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def default_async_client():
+    """The shared AsyncHttpClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncHttpClient()
+    return client
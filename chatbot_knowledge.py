@@ -0,0 +1,53 @@
+"""
+chatbot_knowledge.py
+Topic knowledge base shared by every chatbot instance.
+Entries live in topics.json and are loaded once, on first use, into a
+read-only keyword -> answer index that keeps the file's matching order.
+"""
+import json
+import os
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+TOPICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topics.json")
+
+
+class KnowledgeBase(Mapping):
+    def __init__(self, path=TOPICS_PATH):
+        self.path = path
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+        return self._index
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            entries = json.load(f)["topics"]
+        return MappingProxyType({entry["keyword"]: entry["answer"] for entry in entries})
+
+    def __getitem__(self, keyword):
+        return self.index[keyword]
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    # Identity semantics so a knowledge base can key per-instance caches
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+
+_default_knowledge_base = KnowledgeBase()
+
+
+def default_knowledge_base():
+    return _default_knowledge_base
@@ -0,0 +1,227 @@
+"""
+chatbot_math.py
+Math engine for the "solve:", "simplify:" and "differentiate:" commands.
+Plain arithmetic on integers and fractions is evaluated straight from the
+syntax tree and printed the way sympy prints it. Everything else goes to
+sympy in a chatbot_sandbox worker pool, so a pathological expression is
+stopped by the pool's CPU and wall-clock limits instead of pinning a core.
+Answers are cached, and concurrent requests for one expression share a
+single evaluation.
+"""
+import ast
+import asyncio
+import atexit
+import math
+import operator
+import threading
+from fractions import Fraction
+
+from chatbot_cache import SearchCache
+from chatbot_metrics import METRICS
+from chatbot_sandbox import SandboxPool
+
+# Commands; SOLVE, SIMPLIFY and DIFFERENTIATE share their names with the router intents
+EVALUATE = "evaluate"
+SOLVE = "solve"
+SIMPLIFY = "simplify"
+DIFFERENTIATE = "differentiate"
+
+# Integer results bigger than this are left to the time-limited worker
+MAX_RESULT_BITS = 10000
+
+_BINARY = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+class MathError(Exception):
+    pass
+
+
+class _NeedsSympy(Exception):
+    pass
+
+
+def _arith(node):
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return _bounded(node.value)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        return _UNARY[type(node.op)](_arith(node.operand))
+    if isinstance(node, ast.BinOp):
+        left, right = _arith(node.left), _arith(node.right)
+        if isinstance(node.op, ast.Div):
+            return _bounded(Fraction(left) / right)
+        if isinstance(node.op, ast.Pow):
+            return _power(left, right)
+        if type(node.op) in _BINARY:
+            return _bounded(_BINARY[type(node.op)](left, right))
+    raise _NeedsSympy()
+
+
+def _bits(value):
+    if isinstance(value, Fraction):
+        return max(value.numerator.bit_length(), value.denominator.bit_length())
+    return value.bit_length()
+
+
+def _bounded(value):
+    if _bits(value) > MAX_RESULT_BITS:
+        raise _NeedsSympy()
+    return value
+
+
+def _power(base, exponent):
+    if isinstance(exponent, Fraction):
+        if exponent.denominator != 1:
+            raise _NeedsSympy()  # roots stay symbolic in sympy
+        exponent = exponent.numerator
+    if _bits(base) * abs(exponent) > MAX_RESULT_BITS:
+        raise _NeedsSympy()
+    return Fraction(base) ** exponent
+
+
+def evaluate_arithmetic(expr):
+    """
+    Exact value of an integer/fraction expression, printed as sympy.sympify
+    would print it, or None when the expression needs sympy.
+    """
+    try:
+        # sympify reads ^ as a power
+        tree = ast.parse(expr.replace("^", "**").strip(), mode="eval")
+        value = _arith(tree.body)
+        if isinstance(value, Fraction) and value.denominator == 1:
+            value = value.numerator
+        return str(value)
+    except (SyntaxError, ValueError, ZeroDivisionError, _NeedsSympy):
+        # ValueError also covers int/str conversion limits on huge literals
+        return None
+    except (RecursionError, MemoryError):
+        # Deeply nested or very long input, too much for ast.parse or _arith
+        return None
+
+
+class MathEngine:
+    def __init__(self, pool=None, cache_size=4096):
+        self._pool = pool
+        self._pool_lock = threading.Lock()
+        # Results are pure, so they never expire; failures (found=None) are not cached
+        self.cache = SearchCache(maxsize=cache_size, ttl=math.inf)
+        self.fast = 0
+
+    @property
+    def pool(self):
+        """The sympy worker pool, started on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = SandboxPool(size=2, cpu_seconds=2, wall_seconds=5, memory_mb=512, handlers="chatbot_math")
+                atexit.register(self._pool.close)
+        return self._pool
+
+    def compute(self, command, expr):
+        """Result of command on expr as a string; raises MathError."""
+        expr = " ".join(expr.split())
+        result = self._fast_path(command, expr)
+        if result is None:
+            request = {"op": "math", "command": command, "expr": expr}
+
+            def fetch():
+                with METRICS.stage("sympy"):
+                    return _cache_entry(self.pool.call(request))
+            result = self.cache.get_or_fetch(f"{command}:{expr}", fetch)
+        return _unwrap(result)
+
+    async def acompute(self, command, expr):
+        """compute() for coroutines; the worker round trip does not block the loop."""
+        expr = " ".join(expr.split())
+        result = self._fast_path(command, expr)
+        if result is None:
+            request = {"op": "math", "command": command, "expr": expr}
+
+            async def fetch():
+                with METRICS.stage("sympy"):
+                    return _cache_entry(await asyncio.wrap_future(self.pool.submit_call(request)))
+            result = await self.cache.aget_or_fetch(f"{command}:{expr}", fetch)
+        return _unwrap(result)
+
+    def _fast_path(self, command, expr):
+        if command == EVALUATE or (command == SOLVE and "=" not in expr):
+            value = evaluate_arithmetic(expr)
+            if value is not None:
+                self.fast += 1
+                return True, value
+        return None
+
+    def stats(self):
+        return dict(self.cache.stats(), fast_path=self.fast)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+
+def _cache_entry(reply):
+    if reply["ok"]:
+        return (True, reply["result"]), True
+    return (False, reply["error"]), None
+
+
+def _unwrap(result):
+    ok, value = result
+    if not ok:
+        raise MathError(value)
+    return value
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def default_engine():
+    """Process-wide engine shared by every bot."""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = MathEngine()
+    return _default_engine
+
+
+# --- Worker side (runs in the sandbox pool) ---
+
+def _sympy_result(command, expr):
+    import sympy
+    if command == DIFFERENTIATE:
+        # "differentiate: x**2*y wrt y"; with one free symbol the variable can be left out
+        expr, _, variables = expr.partition(" wrt ")
+        symbols = [sympy.Symbol(v.strip()) for v in variables.split(",") if v.strip()]
+        return str(sympy.diff(sympy.sympify(expr), *symbols))
+    if command == SIMPLIFY:
+        return str(sympy.simplify(sympy.sympify(expr)))
+    if command == SOLVE and "=" in expr:
+        lhs, _, rhs = expr.partition("=")
+        equation = sympy.Eq(sympy.sympify(lhs), sympy.sympify(rhs))
+        if equation in (sympy.true, sympy.false):
+            return str(bool(equation))
+        solutions = sympy.solve(equation, dict=True)
+        if not solutions:
+            return "no solution"
+        return "; ".join(", ".join(f"{var} = {value}" for var, value in s.items()) for s in solutions)
+    return str(sympy.sympify(expr))
+
+
+def worker_init():
+    import sympy  # noqa: F401
+
+
+def _math_request(request, limits):
+    try:
+        return {"ok": True, "result": _sympy_result(request["command"], request["expr"])}
+    except MemoryError:
+        raise
+    except Exception as e:
+        # sympy's messages are often wrapped over several lines
+        return {"ok": False, "error": " ".join(str(e).split()) or type(e).__name__}
+
+
+HANDLERS = {"math": _math_request}
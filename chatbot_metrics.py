@@ -0,0 +1,261 @@
+"""
+chatbot_metrics.py
+Built-in latency instrumentation for the chatbot, off by default.
+When enabled, every answer is counted and timed by intent, and the
+expensive steps inside it are timed as stages: "fetch" (network), "parse"
+(HTML), "sympy" (math worker), "exec" (code sandbox), "retrieval"
+(vector lookup of a message no keyword matched) and "pydocs" (offline
+docs search). Latencies go
+into fixed-bucket histograms that export as Prometheus text or JSON.
+An optional SamplingProfiler runs every Nth answer under cProfile or
+tracemalloc. While disabled the only cost is one attribute check per
+answer. Turn it on with:
+    METRICS.enable(profiler=SamplingProfiler(every=100))
+"""
+import bisect
+import cProfile
+import io
+import math
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds in seconds, as in the Prometheus client defaults with a finer low end
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, math.inf)
+
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # per bucket, not cumulative
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimate of the q quantile, interpolated within its bucket as Prometheus does."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i]
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-2]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {_le(b): c for b, c in zip(self.buckets, self.counts)},
+        }
+
+
+def _le(bound):
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+class SamplingProfiler:
+    """
+    Profiles one answer in every `every`. kind "cprofile" accumulates
+    function timings across the samples; kind "tracemalloc" accumulates the
+    bytes allocated per source line (tracing only during the samples).
+    One sample runs at a time; an answer due while another is being
+    profiled runs unprofiled.
+    """
+
+    def __init__(self, every=100, kind="cprofile"):
+        if kind not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"unknown profiler kind: {kind}")
+        self.every = every
+        self.kind = kind
+        self.samples = 0
+        self.allocations = Counter()  # "file:line" -> bytes, for tracemalloc
+        self._profile = cProfile.Profile() if kind == "cprofile" else None
+        self._seen = 0
+        self._lock = threading.Lock()
+        self._sampling = threading.Lock()
+
+    def due(self):
+        with self._lock:
+            self._seen += 1
+            return self._seen % self.every == 0
+
+    def run(self, fn, *args):
+        if not self._sampling.acquire(blocking=False):
+            return fn(*args)
+        try:
+            if self._profile is not None:
+                # One Profile for every sample; enabling it is far cheaper than a new one each time
+                self._profile.enable()
+                try:
+                    return fn(*args)
+                finally:
+                    self._profile.disable()
+                    self.samples += 1
+            return self._trace(fn, *args)
+        finally:
+            self._sampling.release()
+
+    def _trace(self, fn, *args):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        try:
+            return fn(*args)
+        finally:
+            after = tracemalloc.take_snapshot()
+            if started:
+                tracemalloc.stop()
+            self.samples += 1
+            for diff in after.compare_to(before, "lineno"):
+                if diff.size_diff > 0:
+                    frame = diff.traceback[0]
+                    self.allocations[f"{frame.filename}:{frame.lineno}"] += diff.size_diff
+
+    def report(self, limit=20):
+        """Text summary of what the samples spent their time (or memory) on."""
+        with self._sampling:
+            if self._profile is None:
+                lines = [f"{self.samples} samples; bytes allocated by line"]
+                lines += [f"{size:>12}  {where}" for where, size in self.allocations.most_common(limit)]
+                return "\n".join(lines)
+            if not self.samples:
+                return "0 samples"
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(limit)
+            return f"{self.samples} samples\n{out.getvalue()}"
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = False
+        self.profiler = None
+        self.buckets = buckets
+        self.errors = 0
+        self._requests = {}  # intent -> Histogram
+        self._stages = {}  # stage -> Histogram
+        self._lock = threading.Lock()
+
+    def enable(self, profiler=None):
+        self.profiler = profiler
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.profiler = None
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._stages.clear()
+            self.errors = 0
+
+    def _observe(self, table, name, seconds):
+        with self._lock:
+            histogram = table.get(name)
+            if histogram is None:
+                histogram = table[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_request(self, intent, seconds):
+        self._observe(self._requests, intent, seconds)
+
+    def observe_stage(self, stage, seconds):
+        self._observe(self._stages, stage, seconds)
+
+    def stage(self, name):
+        """Context manager timing one stage; a shared no-op while disabled."""
+        if not self.enabled:
+            return _DISABLED
+        return self._time_stage(name)
+
+    @contextmanager
+    def _time_stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def measure(self, answer, *args):
+        """Run answer(*args) -> (intent, response), recording it; returns the response."""
+        profiler = self.profiler
+        start = time.perf_counter()
+        try:
+            if profiler is not None and profiler.due():
+                intent, response = profiler.run(answer, *args)
+            else:
+                intent, response = answer(*args)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        self.observe_request(intent, time.perf_counter() - start)
+        return response
+
+    async def ameasure(self, answer, *args):
+        """measure() for a coroutine function; never profiled."""
+        start = time.perf_counter()
+        try:
+            intent, response = await answer(*args)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        self.observe_request(intent, time.perf_counter() - start)
+        return response
+
+    def to_json(self):
+        with self._lock:
+            return {
+                "requests": {name: h.to_dict() for name, h in self._requests.items()},
+                "stages": {name: h.to_dict() for name, h in self._stages.items()},
+                "errors": self.errors,
+            }
+
+    def to_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP chatbot_request_errors_total Messages whose answer raised.",
+            "# TYPE chatbot_request_errors_total counter",
+            f"chatbot_request_errors_total {self.errors}",
+        ]
+        with self._lock:
+            for metric, label, table, help_text in (
+                ("chatbot_request_seconds", "intent", self._requests, "Time to answer a message, by intent."),
+                ("chatbot_stage_seconds", "stage", self._stages, "Time spent in a stage of an answer."),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for name, histogram in sorted(table.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label}="{name}",le="{_le(bound)}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum!r}')
+                    lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide, like the search cache and worker pools it measures
+METRICS = Metrics()
@@ -0,0 +1,501 @@
+"""
+chatbot_pydocs.py
+Offline search over the installed standard library's documentation, for
+"search python docs for ...". docs.python.org builds its search results in
+JavaScript, so scraping search.html is slow and usually comes back empty.
+The indexer reads the docstrings and signatures of every public module,
+class, function and method: from the stdlib sources with ast, so none of
+their code runs, and from built-in and C extension modules (builtins,
+math, _collections) with inspect. They are
+written as an inverted index of flat files that DocsIndex memory-maps:
+looking up a word is a binary search in the term table and a slice of the
+postings, so opening the index costs nothing and a query reads a few pages.
+Parsed modules are cached by file size and mtime, so a rebuild after a
+Python upgrade only re-reads the files that changed.
+Build (or refresh) the index with:
+    python chatbot_pydocs.py build [--dir DIR]
+"""
+import argparse
+import ast
+import importlib
+import importlib.util
+import inspect
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import sysconfig
+import threading
+import time
+import warnings
+from collections import Counter, namedtuple
+
+FORMAT_VERSION = 1
+DEFAULT_DIR = os.environ.get("CHATBOT_PYDOCS_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "chatbot", "pydocs"
+)
+SKIP_DIRS = frozenset({"test", "tests", "idlelib", "lib2to3", "turtledemo", "site-packages", "__pycache__"})
+SUMMARY_LENGTH = 300
+BUILD_RETRY_SECONDS = 600  # after a failed background build (say, a read-only home directory)
+
+# Term weights by where the term is found in an entry
+NAME_WEIGHT = 10  # the entry's own name ("dumps" in json.dumps)
+PATH_WEIGHT = 3  # the rest of its dotted path and the parts of snake_case names
+TEXT_WEIGHT = 1  # each time in the summary, up to 3
+EXACT_BONUS = 20.0  # for an entry whose name is the whole query ("json.dumps", "dumps")
+DEPTH_PENALTY = 0.05  # score lost per level of nesting of a name
+
+POSTING = struct.Struct("<IH")  # entry number, weight
+
+WORD_RE = re.compile(r"[a-z0-9_]+(?:\.[a-z0-9_]+)*")
+# Dropped from queries that have other words ("how do i sort a list")
+STOPWORDS = frozenset("a an and are can do does for how i in is it my of on or the to what with".split())
+
+Hit = namedtuple("Hit", ["score", "name", "signature", "summary"])
+
+
+def terms(text):
+    """Lowercase words of text, with dotted names and snake_case names also split into their parts."""
+    found = []
+    for word in WORD_RE.findall(text.lower()):
+        found.append(word)
+        parts = word.split(".")
+        if len(parts) > 1:
+            found.extend(p for p in parts if p)
+        for part in parts:
+            if "_" in part.strip("_"):
+                found.extend(p for p in part.split("_") if p)
+    return found
+
+
+def summary(docstring):
+    """First paragraph of a docstring, on one line."""
+    if not docstring:
+        return ""
+    paragraph = inspect.cleandoc(docstring).split("\n\n")[0]
+    return " ".join(paragraph.split())[:SUMMARY_LENGTH]
+
+
+# --- Reading the standard library ---
+
+def _public(name):
+    return not name.startswith("_")
+
+
+def _signature(args, method=False):
+    text = ast.unparse(args)
+    if method:
+        text = re.sub(r"^(self|cls)(, )?", "", text)
+    return f"({text})"
+
+
+def _top_level(body):
+    # Statements run at import, including those inside top-level try/if blocks
+    for node in body:
+        yield node
+        if isinstance(node, ast.Try):
+            for block in (node.body, node.orelse, node.finalbody, *(h.body for h in node.handlers)):
+                yield from _top_level(block)
+        elif isinstance(node, ast.If):
+            yield from _top_level(node.body)
+            yield from _top_level(node.orelse)
+
+
+def entries_from_source(module, source):
+    """
+    [name, signature, summary] of a module and its public classes,
+    functions and methods, including those it imports from a C accelerator
+    module ("from _collections import defaultdict").
+    """
+    tree = ast.parse(source)
+    entries = [[module, "", summary(ast.get_docstring(tree))]]
+    defined = set()
+    for node in _top_level(tree.body):
+        if isinstance(node, ast.ImportFrom) and node.level == 0 and node.module and node.module.startswith("_"):
+            for alias in node.names:
+                name = alias.asname or alias.name
+                if _public(name) and name not in defined and alias.name != "*":
+                    defined.add(name)
+                    entries.extend(_accelerated(module, node.module, alias.name, name))
+            continue
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) or node.name in defined:
+            continue
+        defined.add(node.name)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _public(node.name):
+            entries.append([f"{module}.{node.name}", _signature(node.args), summary(ast.get_docstring(node))])
+        elif isinstance(node, ast.ClassDef) and _public(node.name):
+            init = next((n for n in node.body if isinstance(n, ast.FunctionDef) and n.name == "__init__"), None)
+            signature = _signature(init.args, method=True) if init else ""
+            entries.append([f"{module}.{node.name}", signature, summary(ast.get_docstring(node))])
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)) and _public(child.name):
+                    entries.append([f"{module}.{node.name}.{child.name}", _signature(child.args, method=True),
+                                    summary(ast.get_docstring(child))])
+    return entries
+
+
+def _inspected(name, value):
+    try:
+        signature = str(inspect.signature(value))
+    except (TypeError, ValueError):
+        signature = ""
+    entries = [[name, signature, summary(value.__doc__)]]
+    if inspect.isclass(value):
+        for attr, member in sorted(vars(value).items()):
+            if _public(attr) and inspect.isroutine(member):
+                entries.extend(_inspected(f"{name}.{attr}", member)[:1])
+    return entries
+
+
+def _import_compiled(module):
+    """module if it is built in or a C extension (importing those runs no Python code), else None."""
+    spec = importlib.util.find_spec(module)
+    if spec is None or (spec.origin or "").endswith(".py"):
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return importlib.import_module(module)
+
+
+def _accelerated(module, source, name, public_name):
+    try:
+        value = getattr(_import_compiled(source), name, None)
+    except ImportError:
+        return []
+    if value is None or not (inspect.isroutine(value) or inspect.isclass(value)):
+        return []
+    return _inspected(f"{module}.{public_name}", value)
+
+
+def entries_from_module(module):
+    """Entries of a module without Python source (math, itertools, builtins), by inspect."""
+    mod = _import_compiled(module)
+    if mod is None:
+        return []
+    entries = [[module, "", summary(mod.__doc__)]]
+    for name, value in sorted(vars(mod).items()):
+        if not _public(name) or not (inspect.isroutine(value) or inspect.isclass(value)):
+            continue
+        if module != "builtins" and getattr(value, "__module__", module) != module:
+            continue  # re-exported from elsewhere (but open() is a builtin from io)
+        # Builtins are documented by their bare name: "sorted", "list.sort"
+        entries.extend(_inspected(name if module == "builtins" else f"{module}.{name}", value))
+    return entries
+
+
+def stdlib_sources(root=None):
+    """(module name, path) of every Python file of the standard library."""
+    root = root or sysconfig.get_paths()["stdlib"]
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and _public(d) and "-" not in d)
+        package = os.path.relpath(dirpath, root).replace(os.sep, ".")
+        if package != "." and not os.path.exists(os.path.join(dirpath, "__init__.py")):
+            dirnames[:] = []
+            continue
+        for filename in sorted(filenames):
+            name, ext = os.path.splitext(filename)
+            if ext != ".py" or not (_public(name) or name == "__init__"):
+                continue
+            if package == ".":
+                module = name
+            else:
+                module = package if name == "__init__" else f"{package}.{name}"
+            yield module, os.path.join(dirpath, filename)
+
+
+def collect(cache=None, root=None):
+    """
+    {key: {"stamp", "entries"}} for the standard library, reusing the
+    entries of cache whose stamp (file size and mtime, or Python version
+    for C modules) hasn't changed. Returns (modules, number re-read).
+    With root, only the Python sources under root are read.
+    """
+    cache = cache or {}
+    modules, parsed = {}, 0
+    seen = set()
+    for module, path in stdlib_sources(root):
+        seen.add(module.split(".")[0])
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        cached = cache.get(path)
+        if cached is not None and cached["stamp"] == stamp:
+            modules[path] = cached
+            continue
+        try:
+            with open(path, "rb") as f:
+                entries = entries_from_source(module, f.read())
+        except (SyntaxError, ValueError, UnicodeDecodeError):
+            continue
+        modules[path] = {"stamp": stamp, "entries": entries}
+        parsed += 1
+    if root is not None:
+        return modules, parsed
+    version = sys.version
+    for module in sorted(getattr(sys, "stdlib_module_names", sys.builtin_module_names)):
+        if module in seen or module in SKIP_DIRS or not _public(module):
+            continue
+        key = f"builtin:{module}"
+        cached = cache.get(key)
+        if cached is not None and cached["stamp"] == version:
+            modules[key] = cached
+            continue
+        try:
+            entries = entries_from_module(module)
+        except Exception:  # not on this platform, or fails to import
+            continue
+        if not entries:
+            continue
+        modules[key] = {"stamp": version, "entries": entries}
+        parsed += 1
+    return modules, parsed
+
+
+# --- The index files ---
+
+def _entry_terms(name, signature, text):
+    weights = Counter()
+    parts = name.lower().split(".")
+    for term in terms(parts[-1]):
+        weights[term] = max(weights[term], PATH_WEIGHT)
+    weights[parts[-1]] = NAME_WEIGHT
+    weights[name.lower()] = NAME_WEIGHT
+    for part in parts[:-1]:
+        weights[part] = max(weights[part], PATH_WEIGHT)
+    for term, count in Counter(terms(text)).items():
+        weights[term] += TEXT_WEIGHT * min(count, 3)
+    return weights
+
+
+def write_index(directory, modules, meta):
+    """Write the inverted index of modules' entries to directory, replacing it once complete."""
+    entries = [entry for key in sorted(modules) for entry in modules[key]["entries"]]
+    postings = {}  # term -> [(entry number, weight)]
+    for number, (name, signature, text) in enumerate(entries):
+        for term, weight in _entry_terms(name, signature, text).items():
+            postings.setdefault(term, []).append((number, min(weight, 0xFFFF)))
+    staging = directory.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    def write(name, data):
+        with open(os.path.join(staging, name), "wb") as f:
+            f.write(data)
+    offsets, blob = [0], bytearray()
+    for name, signature, text in entries:
+        blob += "\t".join((name, signature, text)).encode("utf-8") + b"\n"
+        offsets.append(len(blob))
+    write("entries.dat", blob)
+    write("entries.idx", struct.pack(f"<{len(offsets)}Q", *offsets))
+    sorted_terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+    term_offsets, term_blob = [0], bytearray()
+    posting_offsets, posting_blob = [0], bytearray()
+    for term in sorted_terms:
+        term_blob += term.encode("utf-8")
+        term_offsets.append(len(term_blob))
+        for posting in postings[term]:
+            posting_blob += POSTING.pack(*posting)
+        posting_offsets.append(posting_offsets[-1] + len(postings[term]))
+    write("terms.dat", term_blob)
+    write("terms.idx", struct.pack(f"<{len(term_offsets)}Q", *term_offsets))
+    write("postings.dat", posting_blob)
+    write("postings.idx", struct.pack(f"<{len(posting_offsets)}Q", *posting_offsets))
+    with open(os.path.join(staging, "modules.json"), "w", encoding="utf-8") as f:
+        json.dump(modules, f)
+    with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(dict(meta, entries=len(entries), terms=len(sorted_terms), version=FORMAT_VERSION), f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+    return len(entries)
+
+
+def build(directory=DEFAULT_DIR, root=None):
+    """
+    Build or refresh the index in directory. Returns (entries, modules
+    re-read); only modules changed since the last build are re-read.
+    """
+    try:
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            if json.load(f).get("version") != FORMAT_VERSION:
+                raise ValueError("written by another version of the indexer")
+        with open(os.path.join(directory, "modules.json"), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    modules, parsed = collect(cache, root)
+    count = write_index(directory, modules, {"python": sys.version, "built_at": time.time()})
+    return count, parsed
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DocsIndex:
+    """A memory-mapped index written by build()."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"index format {self.meta.get('version')} is not {FORMAT_VERSION}; rebuild it")
+        self._maps = {name: _map(os.path.join(directory, name)) for name in (
+            "entries.dat", "entries.idx", "terms.dat", "terms.idx", "postings.dat", "postings.idx")}
+        self._entry_offsets = memoryview(self._maps["entries.idx"]).cast("Q")
+        self._term_offsets = memoryview(self._maps["terms.idx"]).cast("Q")
+        self._posting_offsets = memoryview(self._maps["postings.idx"]).cast("Q")
+        self.count = len(self._entry_offsets) - 1
+        self._terms = len(self._term_offsets) - 1
+
+    def is_current(self):
+        """Whether the index was built by this Python version."""
+        return self.meta.get("python") == sys.version
+
+    def entry(self, number):
+        """(name, signature, summary) of an entry."""
+        data = self._maps["entries.dat"][self._entry_offsets[number]:self._entry_offsets[number + 1]]
+        return tuple(data.decode("utf-8").rstrip("\n").split("\t"))
+
+    def _find_term(self, term):
+        key = term.encode("utf-8")
+        lo, hi = 0, self._terms
+        blob, offsets = self._maps["terms.dat"], self._term_offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = blob[offsets[mid]:offsets[mid + 1]]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def postings(self, term):
+        """[(entry number, weight)] of a term."""
+        i = self._find_term(term)
+        if i is None:
+            return []
+        start, end = self._posting_offsets[i], self._posting_offsets[i + 1]
+        data = self._maps["postings.dat"][start * POSTING.size:end * POSTING.size]
+        return list(POSTING.iter_unpack(data))
+
+    def search(self, text, k=5):
+        """[Hit] for the k best entries; every word of text must occur in them if any entry has all."""
+        query = list(dict.fromkeys(terms(text)))
+        query = [term for term in query if term not in STOPWORDS] or query
+        if not query:
+            return []
+        scores = Counter()
+        matched = Counter()
+        for term in query:
+            found = self.postings(term)
+            if not found:
+                continue
+            idf = math.log(1 + self.count / len(found))
+            for number, weight in found:
+                scores[number] += idf * weight
+                matched[number] += 1
+        if not scores:
+            return []
+        # Entries that have every word of the query go first
+        most = max(matched.values())
+        candidates = [(score, number) for number, score in scores.items() if matched[number] == most]
+        candidates.sort(reverse=True)
+        exact = " ".join(text.lower().split()).replace(" ", ".")
+        hits = []
+        for score, number in candidates[:max(k, 20)]:
+            name, signature, text_ = self.entry(number)
+            lowered = name.lower()
+            if lowered == exact or lowered.endswith("." + exact):
+                score += EXACT_BONUS * (2 if lowered == exact else 1)
+            elif lowered in query:
+                score += EXACT_BONUS / 2  # a builtin named in the query: "open a file"
+            # Shallower names go first: "json.dumps" over "json.encoder.JSONEncoder.dumps"
+            hits.append(Hit(score * (1 - DEPTH_PENALTY * lowered.count(".")), name, signature, text_))
+        hits.sort(key=lambda hit: -hit.score)
+        return hits[:k]
+
+    def close(self):
+        for view in (self._entry_offsets, self._term_offsets, self._posting_offsets):
+            view.release()
+        for m in self._maps.values():
+            if isinstance(m, mmap.mmap):
+                m.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+_building = None
+_failed_at = None  # time.monotonic() of the last failed background build
+
+
+def _build_in_background(directory):
+    global _failed_at
+    try:
+        build(directory)
+    except Exception:
+        _failed_at = time.monotonic()
+        raise  # reported once, by threading.excepthook
+
+
+def default_index(directory=DEFAULT_DIR):
+    """
+    The shared index if it has been built for this Python, else None. A
+    missing or outdated index is (re)built in a background thread, so the
+    first searches go online and later ones are answered locally. After a
+    failed build it is BUILD_RETRY_SECONDS before the next one is tried.
+    """
+    global _default, _building
+    if _default is not None:
+        return _default
+    if _failed_at is not None and time.monotonic() - _failed_at < BUILD_RETRY_SECONDS:
+        return None
+    with _default_lock:
+        if _default is not None:
+            return _default
+        try:
+            index = DocsIndex(directory)
+            if index.is_current():
+                _default = index
+                return index
+            index.close()
+        except (OSError, ValueError):
+            pass
+        if _building is None or not _building.is_alive():
+            _building = threading.Thread(
+                target=_build_in_background, args=(directory,), name="chatbot-pydocs", daemon=True
+            )
+            _building.start()
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the offline Python documentation index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="index the installed standard library (incrementally)")
+    build_cmd.add_argument("--dir", default=DEFAULT_DIR)
+    query = sub.add_parser("query", help="search the index")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--dir", default=DEFAULT_DIR)
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        start = time.perf_counter()
+        count, parsed = build(args.dir)
+        print(f"Indexed {count} entries ({parsed} modules re-read) into {args.dir} in {time.perf_counter() - start:.1f} s")
+        return
+    index = DocsIndex(args.dir)
+    for hit in index.search(args.text, args.k):
+        print(f"{hit.score:7.2f}  {hit.name}{hit.signature}  {hit.summary[:80]}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+chatbot_replay.py
+Replays a recorded message log through the bot, without the GUI.
+The log is JSON lines, one {"session_id": ..., "message": ...} object per
+line. Records are streamed from the file and spread over worker processes
+by session, so each session's messages are answered in order by the same
+bot and session state. Responses are written as JSON lines in input order,
+each with the record's latency. At most `window` records are in flight at a
+time, which bounds memory however large the log is.
+Usage:
+    python chatbot_replay.py messages.jsonl -o responses.jsonl [--workers 4]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import zlib
+
+from chatbot_sessions import SessionManager
+
+DEFAULT_SESSION = "default"
+
+
+def shard_for(session_id, workers):
+    # Stable across runs, unlike hash() of a str
+    return zlib.crc32(str(session_id).encode("utf-8")) % workers
+
+
+class _Responder:
+    """One bot and its sessions; lives in a worker process (or in-process)."""
+
+    def __init__(self):
+        from chatbot_core import ChatBot
+        self.bot = ChatBot()
+        self.sessions = SessionManager()
+
+    def answer(self, index, record):
+        if "error" in record:
+            return dict(record, index=index)
+        session_id = record.get("session_id", DEFAULT_SESSION)
+        start = time.perf_counter()
+        try:
+            response, error = self.bot.get_bot_response(str(record["message"]), self.sessions.get(session_id)), None
+        except Exception as e:
+            response, error = None, f"{type(e).__name__}: {e}"
+        result = {
+            "index": index, "session_id": session_id, "message": record["message"], "response": response,
+            "latency_ms": round((time.perf_counter() - start) * 1e3, 3),
+        }
+        if error is not None:
+            result["error"] = error
+        return result
+
+
+def _worker_main(jobs, results):
+    responder = _Responder()
+    while True:
+        batch = jobs.get()
+        if batch is None:
+            return
+        results.put([responder.answer(index, record) for index, record in batch])
+
+
+def parse_record(line):
+    """The record on line, or an {"error"} record the writer passes through."""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {"error": f"invalid JSON: {e}", "line": line.rstrip("\n")}
+    if not isinstance(record, dict) or "message" not in record:
+        return {"error": 'expected an object with a "message"', "line": line.rstrip("\n")}
+    return record
+
+
+class ReplayStats:
+    def __init__(self):
+        self.records = 0
+        self.errors = 0
+        self.latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.started = time.perf_counter()
+
+    def add(self, result):
+        self.records += 1
+        if "error" in result:
+            self.errors += 1
+        latency = result.get("latency_ms", 0.0)
+        self.latency_ms += latency
+        self.max_latency_ms = max(self.max_latency_ms, latency)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        mean = self.latency_ms / self.records if self.records else 0.0
+        return (f"{self.records} records ({self.errors} errors) in {elapsed:.2f} s, "
+                f"{self.records / elapsed if elapsed else 0:.1f}/s; latency mean {mean:.2f} ms, max {self.max_latency_ms:.2f} ms")
+
+
+def replay(lines, write, workers=None, window=1000, batch_size=64):
+    """
+    Answer every record in lines (an iterable of JSON strings) and pass each
+    result dict to write, in input order. workers=0 answers in this process.
+    Records go to the workers batch_size at a time, to amortize the IPC.
+    Returns a ReplayStats.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    stats = ReplayStats()
+
+    def emit(result):
+        stats.add(result)
+        write(result)
+
+    records = (parse_record(line) for line in lines if line.strip())
+    if workers == 0:
+        responder = _Responder()
+        for index, record in enumerate(records):
+            emit(responder.answer(index, record))
+        return stats
+    # spawn: the bot's helper threads and worker pools don't survive a fork
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    jobs = [context.Queue() for _ in range(workers)]
+    processes = [context.Process(target=_worker_main, args=(q, results), daemon=True) for q in jobs]
+    for process in processes:
+        process.start()
+    pending = [[] for _ in range(workers)]  # per worker, records not sent yet
+    done = {}  # index -> result that finished ahead of an earlier one
+    next_out = 0
+    submitted = 0
+
+    def flush():
+        for worker, batch in enumerate(pending):
+            if batch:
+                jobs[worker].put(batch)
+                pending[worker] = []
+
+    def collect():
+        nonlocal next_out
+        flush()  # the result being waited for may still be in a batch
+        while True:
+            try:
+                batch = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not all(p.is_alive() for p in processes):
+                    raise RuntimeError("a replay worker exited unexpectedly")
+        for result in batch:
+            done[result["index"]] = result
+        while next_out in done:
+            emit(done.pop(next_out))
+            next_out += 1
+
+    try:
+        for index, record in enumerate(records):
+            while submitted - next_out >= window:
+                collect()
+            if "error" in record:
+                # Keeps its place in the output without a round trip
+                done[index] = dict(record, index=index)
+            else:
+                batch = pending[shard_for(record.get("session_id", DEFAULT_SESSION), workers)]
+                batch.append((index, record))
+                if len(batch) >= batch_size:
+                    flush()
+            submitted += 1
+            while next_out in done:
+                emit(done.pop(next_out))
+                next_out += 1
+        while next_out < submitted:
+            collect()
+    finally:
+        for q in jobs:
+            q.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a JSON lines message log through the chatbot.")
+    parser.add_argument("path", help='one {"session_id", "message"} object per line; "-" for stdin')
+    parser.add_argument("-o", "--output", default="-", help='where to write the responses; "-" for stdout')
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU; 0 runs in-process)")
+    parser.add_argument("--window", type=int, default=1000, help="most records in flight at once")
+    parser.add_argument("--batch-size", type=int, default=64, help="records sent to a worker at a time")
+    args = parser.parse_args(argv)
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = replay(source, lambda result: sink.write(json.dumps(result) + "\n"), args.workers, args.window,
+                       args.batch_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(stats.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+chatbot_retrieval.py
+Vector retrieval for messages no keyword matched, before the canned
+fallback (chatbot_core) or GPT-2 (chatbotV2).
+Documents and queries become hashed TF-IDF vectors of their words and
+character trigrams (so a typo still shares most features), folded into a
+small dense float32 matrix, one L2-normalized row per document. A query is
+one matrix-vector product and a top-k selection; search_many() answers a
+batch with one matrix-matrix product. Saved indexes are memory-mapped, so
+opening one is instant and only the pages a query touches are read.
+NumPy is optional: without it there is no retrieval stage and the bot
+falls back as before.
+Build an index of chatbotV2's database with:
+    python chatbot_retrieval.py build [--db chatbot.db] [--out chatbot_index]
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import zlib
+from collections import Counter
+
+from chatbot_fuzzy import tokenize
+
+_NOT_LOADED = object()
+numpy = _NOT_LOADED  # the module, or None when it is not installed
+
+DIM = 256  # columns of the document matrix
+IDF_BUCKETS = 1 << 20  # hashed features are counted for IDF at this resolution (by default)
+MIN_SCORE = 0.25  # cosine similarity below which a hit is not worth answering with
+FORMAT_VERSION = 1
+
+
+def _numpy():
+    global numpy
+    if numpy is _NOT_LOADED:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy = module
+    return numpy
+
+
+def available():
+    return _numpy() is not None
+
+
+def feature_hashes(text):
+    """crc32 of every word and every character trigram of the words (space-padded)."""
+    hashes = []
+    for word in tokenize(text):
+        hashes.append(zlib.crc32(word.encode("utf-8")))
+        padded = f" {word} ".encode("utf-8")
+        hashes.extend(zlib.crc32(padded[i:i + 3], 0x5EED) for i in range(len(padded) - 2))
+    return hashes
+
+
+class _IdFile:
+    """Document ids of a saved index, read from disk by position as hits need them."""
+
+    def __init__(self, path, offsets):
+        self._file = open(path, "rb")
+        self._offsets = offsets
+        self._lock = threading.Lock()
+
+    def __getitem__(self, i):
+        with self._lock:
+            self._file.seek(int(self._offsets[i]))
+            return json.loads(self._file.readline())
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def close(self):
+        self._file.close()
+
+
+class VectorIndex:
+    def __init__(self, matrix, idf, doc_ids, meta=None):
+        self.matrix = matrix  # (documents, DIM) float32, rows L2-normalized
+        self.idf = idf  # (buckets,) float32
+        self.doc_ids = doc_ids
+        self.meta = meta or {}
+
+    @classmethod
+    def build(cls, docs, dim=DIM, buckets=IDF_BUCKETS, **meta):
+        """Index an iterable of (doc_id, text); doc_id is anything JSON can store."""
+        np = _numpy()
+        doc_ids, rows, hashes = [], [], []
+        for doc_id, text in docs:
+            features = feature_hashes(text)
+            rows.extend([len(doc_ids)] * len(features))
+            hashes.extend(features)
+            doc_ids.append(doc_id)
+        count = len(doc_ids)
+        rows = np.asarray(rows, dtype=np.uint64)
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        # Term frequency per (document, feature)
+        pairs, tf = np.unique((rows << 32) | hashes, return_counts=True)
+        rows, hashes = (pairs >> 32).astype(np.int64), pairs & 0xFFFFFFFF
+        bucket = (hashes % buckets).astype(np.int64)
+        df = np.bincount(bucket, minlength=buckets)
+        idf = (np.log((count + 1) / (df + 1)) + 1).astype(np.float32)
+        matrix = np.zeros((count, dim), dtype=np.float32)
+        weights = (1 + np.log(tf)).astype(np.float32) * idf[bucket]
+        columns, signs = cls._fold(np, hashes, dim)
+        np.add.at(matrix, (rows, columns), signs * weights)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1)
+        return cls(matrix, idf, doc_ids, dict(meta, dim=dim, count=count, version=FORMAT_VERSION))
+
+    @staticmethod
+    def _fold(np, hashes, dim):
+        # Signed feature hashing: the high bits pick the column and sign, independently of the IDF bucket
+        columns = ((hashes >> 20) % dim).astype(np.int64)
+        signs = np.where((hashes >> 31) & 1, -1.0, 1.0).astype(np.float32)
+        return columns, signs
+
+    def vectorize(self, texts):
+        """(len(texts), dim) float32 query matrix."""
+        np = _numpy()
+        out = np.zeros((len(texts), self.matrix.shape[1]), dtype=np.float32)
+        for i, text in enumerate(texts):
+            counts = Counter(feature_hashes(text))
+            if not counts:
+                continue
+            hashes = np.fromiter(counts.keys(), dtype=np.uint64, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            weights = (1 + np.log(tf)) * self.idf[(hashes % len(self.idf)).astype(np.int64)]
+            columns, signs = self._fold(np, hashes, out.shape[1])
+            np.add.at(out[i], columns, signs * weights)
+            norm = np.linalg.norm(out[i])
+            if norm:
+                out[i] /= norm
+        return out
+
+    def search(self, text, k=5):
+        """[(score, doc_id)] of the k most similar documents, best first."""
+        return self.search_many([text], k)[0]
+
+    def search_many(self, texts, k=5):
+        """search() for a batch of texts with one matrix product."""
+        np = _numpy()
+        if not len(self.doc_ids):
+            return [[] for _ in texts]
+        scores = self.matrix @ self.vectorize(texts).T  # (documents, queries)
+        k = min(k, scores.shape[0])
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+            top = top[np.argsort(-column[top])]
+            results.append([(float(column[i]), self.doc_ids[int(i)]) for i in top])
+        return results
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    # --- On disk ---
+
+    def save(self, directory):
+        """Write the index to directory, replacing what was there only once it is complete."""
+        np = _numpy()
+        staging = directory.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "matrix.npy"), self.matrix)
+        np.save(os.path.join(staging, "idf.npy"), self.idf)
+        offsets = []
+        with open(os.path.join(staging, "ids.jsonl"), "wb") as f:
+            for doc_id in self.doc_ids:
+                offsets.append(f.tell())
+                f.write(json.dumps(doc_id).encode("utf-8") + b"\n")
+        np.save(os.path.join(staging, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+    @classmethod
+    def open(cls, directory):
+        """Memory-map a saved index."""
+        np = _numpy()
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"index format {meta.get('version')} is not {FORMAT_VERSION}; rebuild it")
+        matrix = np.load(os.path.join(directory, "matrix.npy"), mmap_mode="r")
+        idf = np.load(os.path.join(directory, "idf.npy"), mmap_mode="r")
+        offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        return cls(matrix, idf, _IdFile(os.path.join(directory, "ids.jsonl"), offsets), meta)
+
+    def close(self):
+        if isinstance(self.doc_ids, _IdFile):
+            self.doc_ids.close()
+
+
+def open_or_build(directory, docs, sources, corpus_version=None):
+    """
+    The index saved in directory, or a new one built from docs() (and saved
+    there) when it is missing, unreadable, older than any of the source
+    files or built at another corpus_version (a JSON value that changes with
+    the documents, such as FactStore.version()). Returns None without NumPy.
+    """
+    if not available():
+        return None
+    newest = max((os.path.getmtime(p) for p in sources if os.path.exists(p)), default=0)
+    try:
+        index = VectorIndex.open(directory)
+        if index.meta.get("sources_mtime", -1) >= newest and index.meta.get("corpus_version") == corpus_version:
+            return index
+        index.close()
+    except (OSError, ValueError):
+        pass
+    index = VectorIndex.build(docs(), sources_mtime=newest, corpus_version=corpus_version)
+    index.save(directory)
+    return index
+
+
+class TopicRetriever:
+    """Closest topic of a knowledge base to a message, for chatbot_core's fallback."""
+
+    def __init__(self, knowledge, min_score=MIN_SCORE):
+        self.min_score = min_score
+        # A handful of documents; a small IDF table is as good as a big one
+        self.index = VectorIndex.build(((key, f"{key} {answer}") for key, answer in knowledge.items()), buckets=1 << 12)
+
+    def closest(self, text):
+        """(score, topic) of the best topic at or above min_score, or None."""
+        hits = self.index.search(text, k=1)
+        if hits and hits[0][0] >= self.min_score:
+            return hits[0]
+        return None
+
+
+def chatbot_documents(knowledge, store):
+    """chatbotV2's corpus: the knowledge base's topics, then a FactStore's facts and code examples."""
+    for key, answer in knowledge.items():
+        yield f"topic:{key}", f"{key} {answer}"
+    yield from store.documents()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the retrieval index of the chatbot database.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index the topics, facts and code examples")
+    build.add_argument("--db", default="chatbot.db")
+    build.add_argument("--out", default="chatbot_index")
+    query = sub.add_parser("query", help="show the closest documents to a message")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--index", default="chatbot_index")
+    args = parser.parse_args(argv)
+    if not available():
+        parser.error("retrieval needs numpy (pip install numpy)")
+    if args.command == "query":
+        index = VectorIndex.open(args.index)
+        for score, doc_id in index.search(args.text, args.k):
+            print(f"{score:.3f}  {doc_id}")
+        index.close()
+        return
+    import sqlite3
+    from chatbot_facts import FactStore
+    from chatbot_knowledge import TOPICS_PATH, default_knowledge_base
+    conn = sqlite3.connect(args.db)
+    try:
+        store = FactStore(conn)
+        index = VectorIndex.build(
+            chatbot_documents(default_knowledge_base(), store),
+            sources_mtime=os.path.getmtime(TOPICS_PATH), corpus_version=store.version(),
+        )
+        index.save(args.out)
+    finally:
+        conn.close()
+    print(f"Indexed {len(index)} documents into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
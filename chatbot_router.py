@@ -0,0 +1,75 @@
+"""
+chatbot_router.py
+Compiled intent router for the chatbot.
+Greetings, topics and phrases are indexed once in a chatbot_fuzzy
+KeywordIndex, which matches whole words and tolerates typos ("dictonary",
+"tupel"), so a message is classified with a few dict lookups per word no
+matter how many topics are loaded. Commands are matched as prefixes.
+"""
+import re
+from collections import namedtuple
+
+from chatbot_fuzzy import KeywordIndex
+
+GREETING = "greeting"
+SEARCH_WIKIPEDIA = "search_wikipedia"
+SEARCH_DOCS = "search_docs"
+TOPIC = "topic"
+RUN_CODE = "run_code"
+SOLVE = "solve"
+SIMPLIFY = "simplify"
+DIFFERENTIATE = "differentiate"
+EXPLAIN_AGAIN = "explain_again"
+FALLBACK = "fallback"
+RETRIEVAL = "retrieval"
+
+Route = namedtuple("Route", ["intent", "key"])
+
+
+class IntentRouter:
+    """
+    Classifies a normalized message into a Route, keeping the precedence of
+    the original if/for chain: greetings, priority prefixes, topics (in
+    topic order), other prefixes, then phrases. A keyword found word for
+    word beats one found only with typos.
+    """
+
+    def __init__(self, greetings, topics, priority_prefixes=(), prefixes=(), phrases=()):
+        self.topics = list(topics)
+        self._entries = [(GREETING, g) for g in greetings]
+        self._entries += [(TOPIC, t) for t in self.topics]
+        self._entries += list(phrases)
+        # Greetings all share rank 0; topics and phrases follow in order
+        ranked = [(g, 0) for g in greetings]
+        ranked += [(key, i + 1) for i, (_, key) in enumerate(self._entries[len(greetings):])]
+        self._greeting_count = len(greetings)
+        self._index = KeywordIndex(ranked)
+        self._prefixes = list(priority_prefixes) + list(prefixes)
+        self._priority_count = len(priority_prefixes)
+        self._prefix_re = re.compile("|".join(
+            "(?P<p%d>%s)" % (i, re.escape(prefix)) for i, (_, prefix) in enumerate(self._prefixes)
+        )) if self._prefixes else None
+
+    def find_topic(self, text):
+        """The best topic mentioned in text, ignoring greetings, commands and phrases; or None."""
+        rank = self._index.best(text, ranks=range(1, len(self.topics) + 1))
+        return None if rank is None else self.topics[rank - 1]
+
+    def route(self, text):
+        rank = self._index.best(text)
+        if rank == 0:
+            return Route(GREETING, None)
+        prefix = None
+        if self._prefix_re is not None:
+            m = self._prefix_re.match(text)
+            if m:
+                prefix = int(m.lastgroup[1:])
+        if prefix is not None and prefix < self._priority_count:
+            return Route(*self._prefixes[prefix])
+        if rank is not None and self._entries[self._greeting_count + rank - 1][0] == TOPIC:
+            return Route(TOPIC, self._entries[self._greeting_count + rank - 1][1])
+        if prefix is not None:
+            return Route(*self._prefixes[prefix])
+        if rank is not None:
+            return Route(*self._entries[self._greeting_count + rank - 1])
+        return Route(FALLBACK, None)
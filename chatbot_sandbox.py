@@ -0,0 +1,260 @@
+"""
+chatbot_sandbox.py
+Resource-limited runner for the "run code:" command.
+Snippets run in a pool of pre-started worker subprocesses instead of
+in-process exec. Each worker applies memory/CPU rlimits (where the platform
+has them), enforces a per-request CPU timer and captures stdout; the parent
+enforces a wall-clock limit and kills and respawns workers that exceed it.
+Other modules can run their own request types in a pool by passing the name
+of a module with a HANDLERS dict (see chatbot_math).
+"""
+import atexit
+import importlib
+import io
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ALLOWED_BUILTINS = ('print', 'range', 'len', 'str', 'int', 'float', 'list', 'dict', 'set', 'tuple')
+
+
+class SandboxError(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, limits):
+        # -I keeps the worker away from the user's site-packages and the cwd
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", "-u", os.path.abspath(__file__), "--worker", json.dumps(limits)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", bufsize=1,
+        )
+        self.replies = queue.SimpleQueue()
+        self.tasks = 0
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            self.replies.put(json.loads(line))
+        self.replies.put(None)  # worker exited
+
+    def call(self, request, timeout):
+        self.tasks += 1
+        try:
+            self.proc.stdin.write(json.dumps(request) + "\n")
+            self.proc.stdin.flush()
+        except OSError:
+            raise SandboxError("the code runner stopped unexpectedly")
+        try:
+            reply = self.replies.get(timeout=timeout)
+        except queue.Empty:
+            raise SandboxError(f"took longer than {timeout:g} s and was stopped")
+        if reply is None:
+            raise SandboxError("used too many resources and was stopped")
+        return reply
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+class SandboxPool:
+    def __init__(self, size=2, cpu_seconds=2, wall_seconds=5, memory_mb=256, max_output=2000, max_tasks_per_worker=500,
+                 handlers=None):
+        self.size = size
+        self.wall_seconds = wall_seconds
+        self.max_tasks_per_worker = max_tasks_per_worker
+        # handlers: module imported by each worker whose HANDLERS add request ops
+        self.limits = {"cpu_seconds": cpu_seconds, "memory_mb": memory_mb, "max_output": max_output, "handlers": handlers}
+        self.restarts = 0
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._spawn())
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sandbox")
+
+    def _spawn(self):
+        worker = _Worker(self.limits)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker, kill):
+        with self._lock:
+            self._workers.discard(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.close()
+
+    def call(self, request):
+        """Run one request on an idle worker and return its reply dict."""
+        worker = self._idle.get()
+        try:
+            return worker.call(request, self.wall_seconds)
+        except SandboxError as e:
+            self._retire(worker, kill=True)
+            self.restarts += 1
+            worker = self._spawn()
+            return {"ok": False, "error": str(e)}
+        finally:
+            if worker.tasks >= self.max_tasks_per_worker:
+                self._retire(worker, kill=False)
+                worker = self._spawn()
+            self._idle.put(worker)
+
+    def run(self, code):
+        return self.call({"op": "exec", "code": code})
+
+    def submit(self, code):
+        """Like run(), but returns a concurrent.futures.Future."""
+        return self._executor.submit(self.run, code)
+
+    def submit_call(self, request):
+        """Like call(), but returns a concurrent.futures.Future."""
+        return self._executor.submit(self.call, request)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    """Process-wide pool, started on first use."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = SandboxPool()
+            atexit.register(_default_pool.close)
+    return _default_pool
+
+
+def format_result(reply):
+    if not reply["ok"]:
+        return f"Error running code: {reply['error']}"
+    response = f"Code executed. Locals: {reply['locals']}"
+    if reply["output"]:
+        response += f"\nOutput:\n{reply['output']}"
+    return response
+
+
+# --- Worker side ---
+
+class _CappedWriter(io.StringIO):
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.truncated = False
+
+    def write(self, s):
+        room = self.limit - self.tell()
+        if len(s) > room:
+            self.truncated = True
+            s = s[:max(room, 0)]
+        return super().write(s)
+
+
+class _CpuTimeExceeded(BaseException):
+    pass
+
+
+def _apply_rlimits(limits):
+    try:
+        import resource
+    except ImportError:  # POSIX only; on Windows the parent's wall-clock limit still applies
+        return
+    memory = limits["memory_mb"] * 2**20
+    for name, value in (("RLIMIT_AS", memory), ("RLIMIT_CORE", 0), ("RLIMIT_FSIZE", 0)):
+        if hasattr(resource, name):
+            try:
+                resource.setrlimit(getattr(resource, name), (value, value))
+            except (ValueError, OSError):
+                pass
+
+
+def _exec(code, limits):
+    import contextlib
+    builtins = __builtins__ if isinstance(__builtins__, dict) else vars(__builtins__)
+    allowed = {name: builtins[name] for name in ALLOWED_BUILTINS}
+    local_vars = {}
+    out = _CappedWriter(limits["max_output"])
+    try:
+        with contextlib.redirect_stdout(out):
+            exec(code, {'__builtins__': allowed}, local_vars)
+    except MemoryError:
+        raise
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+    output = out.getvalue() + ("\n... (output truncated)" if out.truncated else "")
+    return {"ok": True, "output": output, "locals": repr(local_vars)[:limits["max_output"]]}
+
+
+def _worker_main(limits):
+    import signal
+    # Replies go to a private copy of stdout; fd 1 itself goes to /dev/null
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    timer = hasattr(signal, "setitimer")
+    if timer:
+        def on_cpu_timer(signum, frame):
+            raise _CpuTimeExceeded()
+        signal.signal(signal.SIGVTALRM, on_cpu_timer)
+    if limits.get("handlers"):
+        # -I leaves this directory off sys.path; the handler modules live next to this file
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        module = importlib.import_module(limits["handlers"])
+        HANDLERS.update(module.HANDLERS)
+        if hasattr(module, "worker_init"):
+            module.worker_init()  # e.g. heavy imports, kept out of every request's CPU budget
+    _apply_rlimits(limits)
+    for line in sys.stdin:
+        request = json.loads(line)
+        if timer:
+            signal.setitimer(signal.ITIMER_VIRTUAL, limits["cpu_seconds"])
+        try:
+            reply = HANDLERS[request["op"]](request, limits)
+        except _CpuTimeExceeded:
+            reply = {"ok": False, "error": f"used more than {limits['cpu_seconds']:g} s of CPU time and was stopped"}
+        except MemoryError:
+            reply = {"ok": False, "error": "ran out of memory"}
+        finally:
+            if timer:
+                signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+HANDLERS = {
+    "exec": lambda request, limits: _exec(request["code"], limits),
+}
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--worker"]:
+    _worker_main(json.loads(sys.argv[2]))
@@ -0,0 +1,182 @@
+"""
+chatbot_scheduler.py
+Admission control in front of the bot, so a burst of expensive messages
+from one user cannot hold up everyone's cheap ones.
+A cost function (ChatBot.cost) sorts each message into a kind: CHEAP ones
+(greetings, topics, memoized or plain arithmetic math, cached searches)
+are answered inline, while SEARCH (network) and COMPUTE (sandboxed code
+and sympy) each get a Lane: a fixed number of slots, a bounded queue in front of them and a token bucket per session.
+A message is shed with Rejected, rather than left to pile up, when its
+lane's queue is full, when its session has used up its tokens, or when it
+waited past the lane's deadline for a slot.
+    scheduler = Scheduler(bot.cost)
+    response = await scheduler.run(message, session_id, lambda: bot.aget_bot_response(message, session))
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Kinds of work
+CHEAP = "cheap"
+SEARCH = "search"
+COMPUTE = "compute"
+
+# Why a message was shed
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+EXPIRED = "expired"
+
+DESCRIPTIONS = {SEARCH: "searches", COMPUTE: "code and math requests"}
+
+# Per kind: slots, queued messages, seconds a message may wait for a slot, and per-session tokens/second and burst
+LANE_LIMITS = {
+    SEARCH: dict(concurrency=16, max_queued=64, deadline=5.0, rate=1.0, burst=5),
+    COMPUTE: dict(concurrency=4, max_queued=16, deadline=5.0, rate=0.5, burst=3),
+}
+
+
+class Rejected(Exception):
+    """A message shed by admission control; retry_after is in seconds."""
+
+    def __init__(self, reason, kind, retry_after=1.0):
+        self.reason = reason
+        self.kind = kind
+        self.retry_after = retry_after
+        what = DESCRIPTIONS.get(kind, f"{kind} requests")
+        if reason == RATE_LIMITED:
+            text = f"Too many {what} at once. Try again in {math.ceil(retry_after)} s."
+        else:
+            text = f"I'm too busy for more {what} right now. Try again in a moment."
+        super().__init__(text)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def take(self, now):
+        """0.0 if a token was taken, otherwise the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    A token bucket per session for one kind of work. Only the most recently
+    seen max_sessions buckets are kept; a forgotten session starts full again.
+    """
+
+    def __init__(self, kind, rate, burst, max_sessions=10000, clock=time.monotonic):
+        self.kind = kind
+        self.rate = rate
+        self.burst = burst
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, session_id):
+        """Take a token for session_id; raises Rejected when it has none left."""
+        with self._lock:
+            now = self.clock()
+            bucket = self._buckets.get(session_id)
+            if bucket is None:
+                bucket = self._buckets[session_id] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_sessions:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(session_id)
+            wait = bucket.take(now)
+        if wait:
+            raise Rejected(RATE_LIMITED, self.kind, wait)
+
+
+class Lane:
+    """Bounded queue and slots for one kind of expensive work, on an asyncio loop."""
+
+    def __init__(self, kind, concurrency, max_queued, deadline, rate, burst, clock=time.monotonic):
+        self.kind = kind
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.deadline = deadline
+        self.limiter = RateLimiter(kind, rate, burst, clock=clock)
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self.expired = 0
+        self._slots = None
+
+    async def run(self, session_id, work):
+        """await work() once a slot is free; raises Rejected instead when the message is shed."""
+        if self.running >= self.concurrency and self.queued >= self.max_queued:
+            self.shed += 1
+            raise Rejected(QUEUE_FULL, self.kind)
+        try:
+            self.limiter.acquire(session_id)
+        except Rejected:
+            self.rate_limited += 1
+            raise
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.deadline)
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise Rejected(EXPIRED, self.kind) from None
+        finally:
+            self.queued -= 1
+        self.running += 1
+        self.admitted += 1
+        try:
+            return await work()
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "expired": self.expired,
+        }
+
+
+def default_lanes(clock=time.monotonic):
+    return [Lane(kind, clock=clock, **limits) for kind, limits in LANE_LIMITS.items()]
+
+
+class Scheduler:
+    """Runs cheap messages inline and the rest in their kind's Lane."""
+
+    def __init__(self, cost, lanes=None):
+        self.cost = cost  # message -> kind
+        self.lanes = {lane.kind: lane for lane in (lanes if lanes is not None else default_lanes())}
+        self.inline = 0
+
+    async def run(self, message, session_id, work):
+        """The result of await work(), run as message's cost allows; raises Rejected when it is shed."""
+        lane = self.lanes.get(self.cost(message))
+        if lane is None:  # cheap, or a kind nothing limits
+            self.inline += 1
+            return await work()
+        return await lane.run(session_id, work)
+
+    def stats(self):
+        return {"inline": self.inline, **{kind: lane.stats() for kind, lane in self.lanes.items()}}
@@ -0,0 +1,500 @@
+"""
+chatbot_server.py
+Headless HTTP and WebSocket front end for chatbot_core.ChatBot, on plain
+asyncio with no web framework.
+    POST /chat    {"message": ..., "session_id": ...} -> {"response", "session_id"}
+    GET  /chat    with "Upgrade: websocket": one JSON (or plain text) message
+                  per frame, one {"response", "session_id"} frame back
+    GET  /health  -> server statistics
+    GET  /metrics -> chatbot_metrics in Prometheus text (?format=json for JSON)
+A connection gets its own session unless the request names one. Requests
+on a connection are answered one at a time, so a client that stops reading
+stops being read from. When the bot has a cost() (as ChatBot does), a
+chatbot_scheduler.Scheduler answers cheap messages straight away and queues
+searches, code and math in their own bounded lanes, refusing what it sheds
+with 429 (the session's rate limit) or 503 (the lane is full). Without
+one, past max_inflight concurrent answers requests wait, and past
+max_queued waiting ones they are refused with 503. Every answer is
+limited to request_timeout seconds; an exception from the bot is logged
+and answered with 500, and the connection stays open. Blocking work runs in a thread pool of
+`workers` threads. shutdown() stops accepting, closes idle connections and
+lets the requests in progress finish.
+Run with:
+    python chatbot_server.py [--host 127.0.0.1] [--port 8765] [--workers 4] [--no-scheduler]
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import signal
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from chatbot_metrics import METRICS
+from chatbot_scheduler import Rejected, Scheduler, RATE_LIMITED
+from chatbot_sessions import SessionManager
+
+log = logging.getLogger(__name__)
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# WebSocket opcodes
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# WebSocket close codes
+GOING_AWAY, PROTOCOL_ERROR, UNSUPPORTED_DATA, MESSAGE_TOO_BIG = 1001, 1002, 1003, 1009
+
+MAX_HEADERS = 100
+
+
+class ProtocolError(Exception):
+    def __init__(self, status, message, retry_after=1):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class WebSocketClosed(Exception):
+    pass
+
+
+def encode_frame(opcode, payload=b"", mask=False):
+    """One final WebSocket frame; clients must mask theirs."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + _apply_mask(payload, key)
+
+
+def _apply_mask(payload, key):
+    # XOR with the repeated key as one big integer, far faster than byte by byte
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
+
+
+async def read_frame(reader, max_size):
+    """(fin, opcode, payload) of the next frame; raises ProtocolError for bad or oversized frames."""
+    first, second = await reader.readexactly(2)
+    if first & 0x70:
+        raise ProtocolError(PROTOCOL_ERROR, "reserved bits set")
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    if length > max_size:
+        raise ProtocolError(MESSAGE_TOO_BIG, "message too big")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key is not None:
+        payload = _apply_mask(payload, key)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+def websocket_accept(key):
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+class _Connection:
+    def __init__(self, conn_id, writer):
+        self.id = conn_id
+        self.writer = writer
+        self.busy = False
+        self.websocket = False
+        self.task = asyncio.current_task()
+
+
+class ChatServer:
+    def __init__(self, bot=None, host="127.0.0.1", port=8765, workers=4, max_connections=1000, max_inflight=64,
+                 max_queued=256, request_timeout=15.0, idle_timeout=60.0, max_body=64 * 1024, sessions=None,
+                 scheduler=None):
+        if bot is None:
+            from chatbot_core import ChatBot
+            bot = ChatBot()
+        self.bot = bot
+        # None means a Scheduler over the bot's cost(), if it has one; False disables it
+        if scheduler is None and hasattr(bot, "cost"):
+            scheduler = Scheduler(bot.cost)
+        self.scheduler = scheduler or None
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_connections = max_connections
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self.max_body = max_body
+        self.sessions = sessions if sessions is not None else SessionManager()
+        self.executor = None
+        self.requests = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.inflight = 0
+        self.queued = 0
+        self._server = None
+        self._slots = None
+        self._closing = False
+        self._connections = set()
+        self._conn_ids = itertools.count(1)
+
+    async def start(self):
+        """Start listening; returns the bound (host, port)."""
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chatbot-server")
+        # Blocking work the bot hands to run_in_executor(None, ...) lands in this pool
+        asyncio.get_running_loop().set_default_executor(self.executor)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=self.max_body)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.host, self.port
+
+    async def shutdown(self, grace=10.0):
+        """Stop accepting, close idle connections and wait up to grace seconds for busy ones."""
+        if self._closing:
+            return
+        self._closing = True
+        self._server.close()
+        for conn in list(self._connections):
+            if not conn.busy:
+                await self._close_idle(conn)
+        tasks = [conn.task for conn in self._connections if conn.task is not None]
+        if tasks:
+            _, still_running = await asyncio.wait(tasks, timeout=grace)
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+        await self._server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        async_http = getattr(self.bot, "async_http", None)
+        if async_http is None:
+            from chatbot_http import default_async_client
+            await default_async_client().aclose()
+
+    async def serve_forever(self):
+        """Serve until SIGINT/SIGTERM (where the platform supports the handlers), then shut down."""
+        if self._server is None:
+            await self.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            await stop.wait()
+        finally:
+            await self.shutdown()
+
+    def stats(self):
+        return {
+            "status": "shutting down" if self._closing else "ok",
+            "connections": len(self._connections),
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "sessions": len(self.sessions),
+            "memo": self.bot.memo.stats() if getattr(self.bot, "memo", None) else None,
+            "scheduler": self.scheduler.stats() if self.scheduler else None,
+        }
+
+    async def _close_idle(self, conn):
+        try:
+            if conn.websocket:
+                await self._send_frame(conn, CLOSE, struct.pack("!H", GOING_AWAY))
+        except ConnectionError:
+            pass
+        conn.writer.close()
+
+    # --- Answering ---
+
+    async def answer(self, message, session_id):
+        """The bot's response, or raises ProtocolError when busy, rate limited, timed out or the bot failed."""
+        try:
+            session = self.sessions.get(session_id)
+            if self.scheduler is None:
+                return await self._queued_answer(message, session)
+            return await self.scheduler.run(message, session_id, lambda: self._timed_answer(message, session))
+        except Rejected as e:
+            self.rejected += 1
+            status = HTTPStatus.TOO_MANY_REQUESTS if e.reason == RATE_LIMITED else HTTPStatus.SERVICE_UNAVAILABLE
+            raise ProtocolError(status, str(e), math.ceil(e.retry_after)) from None
+        except ProtocolError:
+            raise
+        except Exception:
+            # A bug in the bot costs this one answer, not the connection
+            self.errors += 1
+            log.exception("answering %r for session %s failed", message[:80], session_id)
+            raise ProtocolError(HTTPStatus.INTERNAL_SERVER_ERROR, "the bot failed to answer") from None
+
+    async def _queued_answer(self, message, session):
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise ProtocolError(HTTPStatus.SERVICE_UNAVAILABLE, "server busy, try again later")
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        try:
+            return await self._timed_answer(message, session)
+        finally:
+            self._slots.release()
+
+    async def _timed_answer(self, message, session):
+        self.inflight += 1
+        try:
+            return await asyncio.wait_for(self.bot.aget_bot_response(message, session), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ProtocolError(HTTPStatus.GATEWAY_TIMEOUT, "the bot took too long to answer") from None
+        finally:
+            self.inflight -= 1
+            self.requests += 1
+
+    # --- HTTP ---
+
+    async def _handle(self, reader, writer):
+        conn = _Connection(f"conn-{next(self._conn_ids)}", writer)
+        if self._closing or len(self._connections) >= self.max_connections:
+            self.rejected += 1
+            await self._respond(conn, HTTPStatus.SERVICE_UNAVAILABLE, {"error": "too many connections"}, keep_alive=False)
+            writer.close()
+            return
+        self._connections.add(conn)
+        try:
+            keep_alive = True
+            while keep_alive and not self._closing:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except ProtocolError as e:
+                    await self._respond(conn, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                except ValueError:
+                    # A line longer than the stream's limit
+                    await self._respond(conn, HTTPStatus.BAD_REQUEST, {"error": "line too long"}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                conn.busy = True
+                try:
+                    keep_alive = await self._dispatch(conn, reader, *request)
+                finally:
+                    conn.busy = False
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(conn)
+            writer.close()
+
+    async def _read_request(self, reader):
+        """(method, target, headers, body), or None at end of stream."""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise ProtocolError(HTTPStatus.BAD_REQUEST, "malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise ProtocolError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        headers[":version"] = version
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise ProtocolError(HTTPStatus.LENGTH_REQUIRED, "chunked bodies are not supported")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise ProtocolError(HTTPStatus.BAD_REQUEST, "bad Content-Length") from None
+        if length > self.max_body:
+            raise ProtocolError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, conn, reader, method, target, headers, body):
+        """Answer one request; returns whether to keep the connection open."""
+        connection = headers.get("connection", "").lower()
+        keep_alive = "close" not in connection if headers[":version"] == "HTTP/1.1" else "keep-alive" in connection
+        url = urlsplit(target)
+        if url.path in ("/health", "/metrics") and method != "GET":
+            return await self._respond(conn, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use GET"}, keep_alive)
+        if url.path == "/health":
+            return await self._respond(conn, HTTPStatus.OK, self.stats(), keep_alive)
+        if url.path == "/metrics":
+            if parse_qs(url.query).get("format") == ["json"]:
+                return await self._respond(conn, HTTPStatus.OK, METRICS.to_json(), keep_alive)
+            return await self._respond(conn, HTTPStatus.OK, METRICS.to_prometheus(), keep_alive)
+        if url.path != "/chat":
+            return await self._respond(conn, HTTPStatus.NOT_FOUND, {"error": "not found"}, keep_alive)
+        if method == "GET" and headers.get("upgrade", "").lower() == "websocket":
+            session_id = parse_qs(url.query).get("session_id", [conn.id])[0]
+            await self._websocket(conn, reader, headers, session_id)
+            return False
+        if method != "POST":
+            return await self._respond(conn, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}, keep_alive)
+        try:
+            payload = json.loads(body)
+            message = payload["message"]
+            if not isinstance(message, str):
+                raise TypeError()
+        except (ValueError, KeyError, TypeError):
+            return await self._respond(conn, HTTPStatus.BAD_REQUEST, {"error": 'expected {"message": "..."}'}, keep_alive)
+        session_id = str(payload.get("session_id") or conn.id)
+        try:
+            response = await self.answer(message, session_id)
+        except ProtocolError as e:
+            return await self._respond(conn, e.status, {"error": str(e)}, keep_alive, e.retry_after)
+        return await self._respond(conn, HTTPStatus.OK, {"response": response, "session_id": session_id}, keep_alive)
+
+    async def _respond(self, conn, status, payload, keep_alive, retry_after=1):
+        """Send payload as JSON, or as plain text if it is a str."""
+        keep_alive = keep_alive and not self._closing
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if status in (HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.TOO_MANY_REQUESTS):
+            head += f"Retry-After: {retry_after}\r\n"
+        conn.writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await conn.writer.drain()  # a slow reader holds up only its own connection
+        return keep_alive
+
+    # --- WebSocket ---
+
+    async def _websocket(self, conn, reader, headers, session_id):
+        key = headers.get("sec-websocket-key")
+        if not key or headers.get("sec-websocket-version") != "13":
+            await self._respond(conn, HTTPStatus.BAD_REQUEST, {"error": "bad WebSocket handshake"}, keep_alive=False)
+            return
+        conn.writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n"
+        ).encode("latin-1"))
+        await conn.writer.drain()
+        conn.websocket = True
+        conn.busy = False
+        try:
+            while not self._closing:
+                try:
+                    message = await asyncio.wait_for(self._read_message(conn, reader), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self._send_frame(conn, CLOSE, struct.pack("!H", GOING_AWAY))
+                    return
+                conn.busy = True
+                try:
+                    await self._send_frame(conn, TEXT, json.dumps(await self._ws_reply(message, session_id)))
+                finally:
+                    conn.busy = False
+            await self._send_frame(conn, CLOSE, struct.pack("!H", GOING_AWAY))
+        except ProtocolError as e:
+            await self._send_frame(conn, CLOSE, struct.pack("!H", e.status) + str(e).encode("utf-8"))
+        except (WebSocketClosed, asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def _ws_reply(self, message, session_id):
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            message = payload.get("message")
+            if not isinstance(message, str):
+                return {"error": 'expected {"message": "..."} or plain text'}
+        try:
+            return {"response": await self.answer(message, session_id), "session_id": session_id}
+        except ProtocolError as e:
+            return {"error": str(e), "status": e.status}
+
+    async def _read_message(self, conn, reader):
+        """Text of the next data message, answering pings along the way."""
+        parts = []
+        size = 0
+        while True:
+            fin, opcode, payload = await read_frame(reader, self.max_body - size)
+            if opcode == PING:
+                await self._send_frame(conn, PONG, payload)
+                continue
+            if opcode == PONG:
+                continue
+            if opcode == CLOSE:
+                await self._send_frame(conn, CLOSE, payload[:2])
+                raise WebSocketClosed()
+            if opcode == BINARY:
+                raise ProtocolError(UNSUPPORTED_DATA, "text frames only")
+            if (opcode == CONTINUATION) != bool(parts):
+                raise ProtocolError(PROTOCOL_ERROR, "unexpected continuation frame")
+            parts.append(payload)
+            size += len(payload)
+            if fin:
+                try:
+                    return b"".join(parts).decode("utf-8")
+                except UnicodeDecodeError:
+                    raise ProtocolError(UNSUPPORTED_DATA, "invalid UTF-8") from None
+
+    async def _send_frame(self, conn, opcode, payload=b""):
+        conn.writer.write(encode_frame(opcode, payload))
+        await conn.writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the chatbot over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4, help="threads for blocking work")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--max-inflight", type=int, default=64, help="answers computed at once, with --no-scheduler")
+    parser.add_argument("--max-queued", type=int, default=256, help="answers waiting before requests get 503, with --no-scheduler")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds allowed per answer")
+    parser.add_argument("--no-scheduler", action="store_true",
+                        help="queue every message alike instead of cheap ones inline and the rest by cost")
+    args = parser.parse_args(argv)
+    server = ChatServer(
+        host=args.host, port=args.port, workers=args.workers, max_connections=args.max_connections,
+        max_inflight=args.max_inflight, max_queued=args.max_queued, request_timeout=args.timeout,
+        scheduler=False if args.no_scheduler else None,
+    )
+
+    async def run():
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}/chat", flush=True)
+        await server.serve_forever()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
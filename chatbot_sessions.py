@@ -0,0 +1,187 @@
+"""
+chatbot_sessions.py
+Per-user conversation state, so one bot can serve many sessions.
+SessionState is a compact __slots__ object whose history is a fixed-size
+deque. SessionManager maps session IDs to states in LRU order and evicts
+the least recently used ones when there are too many, when their estimated
+memory goes over a budget, or when they have been idle too long. Evicted
+sessions can be spilled to SQLite and are restored transparently on their
+next message; spilled ones not back within spill_ttl are purged as the
+manager evicts.
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+HISTORY_LENGTH = 6  # 3 (user, bot) message pairs
+SPILL_PURGE_INTERVAL = 300  # seconds between purges of expired spilled sessions
+
+
+class SessionState:
+    __slots__ = ("history", "last_topic", "awaiting_visual_example", "last_visual_request", "last_seen", "nbytes")
+
+    def __init__(self, history=(), last_topic=None, awaiting_visual_example=False, last_visual_request=None):
+        self.history = deque(history, maxlen=HISTORY_LENGTH)
+        self.last_topic = last_topic
+        self.awaiting_visual_example = awaiting_visual_example
+        self.last_visual_request = last_visual_request
+        self.last_seen = 0.0
+        self.nbytes = 0
+
+    def to_json(self):
+        return json.dumps([list(self.history), self.last_topic, self.awaiting_visual_example, self.last_visual_request])
+
+    @classmethod
+    def from_json(cls, text):
+        history, last_topic, awaiting, last_visual = json.loads(text)
+        return cls(map(tuple, history), last_topic, awaiting, last_visual)
+
+
+_BASE_BYTES = sys.getsizeof(SessionState()) + sys.getsizeof(deque(maxlen=HISTORY_LENGTH))
+_MESSAGE_BYTES = sys.getsizeof(("user", ""))
+
+
+def estimate_size(state):
+    """Approximate bytes held by state (the object, its deque and its messages)."""
+    return _BASE_BYTES + sum(_MESSAGE_BYTES + sys.getsizeof(text) for _, text in state.history)
+
+
+class SessionSpill:
+    """SQLite store for evicted sessions."""
+
+    def __init__(self, path, clock=time.time):
+        self.clock = clock  # wall-clock, so saved_at stays meaningful across restarts
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Spilled sessions are a cache of live state, so a crash may lose them
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state TEXT, saved_at REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_saved_at ON sessions (saved_at)")
+
+    def save_many(self, items):
+        now = self.clock()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions (id, state, saved_at) VALUES (?, ?, ?)",
+                [(session_id, state.to_json(), now) for session_id, state in items],
+            )
+
+    def pop(self, session_id):
+        """Remove and return the saved state, or None."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return SessionState.from_json(row[0])
+
+    def purge(self, older_than):
+        """Forget sessions saved more than older_than seconds ago."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE saved_at < ?", (self.clock() - older_than,)).rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class SessionManager:
+    def __init__(self, max_sessions=100000, idle_timeout=3600, memory_budget=None, spill_path=None,
+                 spill_ttl=7 * 24 * 3600, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.memory_budget = memory_budget  # bytes, as estimated by estimate_size
+        self.spill = SessionSpill(spill_path) if spill_path else None
+        self.spill_ttl = spill_ttl  # seconds a spilled session is kept for
+        self.clock = clock
+        self.memory = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.restored = 0
+        self.purged = 0
+        self._purged_at = float("-inf")
+        self._sessions = OrderedDict()  # session id -> SessionState, least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """State for session_id, restored from the spill or created if needed."""
+        now = self.clock()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self.spill.pop(session_id) if self.spill is not None else None
+                if state is None:
+                    state = SessionState()
+                else:
+                    self.restored += 1
+                self._sessions[session_id] = state
+            else:
+                self._sessions.move_to_end(session_id)
+            state.last_seen = now
+            # Re-measure on every visit; the previous turn may have grown the history
+            size = estimate_size(state)
+            self.memory += size - state.nbytes
+            state.nbytes = size
+            self._enforce_limits(now)
+        return state
+
+    def drop(self, session_id):
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+            if state is not None:
+                self.memory -= state.nbytes
+
+    def evict_idle(self):
+        """Evict every session idle longer than idle_timeout; returns how many went."""
+        with self._lock:
+            before = self.expirations
+            self._enforce_limits(self.clock())
+            return self.expirations - before
+
+    def _enforce_limits(self, now):
+        evicted = []
+        sessions = self._sessions
+        # The least recently used session is the one that has been idle longest
+        while sessions:
+            session_id, state = next(iter(sessions.items()))
+            if now - state.last_seen > self.idle_timeout:
+                self.expirations += 1
+            elif len(sessions) > 1 and (len(sessions) > self.max_sessions or (
+                    self.memory_budget is not None and self.memory > self.memory_budget)):
+                # Never the session being handed out, which is the most recent
+                self.evictions += 1
+            else:
+                break
+            del sessions[session_id]
+            self.memory -= state.nbytes
+            evicted.append((session_id, state))
+        if self.spill is not None:
+            if evicted:
+                self.spill.save_many(evicted)
+            if now - self._purged_at >= SPILL_PURGE_INTERVAL:
+                self._purged_at = now
+                self.purged += self.spill.purge(self.spill_ttl)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "memory": self.memory,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "restored": self.restored,
+            "purged": self.purged,
+        }
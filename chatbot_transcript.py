@@ -0,0 +1,212 @@
+"""
+chatbot_transcript.py
+Virtualized chat transcript for the GUIs.
+Every message lives in a compact TranscriptModel (text, sender and a running
+y offset per message). Only the bubbles in view, plus a buffer above and
+below, have Label widgets, and those are recycled as the view scrolls.
+StreamingBubble grows one bubble as a chatbot_generate.TextStream arrives.
+"""
+import time
+import tkinter as tk
+from array import array
+from bisect import bisect_left, bisect_right
+
+BOT, USER = 0, 1
+BUBBLE_STYLES = {
+    BOT: {"bg": "#3a3f4b", "fg": "#eeeeee", "justify": tk.LEFT},
+    USER: {"bg": "#1976d2", "fg": "#ffffff", "justify": tk.RIGHT},
+}
+SPACING = 8  # vertical gap between bubbles
+SIDE_MARGIN = 12
+
+
+class TranscriptModel:
+    def __init__(self):
+        self.texts = []
+        self.senders = bytearray()
+        # offsets[i] is the top of message i; offsets[-1] is the total height
+        self.offsets = array("Q", [0])
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def total_height(self):
+        return self.offsets[-1]
+
+    def height(self, index):
+        return self.offsets[index + 1] - self.offsets[index]
+
+    def append(self, text, sender, height):
+        self.texts.append(text)
+        self.senders.append(sender)
+        self.offsets.append(self.offsets[-1] + height)
+        return len(self.texts) - 1
+
+    def update(self, index, text, height):
+        self.texts[index] = text
+        delta = height - self.height(index)
+        if delta:
+            # Updates almost always hit the newest messages, so this loop is short
+            for i in range(index + 1, len(self.offsets)):
+                self.offsets[i] += delta
+
+    def visible_range(self, top, bottom):
+        """Indices of the messages overlapping the pixel span [top, bottom)."""
+        first = max(bisect_right(self.offsets, top) - 1, 0)
+        last = min(bisect_left(self.offsets, bottom), len(self.texts))
+        return range(first, max(first, last))
+
+
+class VirtualTranscript:
+    def __init__(self, canvas, font=("Segoe UI", 13), wraplength=340, buffer_px=600, label_factory=tk.Label):
+        self.canvas = canvas
+        self.model = TranscriptModel()
+        self.buffer_px = buffer_px
+        self._label_options = dict(font=font, wraplength=wraplength, padx=12, pady=8, bd=0, relief=tk.FLAT)
+        self._make_label = label_factory
+        self._measurer = None
+        self._shown = {}  # message index -> (label, canvas item)
+        self._free = []
+        self._width = None
+        canvas.configure(yscrollincrement=20)
+        canvas.bind("<Configure>", lambda e: self.refresh(), add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            canvas.bind(sequence, self._on_wheel, add="+")
+
+    def __len__(self):
+        return len(self.model)
+
+    def append(self, text, sender="bot"):
+        kind = USER if sender == "user" else BOT
+        index = self.model.append(text, kind, self._measure(text, kind))
+        self._sync_scrollregion()
+        self.canvas.yview_moveto(1.0)
+        self.refresh()
+        return index
+
+    def update(self, index, text):
+        at_bottom = self.canvas.yview()[1] >= 0.999
+        self.model.update(index, text, self._measure(text, self.model.senders[index]))
+        # Everything below the message may have moved, so re-place what is shown
+        self._release_all()
+        self._sync_scrollregion()
+        if at_bottom:
+            self.canvas.yview_moveto(1.0)
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command."""
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def refresh(self):
+        width = self.canvas.winfo_width()
+        if width != self._width:
+            self._width = width
+            self._release_all()
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        wanted = self.model.visible_range(max(0, top - self.buffer_px), bottom + self.buffer_px)
+        for index in [i for i in self._shown if i not in wanted]:
+            self._release(self._shown.pop(index))
+        for index in wanted:
+            if index not in self._shown:
+                self._shown[index] = self._place(index)
+
+    @property
+    def widget_count(self):
+        return len(self._shown) + len(self._free)
+
+    def _measure(self, text, kind):
+        # Label geometry is computed on configure, so reqheight is exact without mapping it
+        if self._measurer is None:
+            self._measurer = self._make_label(self.canvas, **self._label_options)
+        self._measurer.configure(text=text, justify=BUBBLE_STYLES[kind]["justify"])
+        return self._measurer.winfo_reqheight() + SPACING
+
+    def _place(self, index):
+        kind = self.model.senders[index]
+        if self._free:
+            label, item = self._free.pop()
+        else:
+            label = self._make_label(self.canvas, **self._label_options)
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                label.bind(sequence, self._on_wheel)
+            item = self.canvas.create_window(0, 0, window=label)
+        label.configure(text=self.model.texts[index], **BUBBLE_STYLES[kind])
+        y = self.model.offsets[index] + SPACING // 2
+        if kind == USER:
+            self.canvas.coords(item, self._width - SIDE_MARGIN, y)
+            self.canvas.itemconfigure(item, anchor="ne", state="normal")
+        else:
+            self.canvas.coords(item, SIDE_MARGIN, y)
+            self.canvas.itemconfigure(item, anchor="nw", state="normal")
+        return label, item
+
+    def _release(self, slot):
+        self.canvas.itemconfigure(slot[1], state="hidden")
+        self._free.append(slot)
+
+    def _release_all(self):
+        for slot in self._shown.values():
+            self._release(slot)
+        self._shown.clear()
+
+    def _sync_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, self._width or 0, self.model.total_height))
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            step = -1
+        elif getattr(event, "num", None) == 5:
+            step = 1
+        else:
+            step = -1 if event.delta > 0 else 1
+        self.yview("scroll", step * 3, "units")
+
+
+class StreamingBubble:
+    """
+    Copies a TextStream into one transcript bubble. The stream is polled
+    from the Tk loop every interval_ms and everything that arrived in
+    between goes out in one update, so repaints stay bounded however fast
+    tokens come. When the stream ends the bubble gets the final text, or
+    on_error(exception) if generation failed.
+    """
+
+    def __init__(self, transcript, index, stream, interval_ms=50, on_error=None):
+        self.transcript = transcript
+        self.index = index
+        self.stream = stream
+        self.interval_ms = interval_ms
+        self.on_error = on_error or (lambda e: f"Error: {e}")
+        self.text = ""
+        self.updates = 0
+        self.started_at = None
+        self.first_text_at = None  # perf_counter() of the first visible text
+        self.finished_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._poll()
+        return self
+
+    def _poll(self):
+        text = self.stream.drain()
+        if text:
+            self.text += text
+            self._show(self.text.strip())
+            if self.first_text_at is None:
+                self.first_text_at = time.perf_counter()
+        if not self.stream.finished:
+            self.transcript.canvas.after(self.interval_ms, self._poll)
+            return
+        error = self.stream.future.exception()
+        self._show(self.stream.future.result() if error is None else self.on_error(error))
+        self.finished_at = time.perf_counter()
+
+    def _show(self, text):
+        if text and text != self.transcript.model.texts[self.index]:
+            self.transcript.update(self.index, text)
+            self.updates += 1
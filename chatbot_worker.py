@@ -0,0 +1,66 @@
+"""
+chatbot_worker.py
+Runs bot responses off the GUI thread.
+Work goes to a worker thread and finished responses are queued; the GUI
+drains the queue with poll() from its own thread (Tk is not thread-safe).
+One thread by default, so messages to one bot session are answered in
+order. Submitting a new message skips those that have not started; one
+that has started has already changed the session, so it is still answered.
+"""
+import itertools
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ResponseWorker:
+    def __init__(self, respond, max_workers=1):
+        self.respond = respond
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chatbot-worker")
+        self._results = queue.SimpleQueue()
+        self._jobs = {}  # ticket -> (future, on_done, on_cancel)
+        self._tickets = itertools.count(1)
+
+    @property
+    def pending(self):
+        return len(self._jobs)
+
+    def submit(self, message, on_done, on_cancel=None):
+        """Queue message; on_done(response) is called from poll(). Call from the GUI thread."""
+        self.cancel_pending()
+        ticket = next(self._tickets)
+        future = self._executor.submit(self._run, ticket, message)
+        self._jobs[ticket] = (future, on_done, on_cancel)
+        return ticket
+
+    def _run(self, ticket, message):
+        try:
+            response = self.respond(message)
+        except Exception as e:
+            response = f"Sorry, something went wrong: {e}"
+        self._results.put((ticket, response))
+
+    def cancel_pending(self):
+        """Skip the jobs that have not started; on_cancel() is called for each."""
+        for ticket, (future, _, on_cancel) in list(self._jobs.items()):
+            if not future.cancel():
+                continue  # running or done: its answer is in the session, so it is delivered
+            del self._jobs[ticket]
+            if on_cancel is not None:
+                on_cancel()
+
+    def poll(self):
+        """Deliver finished responses; returns how many callbacks ran."""
+        delivered = 0
+        while True:
+            try:
+                ticket, response = self._results.get_nowait()
+            except queue.Empty:
+                return delivered
+            job = self._jobs.pop(ticket, None)
+            if job is not None:
+                job[1](response)
+                delivered += 1
+
+    def shutdown(self):
+        self.cancel_pending()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,10 @@
+import threading
+import time
 import unittest
+from chatbot_cache import SearchCache
 from chatbot_core import ChatBot
+from chatbot_math import MathError
+from chatbot_sessions import SessionState
 
 class TestChatBot(unittest.TestCase):
     def setUp(self):
@@ -19,5 +24,68 @@ class TestChatBot(unittest.TestCase):
         response = self.bot.get_bot_response("explain again")
         self.assertTrue(any(word in response.lower() for word in ["variable", "stores data"]))
 
+class CountingMath:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def compute(self, command, expr):
+        self.calls += 1
+        time.sleep(self.delay)
+        if expr == "bad":
+            raise MathError("invalid expression")
+        return "4"
+
+class CountingSandbox:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, code):
+        self.calls += 1
+        return {"ok": True, "locals": {}, "output": ""}
+
+class TestResponseMemo(unittest.TestCase):
+    def setUp(self):
+        self.memo = SearchCache(ttl=float("inf"))
+        self.math = CountingMath()
+        self.bot = ChatBot(memo=self.memo, math=self.math)
+
+    def test_hits_still_update_each_session(self):
+        alice, bob = SessionState(), SessionState()
+        first = self.bot.get_bot_response("what is a list?", alice)
+        self.assertEqual(self.bot.get_bot_response("what is a list?", bob), first)
+        self.assertEqual(self.memo.stats()["hits"], 1)
+        self.assertEqual(bob.last_topic, "list")
+        self.assertEqual(list(bob.history), [("user", "what is a list?"), ("bot", first)])
+        self.bot.get_bot_response("what is a loop?", alice)
+        # "explain again" is memoized too, but answered from each session's own last topic
+        self.assertIn("loop", self.bot.get_bot_response("explain again", alice).lower())
+        self.assertIn("list", self.bot.get_bot_response("explain again", bob).lower())
+        self.assertGreater(self.memo.stats()["hit_ratio"], 0.3)
+
+    def test_only_pure_answers_are_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.bot.get_bot_response("solve: 2 + 2"), "Math result: 4")
+            self.assertEqual(self.bot.get_bot_response("solve: bad"), "Error solving math: invalid expression")
+        self.assertEqual(self.math.calls, 4)  # the success once, the failure every time
+        sandbox = CountingSandbox()
+        bot = ChatBot(memo=self.memo, sandbox=sandbox)
+        bot.get_bot_response("run code: x = 1")
+        bot.get_bot_response("run code: x = 1")
+        self.assertEqual(sandbox.calls, 2)
+
+    def test_concurrent_identical_messages_share_one_answer(self):
+        self.math.delay = 0.1
+        answers = []
+        threads = [threading.Thread(target=lambda: answers.append(self.bot.get_bot_response("solve: 2 + 2", SessionState())))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(answers, ["Math result: 4"] * 5)
+        self.assertEqual(self.math.calls, 1)
+        self.assertEqual(self.memo.stats()["coalesced"], 4)
+
 if __name__ == "__main__":
     unittest.main()
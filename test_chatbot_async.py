@@ -0,0 +1,91 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+import chatbot_http
+from benchmarks.mock_server import MockServer
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_http import AsyncHttpClient
+
+class TestAsyncChatBot(unittest.TestCase):
+    def setUp(self):
+        self.server = MockServer(latency=0.05).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def make_bot(self, client):
+        bot = ChatBot(search_cache=SearchCache(), async_http=client, pydocs=False)
+        bot.wikipedia_url = self.server.url + "/wiki/{}"
+        bot.python_docs_url = self.server.url + "/search.html?q={}"
+        return bot
+
+    def run_async(self, coro_factory):
+        async def main():
+            client = AsyncHttpClient(max_per_host=50, backoff_factor=0)
+            try:
+                return await coro_factory(client)
+            finally:
+                await client.aclose()
+        return asyncio.run(main())
+
+    def test_matches_sync_answers(self):
+        async def scenario(client):
+            bot = self.make_bot(client)
+            return [await bot.aget_bot_response(m) for m in
+                    ["hello", "search wikipedia for guido", "search python docs for json", "what is a list?", "explain again"]]
+        answers = self.run_async(scenario)
+        self.assertTrue(answers[0].startswith("Hello"))
+        self.assertIn("guido is a topic served by the local mock server", answers[1])
+        self.assertIn("Documentation for json", answers[2])
+        self.assertEqual(answers[3], answers[4])
+
+    def test_lookups_run_concurrently(self):
+        async def scenario(client):
+            bots = [self.make_bot(client) for _ in range(20)]
+            start = time.perf_counter()
+            answers = await asyncio.gather(*(b.aget_bot_response(f"search wikipedia for topic {i}") for i, b in enumerate(bots)))
+            return answers, time.perf_counter() - start
+        answers, elapsed = self.run_async(scenario)
+        self.assertTrue(all(a.startswith("Wikipedia:") for a in answers))
+        self.assertLess(elapsed, 20 * 0.05 / 2)
+
+    def test_identical_lookups_share_one_fetch(self):
+        async def scenario(client):
+            bot = self.make_bot(client)
+            return await asyncio.gather(*(bot.aget_bot_response("search wikipedia for same") for _ in range(10)))
+        answers = self.run_async(scenario)
+        self.assertEqual(len(set(answers)), 1)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_solve_does_not_block_event_loop(self):
+        async def scenario(client):
+            bot = self.make_bot(client)
+            gaps = []
+
+            async def ticker():
+                last = time.perf_counter()
+                while True:
+                    await asyncio.sleep(0.001)
+                    now = time.perf_counter()
+                    gaps.append(now - last)
+                    last = now
+
+            tick = asyncio.create_task(ticker())
+            await asyncio.sleep(0.01)
+            answer = await bot.aget_bot_response("solve: integrate(sin(x)**4*cos(x)**3, x)")
+            tick.cancel()
+            return answer, max(gaps)
+        answer, worst_gap = self.run_async(scenario)
+        self.assertTrue(answer.startswith("Math result:"))
+        self.assertLess(worst_gap, 0.2)
+
+    def test_without_aiohttp_falls_back_to_sync_client(self):
+        async def scenario(client):
+            return await self.make_bot(client).aget_bot_response("search wikipedia for fallback")
+        with mock.patch.object(chatbot_http, "aiohttp", None):
+            self.assertIn("fallback is a topic", self.run_async(scenario))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmarks import suite
+
+def results(**medians):
+    return {"metadata": {}, "benchmarks": {name: {"median": median} for name, median in medians.items()}}
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_compare_flags_slowdowns_above_threshold(self):
+        base = results(greeting=1.0, topic=1.0, search=1.0, gone=1.0)
+        new = results(greeting=1.05, topic=1.2, search=0.5, added=1.0)
+        statuses = {row[0]: row[4] for row in suite.compare(base, new, threshold=0.1)}
+        self.assertEqual(statuses, {"greeting": "same", "topic": "REGRESSION", "search": "faster",
+                                    "gone": "only in base", "added": "only in new"})
+
+    def test_run_saves_json_and_compare_exits_nonzero_on_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, "base.json")
+            self.assertEqual(suite.main(["run", "--quick", "-k", "intent.greeting", "-k", "gui.append", "-o", base]), 0)
+            with open(base) as f:
+                saved = json.load(f)
+            self.assertEqual(sorted(saved["benchmarks"]), ["gui.append", "intent.greeting"])
+            self.assertEqual(len(saved["benchmarks"]["gui.append"]["values"]), 3)
+            self.assertIn("python", saved["metadata"])
+            self.assertEqual(suite.main(["compare", base, base]), 0)
+            slower = os.path.join(tmp, "slower.json")
+            saved["benchmarks"]["intent.greeting"]["median"] *= 2
+            with open(slower, "w") as f:
+                json.dump(saved, f)
+            self.assertEqual(suite.main(["compare", base, slower]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
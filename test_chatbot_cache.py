@@ -0,0 +1,125 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from chatbot_cache import LRUCache, SQLiteCache, SearchCache, MISSING, cache_key
+from chatbot_core import ChatBot
+from test_helpers import FakeClock
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.cache = SearchCache(ttl=100, negative_ttl=10, memory=LRUCache(2, clock=self.clock))
+        self.fetches = 0
+
+    def fetcher(self, value, found):
+        def fetch():
+            self.fetches += 1
+            return value, found
+        return fetch
+
+    def test_key_normalization(self):
+        self.assertEqual(cache_key("wikipedia", " List   Comprehension "), cache_key("wikipedia", "list comprehension"))
+
+    def test_hits_and_ttl(self):
+        self.assertEqual(self.cache.get_or_fetch("a", self.fetcher("A", True)), "A")
+        self.assertEqual(self.cache.get_or_fetch("a", self.fetcher("A", True)), "A")
+        self.assertEqual(self.fetches, 1)
+        self.clock.now += 101
+        self.cache.get_or_fetch("a", self.fetcher("A", True))
+        self.assertEqual(self.fetches, 2)
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_negative_results_expire_sooner(self):
+        self.cache.get_or_fetch("missing", self.fetcher("nope", False))
+        self.clock.now += 5
+        self.cache.get_or_fetch("missing", self.fetcher("nope", False))
+        self.assertEqual(self.fetches, 1)
+        self.clock.now += 6
+        self.cache.get_or_fetch("missing", self.fetcher("nope", False))
+        self.assertEqual(self.fetches, 2)
+
+    def test_transient_failures_not_cached(self):
+        self.cache.get_or_fetch("down", self.fetcher("error", None))
+        self.cache.get_or_fetch("down", self.fetcher("error", None))
+        self.assertEqual(self.fetches, 2)
+
+    def test_lru_eviction(self):
+        for key in "abc":
+            self.cache.get_or_fetch(key, self.fetcher(key, True))
+        self.assertIs(self.cache.memory.get("a"), MISSING)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_contains_leaves_lru_order(self):
+        for key in "ab":
+            self.cache.get_or_fetch(key, self.fetcher(key, True))
+        self.assertIn("a", self.cache)
+        self.cache.get_or_fetch("c", self.fetcher("c", True))
+        self.assertNotIn("a", self.cache)  # still the least recently used
+        self.assertEqual(self.cache.stats()["hits"], 0)
+
+    def test_cancelled_leader_leaves_followers_waiting(self):
+        async def scenario():
+            release = asyncio.Event()
+
+            async def fetch():
+                self.fetches += 1
+                await release.wait()
+                return "V", True
+            leader = asyncio.create_task(self.cache.aget_or_fetch("k", fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(self.cache.aget_or_fetch("k", fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.sleep(0.01)
+            release.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+        self.assertEqual(asyncio.run(scenario()), "V")
+        self.assertEqual(self.fetches, 2)  # the follower fetched for itself
+
+    def test_concurrent_requests_share_fetch(self):
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            time.sleep(0.1)
+            self.fetches += 1
+            return "slow", True
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_fetch("k", slow_fetch)))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ["slow"] * 5)
+        self.assertEqual(self.fetches, 1)
+
+    def test_disk_tier_survives_restart(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            first = SearchCache(disk=SQLiteCache(path))
+            first.get_or_fetch("k", self.fetcher("V", True))
+            first.disk.close()
+            second = SearchCache(disk=SQLiteCache(path))
+            self.assertEqual(second.get_or_fetch("k", self.fetcher("other", True)), "V")
+            self.assertEqual(second.stats()["disk_hits"], 1)
+            second.disk.close()
+        finally:
+            os.unlink(path)
+
+    def test_chatbot_uses_cache(self):
+        bot = ChatBot(search_cache=SearchCache())
+        bot._fetch = lambda source, topic: (f"Wikipedia: {topic}...", True)
+        bot.get_bot_response("search wikipedia for Python")
+        bot._fetch = lambda source, topic: self.fail("should have been cached")
+        self.assertEqual(bot.get_bot_response("search wikipedia for  python"), "Wikipedia: python...")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from chatbot_db import ChatDatabase, ConnectionPool
+
+class TestChatDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = ChatDatabase(os.path.join(self.tmp.name, "chatbot.db"), pool_size=2)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_writes_are_batched_and_searchable(self):
+        futures = [self.db.add_fact(f"key{i}", f"value {i}") for i in range(500)]
+        futures.append(self.db.add_code_example("python", "for i in range(3): print(i)", "a for loop"))
+        self.db.flush()
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertEqual(self.db.stats()["writes"], 501)
+        self.assertLess(self.db.stats()["batches"], 501)
+        self.assertEqual(self.db.find_fact("key42"), "value 42")
+        self.assertEqual(self.db.find_code_example("loop")[0], "for i in range(3): print(i)")
+        self.assertEqual(self.db.get_code_example(futures[-1].result())[1], "a for loop")
+
+    def test_version_follows_facts_and_code_not_the_log(self):
+        before = self.db.version()
+        self.db.log_message("s1", "user", "hello")
+        self.db.flush()
+        self.assertEqual(self.db.version(), before)
+        self.db.add_fact("gil", "global interpreter lock")
+        self.db.flush()
+        self.assertNotEqual(self.db.version(), before)
+
+    def test_failed_write_leaves_the_rest_of_its_batch(self):
+        bad = self.db.writer.submit("INSERT INTO missing_table VALUES (?)", (1,))
+        good = self.db.add_fact("gil", "global interpreter lock")
+        self.db.flush()
+        with self.assertRaises(sqlite3.OperationalError):
+            bad.result()
+        self.assertIsNotNone(good.result())
+        self.assertEqual(self.db.get_fact("gil"), "global interpreter lock")
+        self.assertEqual(self.db.stats()["write_errors"], 1)
+
+    def test_conversation_log(self):
+        for i in range(5):
+            self.db.log_message("alice", "user", f"message {i}")
+            self.db.log_message("bob", "user", "hi")
+        self.db.flush()
+        rows = self.db.conversation("alice", limit=3)
+        self.assertEqual([message for _, message, _ in rows], ["message 2", "message 3", "message 4"])
+        self.assertEqual(len(self.db.conversation("bob")), 5)
+
+    def test_concurrent_reads_share_a_bounded_pool(self):
+        self.db.add_fact("loop", "repeats code")
+        self.db.flush()
+        results, errors = [], []
+
+        def read():
+            try:
+                for _ in range(50):
+                    results.append(self.db.find_fact("loop"))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, ["repeats code"] * 400)
+        self.assertLessEqual(self.db.stats()["connections"], 2)
+
+class TestConnectionPool(unittest.TestCase):
+    def test_reuses_and_blocks_at_size(self):
+        made, borrowed = [], []
+
+        def connect():
+            made.append(sqlite3.connect(":memory:", check_same_thread=False))
+            return made[-1]
+
+        def borrow():
+            with pool.connection() as conn:
+                borrowed.append(conn)
+        pool = ConnectionPool(connect, size=1)
+        with pool.connection():
+            waiter = threading.Thread(target=borrow)
+            waiter.start()
+            waiter.join(0.1)
+            self.assertEqual(borrowed, [])  # waiting for the only connection
+        waiter.join(1)
+        self.assertEqual(borrowed, made)
+        self.assertEqual(len(made), 1)
+        pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
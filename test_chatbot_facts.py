@@ -0,0 +1,64 @@
+import sqlite3
+import unittest
+from unittest import mock
+from chatbot_facts import FactStore, match_query
+
+class TestFactStore(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.store = FactStore(self.conn)
+
+    def test_best_match_wins(self):
+        self.store.add_fact("decorator factory pattern", "returns a decorator")
+        self.store.add_fact("decorator", "wraps a function")
+        self.assertEqual(self.store.find_fact("decorator"), "wraps a function")
+        self.assertEqual(self.store.find_fact("decor"), "wraps a function")
+        self.assertEqual(self.store.find_fact("factory decorator"), "returns a decorator")
+        self.assertIsNone(self.store.find_fact("metaclass"))
+
+    def test_triggers_keep_index_current(self):
+        self.store.add_fact("gil", "global interpreter lock")
+        self.store.add_fact("gil", "still the global interpreter lock")
+        self.assertEqual(self.store.find_fact("gil"), "still the global interpreter lock")
+        with self.conn:
+            self.conn.execute("UPDATE facts SET key = 'gvl' WHERE key = 'gil'")
+        self.assertIsNone(self.store.find_fact("gil"))
+        with self.conn:
+            self.conn.execute("DELETE FROM facts")
+        self.assertIsNone(self.store.find_fact("gvl"))
+
+    def test_code_examples(self):
+        self.store.add_code_example("python", "print(1)", "prints a number")
+        self.store.add_code_example("rust", "println!(\"1\")", "prints a number with a macro")
+        self.assertEqual(self.store.find_code_example("macro"), ('println!("1")', "prints a number with a macro"))
+        self.assertEqual(self.store.find_code_example("python")[0], "print(1)")
+
+    def test_operators_in_input_are_literal(self):
+        self.store.add_fact("and or not", "boolean operators")
+        for text in ['"', "a OR b*", "NEAR(x y)", "key:value", "-"]:
+            self.assertIsNone(self.store.find_fact(text))
+        self.assertIsNone(match_query("?!", ["key"]))
+
+    def test_bulk_load_and_existing_database(self):
+        count = self.store.bulk_load("facts", ((f"term {i}", f"meaning {i}") for i in range(5000)))
+        self.assertEqual(count, 5000)
+        self.assertEqual(self.store.find_fact("term 4321"), "meaning 4321")
+        self.store.add_fact("term new", "added after the load")
+        self.assertEqual(self.store.find_fact("term new"), "added after the load")
+        # A second store on the same database reuses the index without rebuilding it
+        self.assertEqual(FactStore(self.conn).find_fact("term 17"), "meaning 17")
+
+    def test_indexes_rows_from_before_the_index(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE facts (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO facts VALUES ('walrus', ':= operator')")
+        self.assertEqual(FactStore(conn).find_fact("walrus"), ":= operator")
+
+    def test_falls_back_to_like_without_fts5(self):
+        with mock.patch.object(FactStore, "_create_indexes", return_value=False):
+            store = FactStore(sqlite3.connect(":memory:"))
+        store.add_fact("lambda", "anonymous function")
+        self.assertEqual(store.find_fact("lamb"), "anonymous function")
+
+if __name__ == "__main__":
+    unittest.main()
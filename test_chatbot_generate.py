@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import unittest
+from benchmarks.stub_model import StubModel
+from chatbot_generate import GenerationWorker, ModelUnavailable
+
+class TestGenerationWorker(unittest.TestCase):
+    def test_loads_lazily_on_first_prompt(self):
+        loads = []
+        worker = GenerationWorker(lambda: loads.append(1) or StubModel(new_tokens=2))
+        self.assertEqual(loads, [])
+        self.assertTrue(worker.generate("hello", timeout=5).startswith("hello "))
+        self.assertEqual(loads, [1])
+        self.assertTrue(worker.ready)
+        worker.close()
+
+    def test_concurrent_prompts_are_batched(self):
+        model = StubModel(new_tokens=5)
+        worker = GenerationWorker(lambda: model, max_batch_size=4, max_wait=0.05)
+        worker.warm()
+        futures = [worker.submit(f"prompt {i}") for i in range(10)]
+        texts = [f.result(timeout=5) for f in futures]
+        self.assertEqual([t.split(" ", 2)[:2] for t in texts], [["prompt", str(i)] for i in range(10)])
+        self.assertLessEqual(max(len(b) for b in model.batches), 4)
+        self.assertLess(len(model.batches), 10)
+        worker.close()
+
+    def test_cancelled_prompts_are_skipped(self):
+        model = StubModel(new_tokens=1)
+        release = threading.Event()
+        worker = GenerationWorker(lambda: release.wait(5) and model, max_wait=0.0)
+        first, second = worker.submit("keep"), worker.submit("drop")
+        second.cancel()
+        release.set()
+        self.assertTrue(first.result(timeout=5).startswith("keep"))
+        time.sleep(0.05)
+        self.assertNotIn("drop", [p for b in model.batches for p in b])
+        worker.close()
+
+    def test_load_failure_is_reported(self):
+        def broken():
+            raise ImportError("No module named 'transformers'")
+        worker = GenerationWorker(broken)
+        with self.assertRaisesRegex(ModelUnavailable, "transformers"):
+            worker.generate("hello", timeout=5)
+        worker.close()
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.model = StubModel(step_seconds=0.01, row_seconds=0.0, new_tokens=10)
+        self.worker = GenerationWorker(lambda: self.model, max_wait=0.0)
+
+    def tearDown(self):
+        self.worker.close()
+
+    def test_chunks_arrive_before_generation_ends(self):
+        stream = self.worker.stream("hi there")
+        chunks = list(stream)
+        self.assertEqual(len(chunks), 10)
+        self.assertTrue(chunks[0].startswith("hi there "))
+        self.assertEqual("".join(chunks), stream.future.result())
+        self.assertLess(stream.first_text_at, time.perf_counter() - 0.05)
+
+    def test_streams_and_plain_prompts_share_a_batch(self):
+        worker = GenerationWorker(lambda: self.model, max_wait=0.05)
+        plain = worker.submit("plain")
+        stream = worker.stream("streamed")
+        self.assertEqual("".join(stream), stream.future.result())
+        self.assertTrue(plain.result(timeout=5).startswith("plain "))
+        self.assertEqual(self.model.batches, [["plain", "streamed"]])
+        worker.close()
+
+    def test_astream(self):
+        async def collect():
+            return [chunk async for chunk in self.worker.astream("async")]
+        chunks = asyncio.run(collect())
+        self.assertTrue("".join(chunks).startswith("async python is"))
+
+    def test_stream_reports_load_failure(self):
+        def broken():
+            raise ImportError("no torch")
+        worker = GenerationWorker(broken)
+        with self.assertRaises(ModelUnavailable):
+            list(worker.stream("hello"))
+        worker.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from chatbot_html import first_element
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+PAGES = [
+    "<html><body><table><tr><td>box</td></tr></table><p><b>Python</b> is a <a href='#'>language</a> &amp; more.</p><p>2nd</p></body></html>",
+    "<p>a <b>b</b> &amp; c<p>nested</p> tail</p><p>next</p>",
+    "<div><p>x<br>y<script>var a = '<p>';</script><!-- note --> z</p></div>",
+    "<p>unterminated &eacute;t&eacute; paragraph",
+    "<div>no paragraphs here</div>",
+]
+
+HITS = [
+    "<ul><li class='search-hit extra'><a href='x'>str.join</a>\n  &mdash; Return a <span> string </span></li><li class='search-hit'>2</li></ul>",
+    "<ul><li>plain</li><li class=\"result search-hit\"><ul><li>inner</li></ul> outer </li></ul>",
+    "<ul><li class='hit'>none</li></ul>",
+]
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@unittest.skipIf(BeautifulSoup is None, "bs4 not installed")
+class TestStreamingExtraction(unittest.TestCase):
+    def test_first_paragraph_matches_beautifulsoup(self):
+        for page in PAGES:
+            p = BeautifulSoup(page, "html.parser").find("p")
+            for size in (1, 3, 7, len(page)):
+                parser = first_element(chunked(page, size), "p")
+                self.assertEqual(parser.found, p is not None, page)
+                if p is not None:
+                    self.assertEqual(parser.text, p.text, (page, size))
+
+    def test_first_search_hit_matches_beautifulsoup(self):
+        for page in HITS:
+            hits = BeautifulSoup(page, "html.parser").find_all("li", class_="search-hit")
+            for size in (1, 5, len(page)):
+                parser = first_element(chunked(page, size), "li", "search-hit")
+                self.assertEqual(parser.found, bool(hits), page)
+                if hits:
+                    self.assertEqual(parser.stripped_text, hits[0].get_text(strip=True), (page, size))
+
+    def test_stops_after_first_match(self):
+        consumed = []
+
+        def chunks():
+            for chunk in ["<p>first</p>", "<p>second</p>", "<div>" * 1000]:
+                consumed.append(chunk)
+                yield chunk
+
+        self.assertEqual(first_element(chunks(), "p").text, "first")
+        self.assertEqual(len(consumed), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+import unittest
+from benchmarks.mock_server import MockServer
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_http import HttpClient
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = MockServer().start()
+        self.client = HttpClient(backoff_factor=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_keep_alive_reuses_connection(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.server.url + "/wiki/Python").status_code, 200)
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retries_transient_errors(self):
+        self.server.fail(2)
+        self.assertEqual(self.client.get(self.server.url + "/wiki/Python").status_code, 200)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_retries(self):
+        self.server.fail(5)
+        self.assertEqual(self.client.get(self.server.url + "/wiki/Python").status_code, 503)
+
+    def test_chatbot_fetches_through_client(self):
+        bot = ChatBot(search_cache=SearchCache(), http=self.client, pydocs=False)
+        bot.wikipedia_url = self.server.url + "/wiki/{}"
+        bot.python_docs_url = self.server.url + "/search.html?q={}"
+        self.assertIn("served by the local mock server", bot.get_bot_response("search wikipedia for guido"))
+        self.assertEqual(bot.get_bot_response("search wikipedia for missing page"), "Couldn't find that on Wikipedia.")
+        self.assertIn("Documentation for asyncio", bot.get_bot_response("search python docs for asyncio"))
+        self.assertEqual(self.server.connections, 1)
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_dependencies_load_on_demand(self):
+        probe = (
+            "import sys, chatbot_core, chatbot_facts, chatbot_generate, chatbot_retrieval; "
+            "print(' '.join(m for m in ('requests', 'aiohttp', 'sympy', 'bs4', 'transformers', 'numpy') if m in sys.modules))"
+        )
+        loaded = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(loaded.strip(), "")
+
+if __name__ == "__main__":
+    unittest.main()
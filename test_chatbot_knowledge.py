@@ -0,0 +1,51 @@
+import gc
+import json
+import os
+import tempfile
+import unittest
+import weakref
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_knowledge import KnowledgeBase, default_knowledge_base
+
+class TestKnowledgeBase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"topics": [{"keyword": "generator", "answer": "A generator yields values lazily."}]}, f)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_loaded_lazily_once(self):
+        kb = KnowledgeBase(self.path)
+        self.assertIsNone(kb._index)
+        self.assertEqual(kb["generator"], "A generator yields values lazily.")
+        index = kb.index
+        self.assertIs(kb.index, index)
+        with self.assertRaises(TypeError):
+            index["generator"] = "changed"
+
+    def test_bots_share_default(self):
+        self.assertIs(ChatBot().knowledge, ChatBot().knowledge)
+        self.assertIs(ChatBot().knowledge, default_knowledge_base())
+
+    def test_custom_knowledge_base(self):
+        bot = ChatBot(KnowledgeBase(self.path))
+        self.assertIn("lazily", bot.get_bot_response("what is a generator?"))
+        self.assertIn("lazily", bot.get_bot_response("explain again"))
+
+    def test_router_is_dropped_with_its_knowledge_base(self):
+        kb = KnowledgeBase(self.path)
+        memo = SearchCache(ttl=float("inf"))
+        ChatBot(kb, memo=memo).get_bot_response("something about yielding lazily")  # router, retriever and memo
+        self.assertEqual(len(memo.memory), 1)
+        ref = weakref.ref(kb)
+        del kb
+        gc.collect()
+        self.assertIsNone(ref())
+        ChatBot(memo=memo).get_bot_response("hello")
+        self.assertEqual(len(memo.memory), 1)  # the next miss dropped the collected base's answers
+
+if __name__ == "__main__":
+    unittest.main()
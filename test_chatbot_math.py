@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+import sympy
+from chatbot_core import ChatBot
+from chatbot_math import MathEngine, MathError, evaluate_arithmetic, EVALUATE, SOLVE, SIMPLIFY, DIFFERENTIATE
+from chatbot_sandbox import SandboxPool
+from chatbot_scheduler import COMPUTE
+
+BIG_PRODUCT = "2**4000*2**4000*2**4000*2**4000"  # each power is small enough; the product is not
+DEEP = ["+".join(["1"] * 3000), "-" * 5000 + "1"]  # too deep for ast.parse or a recursive walk
+
+class TestArithmeticFastPath(unittest.TestCase):
+    def test_matches_sympy(self):
+        for expr in ["2+2", "10/4", "-7 % 3", "7//2", "2^10 + 3", "(1/3)**-2", "2**-3", "-(5-8)*4", "0**0", "3/6*4"]:
+            self.assertEqual(evaluate_arithmetic(expr), str(sympy.sympify(expr)), expr)
+
+    def test_leaves_the_rest_to_sympy(self):
+        for expr in ["0.1+0.2", "2**(1/2)", "1/0", "x+1", "10**10**10", "5!", "sqrt(4)", "True + 1"]:
+            self.assertIsNone(evaluate_arithmetic(expr), expr)
+
+    def test_big_results_are_left_to_sympy(self):
+        big = "(2**4000*2**4000*2**4000)"
+        for expr in [BIG_PRODUCT, f"{big} // 3", f"{big} % ({big} + 1)", "1" * 5000, *DEEP]:
+            self.assertIsNone(evaluate_arithmetic(expr), expr)
+
+
+class TestMathEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SandboxPool(size=1, cpu_seconds=1, wall_seconds=10, memory_mb=512, handlers="chatbot_math")
+        cls.engine = MathEngine(pool=cls.pool)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_commands(self):
+        self.assertEqual(self.engine.compute(SOLVE, "x**2 - 4 = 0"), "x = -2; x = 2")
+        self.assertEqual(self.engine.compute(SIMPLIFY, "sin(x)**2 + cos(x)**2"), "1")
+        self.assertEqual(self.engine.compute(DIFFERENTIATE, "x**3 + 2*x"), "3*x**2 + 2")
+        self.assertEqual(self.engine.compute(DIFFERENTIATE, "x**2*y wrt y"), "x**2")
+        self.assertEqual(self.engine.compute(EVALUATE, "0.5 + 1"), "1.50000000000000")
+
+    def test_pathological_input_is_stopped(self):
+        with self.assertRaisesRegex(MathError, "CPU time"):
+            self.engine.compute(SOLVE, "10**10**10")
+        self.assertEqual(self.engine.compute(SOLVE, "x + 1 = 3"), "x = 2")
+
+    def test_results_are_cached_and_errors_are_not(self):
+        before = self.engine.stats()
+        for _ in range(3):
+            self.assertEqual(self.engine.compute(SOLVE, "sqrt(8)"), "2*sqrt(2)")
+            self.assertEqual(self.engine.compute(SOLVE, "2 + 2"), "4")
+            self.assertRaises(MathError, self.engine.compute, SOLVE, "x +* 2")
+        after = self.engine.stats()
+        self.assertEqual(after["hits"] - before["hits"], 2)
+        self.assertEqual(after["misses"] - before["misses"], 4)
+        self.assertEqual(after["fast_path"] - before["fast_path"], 3)
+
+    def test_async_and_chatbot(self):
+        bot = ChatBot(math=self.engine)
+        self.assertEqual(bot.get_bot_response("solve: 2**10 + 3"), "Math result: 1027")
+        self.assertEqual(bot.get_bot_response("differentiate: x**2"), "Math result: 2*x")
+        self.assertTrue(bot.get_bot_response("solve: x +* 2").startswith("Error solving math:"))
+        answer = asyncio.run(bot.aget_bot_response("simplify: (x**2 - 1)/(x - 1)"))
+        self.assertEqual(answer, "Math result: x + 1")
+
+    def test_big_products_go_to_the_worker(self):
+        bot = ChatBot(math=self.engine, memo=False)
+        self.assertEqual(bot.cost(f"solve: {BIG_PRODUCT}"), COMPUTE)
+        for answer in (bot.get_bot_response(f"solve: {BIG_PRODUCT}"),
+                       asyncio.run(bot.aget_bot_response(f"solve: {BIG_PRODUCT}"))):
+            self.assertTrue(answer.startswith(("Math result:", "Error solving math:")), answer[:80])
+        # chatbotV2's operator branch, which only catches MathError
+        try:
+            self.engine.compute(EVALUATE, BIG_PRODUCT)
+        except MathError:
+            pass
+
+    def test_deep_expressions_are_answered(self):
+        bot = ChatBot(math=self.engine, memo=False)
+        for expr in DEEP:
+            self.assertEqual(bot.cost(f"solve: {expr}"), COMPUTE)
+            answer = bot.get_bot_response(f"solve: {expr}")
+            self.assertTrue(answer.startswith(("Math result:", "Error solving math:")), answer[:80])
+
+if __name__ == "__main__":
+    unittest.main()
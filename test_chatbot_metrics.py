@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from benchmarks.mock_server import MockServer
+from chatbot_cache import SearchCache
+from chatbot_core import ChatBot
+from chatbot_metrics import METRICS, Histogram, SamplingProfiler
+from chatbot_retrieval import available as retrieval_available
+
+class FakeSandbox:
+    def run(self, code):
+        return {"ok": True, "locals": {"x": 1}, "output": ""}
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0, float("inf")))
+        for seconds in [0.005] * 90 + [0.05] * 9 + [5.0]:
+            histogram.observe(seconds)
+        self.assertEqual(histogram.count, 100)
+        self.assertLess(histogram.quantile(0.5), 0.01)
+        self.assertTrue(0.01 < histogram.quantile(0.95) <= 0.1)
+        self.assertEqual(histogram.quantile(1.0), 1.0)  # the +Inf bucket reports its lower bound
+        self.assertIsNone(Histogram().quantile(0.5))
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        METRICS.reset()
+
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_disabled_records_nothing(self):
+        ChatBot().get_bot_response("hello")
+        self.assertEqual(METRICS.to_json(), {"requests": {}, "stages": {}, "errors": 0})
+
+    def test_intents_and_stages(self):
+        METRICS.enable()
+        with MockServer() as server:
+            bot = ChatBot(search_cache=SearchCache(), sandbox=FakeSandbox())
+            bot.wikipedia_url = server.url + "/wiki/{}"
+            for message in ["hello", "what is a list?", "explain again", "what is a list?", "run code: x = 1",
+                            "search wikipedia for guido", "gibberish"]:
+                bot.get_bot_response(message)
+            asyncio.run(bot.aget_bot_response("hello"))
+        metrics = METRICS.to_json()
+        counts = {intent: h["count"] for intent, h in metrics["requests"].items()}
+        self.assertEqual(counts, {"greeting": 2, "topic": 2, "explain_again": 1, "run_code": 1,
+                                  "search_wikipedia": 1, "fallback": 1})
+        stages = {"exec": 1, "fetch": 1, "parse": 1}
+        if retrieval_available():
+            stages["retrieval"] = 1  # "gibberish" was looked up before falling back
+        self.assertEqual({stage: h["count"] for stage, h in metrics["stages"].items()}, stages)
+        self.assertGreater(metrics["stages"]["parse"]["sum"], 0)
+
+    def test_prometheus_export(self):
+        METRICS.enable()
+        bot = ChatBot()
+        bot.get_bot_response("hello")
+        bot.get_bot_response("hi there")
+        text = METRICS.to_prometheus()
+        self.assertIn("# TYPE chatbot_request_seconds histogram", text)
+        self.assertIn('chatbot_request_seconds_bucket{intent="greeting",le="+Inf"} 2', text)
+        self.assertIn('chatbot_request_seconds_count{intent="greeting"} 2', text)
+        self.assertIn("chatbot_request_errors_total 0", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_sampling_profilers(self):
+        bot = ChatBot()
+        reports = {}
+        for kind in ("cprofile", "tracemalloc"):
+            profiler = SamplingProfiler(every=3, kind=kind)
+            METRICS.enable(profiler=profiler)
+            for _ in range(9):
+                self.assertTrue(bot.get_bot_response("what is a list?"))
+            self.assertEqual(profiler.samples, 3)
+            reports[kind] = profiler.report()
+            self.assertIn("3 samples", reports[kind])
+        self.assertIn("_answer", reports["cprofile"])
+        self.assertEqual(METRICS.to_json()["requests"]["topic"]["count"], 18)
+        with self.assertRaises(ValueError):
+            SamplingProfiler(kind="perf")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import chatbot_pydocs
+from chatbot_core import ChatBot
+from chatbot_pydocs import DocsIndex, build, entries_from_source, terms
+from chatbot_scheduler import CHEAP
+
+SOURCES = {
+    "shapes/__init__.py": '"""Shapes and their areas."""\n',
+    "shapes/circle.py": '''"""Circles."""
+class Circle:
+    """A round shape.
+
+    More detail that isn't part of the summary.
+    """
+    def __init__(self, radius):
+        self.radius = radius
+
+    def area(self):
+        """Return the area of the circle."""
+
+    def _private(self):
+        """Not indexed."""
+''',
+    "textutil.py": '''"""Helpers for text."""
+def split_words(text, sep=None):
+    """Split text into a list of words."""
+
+def area(text):
+    """Area taken by text on screen."""
+''',
+    "_hidden.py": '"""A private module."""\n',
+}
+
+class TestDocsIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "lib")
+        for path, source in SOURCES.items():
+            os.makedirs(os.path.dirname(os.path.join(self.root, path)), exist_ok=True)
+            with open(os.path.join(self.root, path), "w") as f:
+                f.write(source)
+        self.dir = os.path.join(self.tmp.name, "index")
+        self.index = None
+
+    def tearDown(self):
+        if self.index is not None:
+            self.index.close()
+        self.tmp.cleanup()
+
+    def open(self):
+        if self.index is not None:
+            self.index.close()
+        self.index = DocsIndex(self.dir)
+        return self.index
+
+    def test_entries_from_source(self):
+        entries = entries_from_source("shapes.circle", SOURCES["shapes/circle.py"])
+        self.assertEqual(entries, [
+            ["shapes.circle", "", "Circles."],
+            ["shapes.circle.Circle", "(radius)", "A round shape."],
+            ["shapes.circle.Circle.area", "()", "Return the area of the circle."],
+        ])
+        # Names a module takes from a C accelerator are documented too
+        self.assertIn("collections.deque", [e[0] for e in entries_from_source("collections", "from _collections import deque")])
+        self.assertEqual(terms("os.path split_words"), ["os.path", "os", "path", "split_words", "split", "words"])
+
+    def test_search(self):
+        self.assertEqual(build(self.dir, self.root), (7, 3))
+        index = self.open()
+        self.assertEqual(index.search("how do i split words")[0].name, "textutil.split_words")
+        self.assertEqual(index.search("split_words")[0].signature, "(text, sep=None)")
+        self.assertEqual(index.search("shapes.circle.Circle.area")[0].name, "shapes.circle.Circle.area")
+        self.assertEqual(index.search("circle area")[0].name, "shapes.circle.Circle.area")
+        self.assertEqual(index.search("shapes")[0].summary, "Shapes and their areas.")
+        self.assertEqual(index.search("nothing matches this"), [])
+        self.assertNotIn("_hidden", [index.entry(i)[0] for i in range(index.count)])
+
+    def test_rebuild_rereads_only_changed_files(self):
+        build(self.dir, self.root)
+        self.assertEqual(build(self.dir, self.root), (7, 0))
+        with open(os.path.join(self.root, "textutil.py"), "a") as f:
+            f.write('\ndef join_words(words):\n    """Join words with spaces."""\n')
+        self.assertEqual(build(self.dir, self.root), (8, 1))
+        self.assertEqual(self.open().search("join words")[0].name, "textutil.join_words")
+        self.assertTrue(self.index.is_current())
+        meta_path = os.path.join(self.dir, "meta.json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(meta_path, "w") as f:
+            json.dump(dict(meta, python="2.7.18"), f)
+        self.assertFalse(self.open().is_current())
+
+    def test_failed_background_build_waits_before_retrying(self):
+        calls = []
+
+        def failing_build(directory):
+            calls.append(directory)
+            raise OSError("read-only file system")
+        with mock.patch.object(chatbot_pydocs, "build", failing_build), \
+                mock.patch.object(chatbot_pydocs, "_default", None), \
+                mock.patch.object(chatbot_pydocs, "_building", None), \
+                mock.patch.object(chatbot_pydocs, "_failed_at", None), \
+                mock.patch("threading.excepthook"):
+            for _ in range(3):
+                self.assertIsNone(chatbot_pydocs.default_index(self.dir))
+                chatbot_pydocs._building.join()
+            self.assertEqual(len(calls), 1)
+            chatbot_pydocs._failed_at -= chatbot_pydocs.BUILD_RETRY_SECONDS
+            chatbot_pydocs.default_index(self.dir)
+            chatbot_pydocs._building.join()
+            self.assertEqual(len(calls), 2)
+
+    def test_chatbot_answers_offline(self):
+        build(self.dir, self.root)
+        bot = ChatBot(pydocs=self.open())
+        self.assertEqual(bot.cost("search python docs for split words"), CHEAP)  # no network, no search lane
+        self.assertEqual(bot.get_bot_response("search python docs for split words"),
+                         "Python Docs: textutil.split_words(text, sep=None): Split text into a list of words.")
+
+if __name__ == "__main__":
+    unittest.main()
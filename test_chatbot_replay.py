@@ -0,0 +1,75 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from chatbot_core import ChatBot
+from chatbot_replay import main, replay
+
+LOG = [
+    {"session_id": "a", "message": "what is a list?"},
+    {"session_id": "b", "message": "what is a loop?"},
+    {"session_id": "a", "message": "explain again"},
+    {"session_id": "b", "message": "explain again"},
+    {"session_id": "c", "message": "hello"},
+]
+
+class TestBatchResponses(unittest.TestCase):
+    def test_batch_keeps_order_and_sessions(self):
+        bot = ChatBot()
+        first, second = bot.session, ChatBot().session
+        responses = bot.get_bot_responses([
+            "what is a list?", (second, "what is a loop?"), "explain again", (second, "explain again"),
+        ])
+        self.assertEqual(responses[0], responses[2])
+        self.assertEqual(responses[1], responses[3])
+        self.assertNotEqual(responses[0], responses[1])
+        self.assertEqual((first.last_topic, second.last_topic), ("list", "loop"))
+
+class TestReplay(unittest.TestCase):
+    def run_replay(self, lines, **kwargs):
+        out = []
+        stats = replay(lines, out.append, **kwargs)
+        return out, stats
+
+    def check(self, out):
+        self.assertEqual([r["index"] for r in out], list(range(len(LOG))))
+        self.assertEqual([r["message"] for r in out], [r["message"] for r in LOG])
+        self.assertEqual(out[0]["response"], out[2]["response"])
+        self.assertEqual(out[1]["response"], out[3]["response"])
+        self.assertNotEqual(out[0]["response"], out[1]["response"])
+        self.assertTrue(out[4]["response"].startswith("Hello"))
+        self.assertTrue(all(r["latency_ms"] >= 0 for r in out))
+
+    def test_in_process(self):
+        out, stats = self.run_replay([json.dumps(r) for r in LOG], workers=0)
+        self.check(out)
+        self.assertEqual((stats.records, stats.errors), (5, 0))
+
+    def test_worker_processes_keep_session_order(self):
+        # A small window forces the input to wait on the output
+        out, _ = self.run_replay([json.dumps(r) for r in LOG], workers=2, window=2)
+        self.check(out)
+
+    def test_bad_lines_keep_their_place(self):
+        lines = [json.dumps(LOG[4]), "not json", "", json.dumps({"session_id": "x"}), json.dumps(LOG[4])]
+        out, stats = self.run_replay(lines, workers=2)
+        self.assertEqual([r["index"] for r in out], [0, 1, 2, 3])
+        self.assertIn("invalid JSON", out[1]["error"])
+        self.assertIn("message", out[2]["error"])
+        self.assertEqual(stats.errors, 2)
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source, target = os.path.join(tmp, "in.jsonl"), os.path.join(tmp, "out.jsonl")
+            with open(source, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r) + "\n" for r in LOG)
+            with mock.patch("sys.stderr", io.StringIO()) as stderr:
+                main([source, "-o", target, "--workers", "0"])
+            with open(target, encoding="utf-8") as f:
+                self.check([json.loads(line) for line in f])
+            self.assertIn("5 records (0 errors)", stderr.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from chatbot_core import ChatBot, FALLBACK_RESPONSE
+from chatbot_facts import FactStore
+from chatbot_retrieval import VectorIndex, available, chatbot_documents, open_or_build
+
+DOCS = [
+    ("loop", "A loop repeats code, like a for loop over range(5)."),
+    ("dictionary", "A dictionary stores key-value pairs."),
+    ("exception", "Exceptions handle errors with try and except."),
+    ("class", "A class is a blueprint for creating objects."),
+]
+
+@unittest.skipUnless(available(), "numpy is not installed")
+class TestVectorIndex(unittest.TestCase):
+    def test_closest_document_ranks_first(self):
+        index = VectorIndex.build(DOCS)
+        self.assertEqual(index.search("store key value pairs", k=1)[0][1], "dictionary")
+        self.assertEqual(index.search("handle erors with try", k=1)[0][1], "exception")  # trigrams survive the typo
+        hits = index.search("blueprint for objects", k=10)
+        self.assertEqual(len(hits), 4)
+        self.assertEqual([score for score, _ in hits], sorted((score for score, _ in hits), reverse=True))
+        self.assertEqual([h[0][1] for h in index.search_many(["repeat code", "a blueprint"], k=1)], ["loop", "class"])
+        self.assertEqual(index.search("", k=1)[0][0], 0.0)
+
+    def test_saved_index_is_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index")
+            built = VectorIndex.build(DOCS, note="test")
+            built.save(path)
+            index = VectorIndex.open(path)
+            try:
+                self.assertEqual(type(index.matrix).__name__, "memmap")
+                self.assertEqual(index.meta["note"], "test")
+                self.assertEqual(len(index), 4)
+                self.assertEqual(index.search("store key value pairs", k=2), built.search("store key value pairs", k=2))
+            finally:
+                index.close()
+
+    def test_open_or_build_rebuilds_when_sources_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path, source = os.path.join(tmp, "index"), os.path.join(tmp, "source.txt")
+            with open(source, "w") as f:
+                f.write("v1")
+            builds = []
+
+            def docs():
+                builds.append(1)
+                return iter(DOCS)
+            open_or_build(path, docs, [source]).close()
+            open_or_build(path, docs, [source]).close()
+            self.assertEqual(len(builds), 1)
+            os.utime(source, (time.time() + 10, time.time() + 10))
+            open_or_build(path, docs, [source]).close()
+            self.assertEqual(len(builds), 2)
+            open_or_build(path, docs, [source], [[4, 4]]).close()
+            open_or_build(path, docs, [source], [[4, 4]]).close()
+            self.assertEqual(len(builds), 3)
+
+    def test_corpus_of_topics_facts_and_code(self):
+        store = FactStore(sqlite3.connect(":memory:"))
+        store.add_fact("gil", "The global interpreter lock lets one thread run bytecode at a time.")
+        store.add_code_example("python", "with open(p) as f: data = f.read()", "read a file with a context manager")
+        index = VectorIndex.build(chatbot_documents(dict(DOCS), store))
+        self.assertEqual(index.search("interpreter lock and threads", k=1)[0][1], "fact:gil")
+        self.assertEqual(index.search("how to read a file", k=1)[0][1], "code:1")
+        self.assertEqual(index.search("repeat code", k=1)[0][1], "topic:loop")
+        self.assertEqual(store.get_code_example(1)[1], "read a file with a context manager")
+
+@unittest.skipUnless(available(), "numpy is not installed")
+class TestRetrievalFallback(unittest.TestCase):
+    def test_near_miss_answers_with_closest_topic(self):
+        bot = ChatBot()
+        response = bot.get_bot_response("how do i store key value pairs?")
+        self.assertIn("dictionary", response)
+        self.assertEqual(bot.last_topic, "dictionary")
+        self.assertIn("dictionary", bot.get_bot_response("explain again"))
+        self.assertEqual(bot.get_bot_response("what's up?"), FALLBACK_RESPONSE)
+
+if __name__ == "__main__":
+    unittest.main()
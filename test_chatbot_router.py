@@ -0,0 +1,78 @@
+import unittest
+from chatbot_core import TOPICS, default_router
+from chatbot_fuzzy import KeywordIndex, SymSpellIndex, osa_distance
+from chatbot_router import Route, GREETING, TOPIC, SEARCH_WIKIPEDIA, SOLVE, EXPLAIN_AGAIN, FALLBACK
+
+class TestIntentRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = default_router()
+
+    def test_greeting_wins(self):
+        self.assertEqual(self.router.route("hello, what is a list?"), Route(GREETING, None))
+
+    def test_topic_order_not_position(self):
+        # "list" comes before "comprehension" in TOPICS, as in the old dict loop
+        self.assertEqual(self.router.route("explain comprehension of a list"), Route(TOPIC, "list"))
+
+    def test_search_prefix_beats_topic(self):
+        route = self.router.route("search wikipedia for loop")
+        self.assertEqual(route.intent, SEARCH_WIKIPEDIA)
+
+    def test_topic_beats_solve_prefix(self):
+        self.assertEqual(self.router.route("solve: set"), Route(TOPIC, "set"))
+        self.assertEqual(self.router.route("solve: 2+2").intent, SOLVE)
+
+    def test_explain_again_and_fallback(self):
+        self.assertEqual(self.router.route("please explain again").intent, EXPLAIN_AGAIN)
+        self.assertEqual(self.router.route("what's up?").intent, FALLBACK)
+
+    def test_whole_words_only(self):
+        self.assertEqual(self.router.route("this is a while loop"), Route(TOPIC, "loop"))
+        self.assertEqual(self.router.route("tell me something interesting").intent, FALLBACK)
+        self.assertEqual(self.router.route("hi!"), Route(GREETING, None))
+        self.assertEqual(self.router.route("settings please").intent, FALLBACK)
+
+    def test_plurals_and_typos(self):
+        for message, topic in [("what are dictionaries?", "dictionary"), ("how do classes work", "class"),
+                               ("what is a dictonary", "dictionary"), ("tell me about tupels", "tuple"),
+                               ("whats a varaible", "variable"), ("explain comprehensoin", "comprehension")]:
+            self.assertEqual(self.router.route(message), Route(TOPIC, topic), message)
+        self.assertEqual(self.router.route("explian again").intent, EXPLAIN_AGAIN)
+        # Short words get no typo allowance: "last" is not "list"
+        self.assertEqual(self.router.route("what was the last one").intent, FALLBACK)
+        self.assertEqual(self.router.find_topic("hello, tell me about a lsit or a tupel"), "tuple")
+
+    def test_exact_beats_fuzzy(self):
+        # "dictonary" ranks above "set" but is only a typo away
+        self.assertEqual(self.router.route("a dictonary or a set"), Route(TOPIC, "set"))
+        self.assertEqual(len(TOPICS), len(self.router.topics))
+
+    def test_keyword_index(self):
+        index = KeywordIndex([("ab initio", 0), ("initial", 1), ("hello world", 2)])
+        self.assertEqual(index.best("an initial guess"), 1)
+        self.assertEqual(index.best("ab initio methods, initial"), 0)
+        self.assertEqual(index.best("helo world"), 2)
+        self.assertIsNone(index.best("hello there"))
+        self.assertEqual(index.best("ab initio and initial", ranks={1}), 1)
+
+    def test_symspell_lookup(self):
+        index = SymSpellIndex(["comprehension", "exception", "expression", "function"])
+        self.assertEqual(index.lookup("excpetion", 2), [(1, "exception")])
+        self.assertEqual(index.lookup("functon", 1), [(1, "function")])
+        self.assertEqual(index.lookup("xyz", 2), [])
+        self.assertEqual(osa_distance("tupel", "tuple", 2), 1)
+        self.assertIsNone(osa_distance("kitten", "sitting", 2))
+        self.assertEqual(osa_distance("kitten", "sitting", 3), 3)
+
+    def test_matches_legacy_chain(self):
+        from benchmarks.bench_router import MESSAGES, legacy_route
+        # Substring matches the legacy chain got wrong: "hi" in "something"
+        fixed = {"tell me something interesting about programming languages": "fallback"}
+        messages = MESSAGES + ["run code: print('hi')", "search python docs for set", "explain again the class"]
+        for message in messages:
+            intent, key = self.router.route(message)
+            expected = fixed.get(message) or legacy_route(message, TOPICS)
+            self.assertEqual(key if intent == TOPIC else intent, expected, message)
+
+if __name__ == "__main__":
+    unittest.main()
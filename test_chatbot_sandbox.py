@@ -0,0 +1,62 @@
+import time
+import unittest
+from concurrent.futures import Future
+from chatbot_sandbox import SandboxPool, format_result
+
+class TestSandboxPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SandboxPool(size=2, cpu_seconds=0.5, wall_seconds=3, memory_mb=256, max_output=200)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_runs_code_and_reports_locals(self):
+        reply = self.pool.run("x = 1 + 2")
+        self.assertEqual(format_result(reply), "Code executed. Locals: {'x': 3}")
+
+    def test_output_is_captured_and_capped(self):
+        reply = self.pool.run("print('a' * 500)")
+        self.assertTrue(reply["ok"])
+        self.assertTrue(reply["output"].startswith("a" * 200))
+        self.assertTrue(reply["output"].endswith("(output truncated)"))
+
+    def test_errors_are_reported(self):
+        self.assertEqual(self.pool.run("1 / 0")["error"], "division by zero")
+        self.assertIn("syntax", format_result(self.pool.run("x = = 1")))
+        self.assertIn("not defined", self.pool.run("open('f')")["error"])
+
+    def test_infinite_loop_does_not_block_other_requests(self):
+        slow = self.pool.submit("while True: pass")
+        start = time.perf_counter()
+        self.assertTrue(self.pool.run("y = 2")["ok"])
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertIn("CPU time", slow.result(timeout=5)["error"])
+
+    def test_memory_bomb_is_contained(self):
+        self.assertEqual(self.pool.run("s = 'x' * (10 ** 9)")["error"], "ran out of memory")
+        self.assertTrue(self.pool.run("z = 3")["ok"])
+
+    def test_submit_returns_future(self):
+        future = self.pool.submit("q = 5")
+        self.assertIsInstance(future, Future)
+        self.assertEqual(future.result(timeout=5)["locals"], "{'q': 5}")
+
+
+class TestWallClockLimit(unittest.TestCase):
+    def test_worker_is_killed_and_replaced(self):
+        # CPU limit above the wall limit, so only the parent can stop this one
+        pool = SandboxPool(size=1, cpu_seconds=30, wall_seconds=0.5)
+        try:
+            (worker,) = pool._workers
+            reply = pool.run("while True: pass")
+            self.assertIn("longer than 0.5 s", reply["error"])
+            self.assertEqual(pool.restarts, 1)
+            self.assertIsNotNone(worker.proc.poll())
+            self.assertTrue(pool.run("x = 1")["ok"])
+        finally:
+            pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
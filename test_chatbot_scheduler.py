@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+from chatbot_cache import SearchCache, cache_key
+from chatbot_core import ChatBot
+from chatbot_math import MathEngine
+from chatbot_scheduler import (
+    CHEAP, COMPUTE, EXPIRED, QUEUE_FULL, RATE_LIMITED, SEARCH, Lane, RateLimiter, Rejected, Scheduler,
+)
+from chatbot_server import ChatServer
+from test_chatbot_server import post
+from test_helpers import FakeClock
+
+class TestScheduler(unittest.TestCase):
+    def test_rate_limiter_refills_per_session(self):
+        clock = FakeClock()
+        limiter = RateLimiter(SEARCH, rate=0.5, burst=2, clock=clock)
+        limiter.acquire("a")
+        limiter.acquire("a")
+        with self.assertRaises(Rejected) as caught:
+            limiter.acquire("a")
+        self.assertEqual((caught.exception.reason, caught.exception.retry_after), (RATE_LIMITED, 2.0))
+        self.assertIn("Try again in 2 s", str(caught.exception))
+        limiter.acquire("b")  # other sessions have their own bucket
+        clock.now = 2.0
+        limiter.acquire("a")
+
+    def test_cheap_runs_inline_while_lane_sheds(self):
+        async def scenario():
+            lane = Lane(SEARCH, concurrency=1, max_queued=1, deadline=0.05, rate=100, burst=100)
+            scheduler = Scheduler(lambda message: CHEAP if message == "hello" else SEARCH, [lane])
+            release = asyncio.Event()
+
+            async def slow():
+                await release.wait()
+                return "slow"
+
+            async def fast():
+                return "fast"
+            running = asyncio.create_task(scheduler.run("search", "s1", slow))
+            await asyncio.sleep(0.01)
+            queued = asyncio.create_task(scheduler.run("search", "s2", slow))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(Rejected) as full:
+                await scheduler.run("search", "s3", slow)
+            cheap = await scheduler.run("hello", "s3", fast)
+            with self.assertRaises(Rejected) as expired:
+                await queued
+            release.set()
+            return full.exception.reason, cheap, expired.exception.reason, await running, scheduler.stats()
+        full, cheap, expired, first, stats = asyncio.run(scenario())
+        self.assertEqual((full, cheap, expired, first), (QUEUE_FULL, "fast", EXPIRED, "slow"))
+        self.assertEqual(stats["inline"], 1)
+        self.assertEqual({k: stats[SEARCH][k] for k in ("admitted", "shed", "expired")},
+                         {"admitted": 1, "shed": 1, "expired": 1})
+
+    def test_chatbot_cost(self):
+        search_cache = SearchCache()
+        bot = ChatBot(search_cache=search_cache, memo=SearchCache(ttl=float("inf")), pydocs=False)
+        self.assertEqual(bot.cost("Hello"), CHEAP)
+        self.assertEqual(bot.cost("what is a list?"), CHEAP)
+        self.assertEqual(bot.cost("solve: 12*7 + 3"), CHEAP)
+        self.assertEqual(bot.cost("solve: x**2 = 4"), COMPUTE)
+        self.assertEqual(bot.cost("run code: print(1)"), COMPUTE)
+        self.assertEqual(bot.cost("search wikipedia for python"), SEARCH)
+        self.assertEqual(bot.cost("search python docs for str.split"), SEARCH)  # no offline index
+        search_cache.get_or_fetch(cache_key("wikipedia", "python"), lambda: ("Summary", True))
+        self.assertEqual(bot.cost("search wikipedia for python"), CHEAP)
+
+    def test_cost_memoizes_plain_arithmetic(self):
+        engine = MathEngine()
+        bot = ChatBot(math=engine, memo=SearchCache(ttl=float("inf")))
+        self.assertEqual(bot.cost("solve: 12*7 + 3"), CHEAP)
+        self.assertEqual(bot.get_bot_response("solve: 12*7 + 3"), "Math result: 87")
+        self.assertEqual(engine.fast, 0)  # answered from the memo cost() filled
+
+    def test_server_answers_429_past_rate_limit(self):
+        async def scenario():
+            bot = ChatBot(search_cache=SearchCache(), pydocs=False)
+            bot.wikipedia_url = "http://127.0.0.1:9/wiki/{}"  # refused at once
+            lane = Lane(SEARCH, concurrency=4, max_queued=4, deadline=1, rate=0.25, burst=1)
+            server = ChatServer(bot=bot, port=0, scheduler=Scheduler(bot.cost, [lane]))
+            await server.start()
+            try:
+                reader, writer = await asyncio.open_connection(server.host, server.port)
+                first = await post(reader, writer, {"message": "search wikipedia for a", "session_id": "u"})
+                second = await post(reader, writer, {"message": "search wikipedia for b", "session_id": "u"})
+                cheap = await post(reader, writer, {"message": "hello", "session_id": "u"})
+                writer.close()
+                return first, second, cheap, server.stats()
+            finally:
+                await server.shutdown(grace=2)
+        first, second, cheap, stats = asyncio.run(scenario())
+        self.assertEqual(first[0], 200)
+        self.assertEqual((second[0], second[2]["retry-after"]), (429, "4"))
+        self.assertEqual(cheap[0], 200)
+        self.assertEqual(stats["scheduler"][SEARCH]["rate_limited"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import asyncio
+import base64
+import json
+import os
+import unittest
+from chatbot_core import ChatBot
+from chatbot_server import CLOSE, PING, PONG, TEXT, ChatServer, encode_frame, read_frame, websocket_accept
+
+class SlowBot:
+    def __init__(self, delay):
+        self.delay = delay
+        self.async_http = object()  # nothing to close
+
+    async def aget_bot_response(self, message, session):
+        await asyncio.sleep(self.delay)
+        return f"echo: {message}"
+
+class BrokenBot(SlowBot):
+    """Fails in cost() or while answering, depending on the message."""
+
+    def __init__(self):
+        super().__init__(0)
+
+    def cost(self, message):
+        if message == "bad cost":
+            raise KeyError(message)
+        return "cheap"
+
+    async def aget_bot_response(self, message, session):
+        if message == "bad answer":
+            raise RuntimeError(message)
+        return await super().aget_bot_response(message, session)
+
+async def post(reader, writer, payload, path="/chat", method="POST"):
+    body = json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers["content-length"]))), headers
+
+class TestChatServer(unittest.TestCase):
+    def run_with_server(self, scenario, bot=None, **kwargs):
+        async def main():
+            server = ChatServer(bot=bot or ChatBot(), port=0, **kwargs)
+            await server.start()
+            try:
+                return await scenario(server)
+            finally:
+                await server.shutdown(grace=2)
+        return asyncio.run(main())
+
+    def test_http_sessions(self):
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            _, first, _ = await post(reader, writer, {"message": "what is a list?"})
+            _, again, _ = await post(reader, writer, {"message": "explain again"})
+            writer.close()
+            # A new connection picks the session back up by its id
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            _, other, _ = await post(reader, writer, {"message": "explain again", "session_id": first["session_id"]})
+            _, fresh, _ = await post(reader, writer, {"message": "explain again", "session_id": "someone else"})
+            status, error, _ = await post(reader, writer, {"text": "hi"})
+            health = await post(reader, writer, {}, path="/health", method="GET")
+            missing = await post(reader, writer, {}, path="/nope")
+            writer.close()
+            return first, again, other, fresh, status, error, health, missing
+        first, again, other, fresh, status, error, health, missing = self.run_with_server(scenario)
+        self.assertEqual(first["response"], again["response"])
+        self.assertEqual(first["response"], other["response"])
+        self.assertNotEqual(first["response"], fresh["response"])
+        self.assertEqual(status, 400)
+        self.assertIn("message", error["error"])
+        self.assertEqual((health[0], health[1]["status"], health[1]["requests"]), (200, "ok", 4))
+        self.assertEqual(missing[0], 404)
+
+    def test_websocket(self):
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            key = base64.b64encode(os.urandom(16)).decode()
+            writer.write((f"GET /chat HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+            handshake = (await reader.readuntil(b"\r\n\r\n")).decode()
+            replies = []
+            writer.write(encode_frame(PING, b"are you there", mask=True))
+            replies.append(await read_frame(reader, 1 << 20))
+            for message in ["what is a loop?", json.dumps({"message": "explain again"})]:
+                writer.write(encode_frame(TEXT, message, mask=True))
+                replies.append(await read_frame(reader, 1 << 20))
+            writer.write(encode_frame(CLOSE, b"\x03\xe8", mask=True))
+            replies.append(await read_frame(reader, 1 << 20))
+            writer.close()
+            return key, handshake, replies
+        key, handshake, (pong, first, again, close) = self.run_with_server(scenario)
+        self.assertTrue(handshake.startswith("HTTP/1.1 101"))
+        self.assertIn(websocket_accept(key), handshake)
+        self.assertEqual(pong, (True, PONG, b"are you there"))
+        self.assertEqual(first[1], TEXT)
+        self.assertEqual(json.loads(first[2])["response"], json.loads(again[2])["response"])
+        self.assertEqual(close[1:], (CLOSE, b"\x03\xe8"))
+
+    def test_bot_errors_answer_500_and_keep_the_connection(self):
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            replies = [await post(reader, writer, {"message": m}) for m in ("bad answer", "bad cost", "hello")]
+            writer.close()
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            key = base64.b64encode(os.urandom(16)).decode()
+            writer.write((f"GET /chat HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+            await reader.readuntil(b"\r\n\r\n")
+            frames = []
+            for message in ("bad answer", "hello"):
+                writer.write(encode_frame(TEXT, message, mask=True))
+                frames.append(json.loads((await read_frame(reader, 1 << 20))[2]))
+            writer.close()
+            return replies, frames, server.stats()
+        with self.assertLogs("chatbot_server", "ERROR") as logs:
+            replies, frames, stats = self.run_with_server(scenario, bot=BrokenBot())
+        self.assertEqual([status for status, _, _ in replies], [500, 500, 200])
+        self.assertEqual(replies[0][1], {"error": "the bot failed to answer"})
+        self.assertEqual(replies[2][1]["response"], "echo: hello")
+        self.assertEqual(frames[0], {"error": "the bot failed to answer", "status": 500})
+        self.assertEqual(frames[1]["response"], "echo: hello")
+        self.assertEqual((stats["errors"], len(logs.records)), (3, 3))
+
+    def test_timeout(self):
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            result = await post(reader, writer, {"message": "hello"})
+            writer.close()
+            return result
+        status, body, _ = self.run_with_server(scenario, bot=SlowBot(1), request_timeout=0.05)
+        self.assertEqual(status, 504)
+
+    def test_excess_requests_are_refused(self):
+        async def scenario(server):
+            async def one(i):
+                reader, writer = await asyncio.open_connection(server.host, server.port)
+                result = await post(reader, writer, {"message": f"m{i}"})
+                writer.close()
+                return result
+            return await asyncio.gather(*(one(i) for i in range(4)))
+        results = self.run_with_server(scenario, bot=SlowBot(0.2), max_inflight=1, max_queued=1)
+        statuses = sorted(status for status, _, _ in results)
+        self.assertEqual(statuses, [200, 200, 503, 503])
+        self.assertEqual([h.get("retry-after") for s, _, h in results if s == 503], ["1", "1"])
+
+    def test_graceful_shutdown(self):
+        async def main():
+            server = ChatServer(bot=SlowBot(0.2), port=0)
+            await server.start()
+            busy = await asyncio.open_connection(server.host, server.port)
+            idle = await asyncio.open_connection(server.host, server.port)
+            await post(*idle, {"message": "warm"})
+            pending = asyncio.create_task(post(*busy, {"message": "in flight"}))
+            await asyncio.sleep(0.05)
+            await server.shutdown(grace=2)
+            status, body, headers = await pending
+            idle_closed = await idle[0].read() == b""
+            try:
+                await asyncio.open_connection(server.host, server.port)
+                refused = False
+            except OSError:
+                refused = True
+            return status, body, headers, idle_closed, refused
+        status, body, headers, idle_closed, refused = asyncio.run(main())
+        self.assertEqual((status, body["response"]), (200, "echo: in flight"))
+        self.assertEqual(headers["connection"], "close")
+        self.assertTrue(idle_closed)
+        self.assertTrue(refused)
+
+if __name__ == "__main__":
+    unittest.main()
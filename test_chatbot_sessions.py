@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from chatbot_core import ChatBot
+from chatbot_sessions import SPILL_PURGE_INTERVAL, SessionManager, SessionState, estimate_size
+from test_helpers import FakeClock
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_sessions_keep_separate_context(self):
+        bot = ChatBot()
+        manager = SessionManager()
+        bot.get_bot_response("what is a list?", session=manager.get("alice"))
+        bot.get_bot_response("what is a loop?", session=manager.get("bob"))
+        self.assertIn("list", bot.get_bot_response("explain again", session=manager.get("alice")).lower())
+        self.assertEqual(manager.get("bob").last_topic, "loop")
+        for _ in range(10):
+            bot.get_bot_response("hello", session=manager.get("alice"))
+        self.assertEqual(len(manager.get("alice").history), 6)
+        self.assertEqual(len(bot.history), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        manager = SessionManager(max_sessions=3, clock=self.clock)
+        for name in "abc":
+            manager.get(name)
+        manager.get("a")
+        manager.get("d")
+        self.assertEqual(sorted(manager._sessions), ["a", "c", "d"])
+        self.assertEqual(manager.evictions, 1)
+
+    def test_idle_sessions_expire(self):
+        manager = SessionManager(idle_timeout=60, clock=self.clock)
+        manager.get("old")
+        self.clock.now = 30
+        manager.get("recent")
+        self.clock.now = 80
+        self.assertEqual(manager.evict_idle(), 1)
+        self.assertNotIn("old", manager)
+        self.assertIn("recent", manager)
+
+    def test_memory_budget(self):
+        per_session = estimate_size(SessionState())
+        manager = SessionManager(memory_budget=per_session * 10, clock=self.clock)
+        for i in range(50):
+            manager.get(i)
+        self.assertEqual(len(manager), 10)
+        self.assertLessEqual(manager.memory, per_session * 10)
+        # A grown history counts against the budget on the next visit
+        manager.get(49).history.extend(("user", "x" * 1000) for _ in range(6))
+        manager.get(49)
+        self.assertLess(len(manager), 10)
+
+    def test_evicted_sessions_spill_and_come_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = SessionManager(max_sessions=2, spill_path=os.path.join(tmp, "sessions.db"), clock=self.clock)
+            first = manager.get("first")
+            first.history.append(("user", "what is a set?"))
+            first.last_topic = "set"
+            first.awaiting_visual_example = True
+            manager.get("second")
+            manager.get("third")
+            self.assertNotIn("first", manager)
+            self.assertEqual(len(manager.spill), 1)
+            restored = manager.get("first")
+            self.assertEqual(list(restored.history), [("user", "what is a set?")])
+            self.assertEqual((restored.last_topic, restored.awaiting_visual_example), ("set", True))
+            self.assertEqual(manager.restored, 1)
+            manager.spill.close()
+
+    def test_expired_spilled_sessions_are_purged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = SessionManager(max_sessions=1, spill_path=os.path.join(tmp, "sessions.db"), spill_ttl=3600,
+                                     clock=self.clock)
+            wall = manager.spill.clock = FakeClock(1000.0)
+            manager.get("old")
+            manager.get("recent")  # spills "old"
+            wall.now += 3601
+            manager.get("new")  # spills "recent"; the last purge was too recent to run again
+            self.assertEqual(len(manager.spill), 2)
+            self.clock.now += SPILL_PURGE_INTERVAL
+            manager.get("new")
+            self.assertEqual(len(manager.spill), 1)
+            self.assertEqual(manager.stats()["purged"], 1)
+            self.assertEqual(manager.restored, 0)
+            manager.get("recent")
+            self.assertEqual(manager.restored, 1)
+            manager.spill.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from benchmarks.fake_tk import FakeCanvas, FakeLabel
+from chatbot_generate import TextStream, _END
+from chatbot_transcript import StreamingBubble, TranscriptModel, VirtualTranscript, BOT, USER
+
+class TestTranscriptModel(unittest.TestCase):
+    def setUp(self):
+        self.model = TranscriptModel()
+        for i in range(5):
+            self.model.append(f"m{i}", BOT if i % 2 else USER, 10 * (i + 1))
+
+    def test_offsets_and_visible_range(self):
+        self.assertEqual(list(self.model.offsets), [0, 10, 30, 60, 100, 150])
+        self.assertEqual(list(self.model.visible_range(0, 10)), [0])
+        self.assertEqual(list(self.model.visible_range(25, 61)), [1, 2, 3])
+        self.assertEqual(list(self.model.visible_range(200, 300)), [])
+
+    def test_update_shifts_later_messages(self):
+        self.model.update(1, "longer", 50)
+        self.assertEqual(self.model.texts[1], "longer")
+        self.assertEqual(list(self.model.offsets), [0, 10, 60, 90, 130, 180])
+
+
+class TestVirtualTranscript(unittest.TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas(height=500)
+        self.transcript = VirtualTranscript(self.canvas, buffer_px=200, label_factory=FakeLabel)
+
+    def shown_texts(self):
+        return sorted(w["window"].options["text"] for w in self.canvas.visible_windows())
+
+    def test_widgets_bounded_for_long_sessions(self):
+        for i in range(2000):
+            self.transcript.append(f"message {i}", sender="user" if i % 2 else "bot")
+        self.assertEqual(len(self.transcript), 2000)
+        self.assertLess(self.transcript.widget_count, 30)
+        self.assertIn("message 1999", self.shown_texts())
+        self.assertNotIn("message 0", self.shown_texts())
+
+    def test_scrolling_recycles_widgets(self):
+        for i in range(500):
+            self.transcript.append(f"message {i}")
+        count = self.transcript.widget_count
+        self.transcript.yview("moveto", 0.0)
+        self.assertIn("message 0", self.shown_texts())
+        self.assertNotIn("message 499", self.shown_texts())
+        self.assertEqual(self.transcript.widget_count, count)
+
+    def test_update_moves_later_bubbles(self):
+        first = self.transcript.append("typing…")
+        self.transcript.append("next", sender="user")
+        before = self.transcript.model.offsets[1]
+        self.transcript.update(first, "a much longer answer " * 20)
+        self.assertGreater(self.transcript.model.offsets[1], before)
+        windows = {w["window"].options["text"]: w for w in self.canvas.visible_windows()}
+        self.assertEqual(windows["next"]["coords"][1], self.transcript.model.offsets[1] + 4)
+        self.assertEqual(windows["next"]["anchor"], "ne")
+
+
+class TestStreamingBubble(unittest.TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas()
+        self.transcript = VirtualTranscript(self.canvas, label_factory=FakeLabel)
+        self.index = self.transcript.append("…")
+        self.stream = TextStream()
+        self.bubble = StreamingBubble(self.transcript, self.index, self.stream, interval_ms=50).start()
+
+    def test_chunks_are_batched_per_interval(self):
+        for word in ["a", " b", " c"]:
+            self.stream._put(word)
+        self.canvas.advance(50)
+        self.assertEqual(self.transcript.model.texts[self.index], "a b c")
+        self.assertEqual(self.bubble.updates, 1)
+        self.stream._put(" d")
+        self.canvas.advance(20)
+        self.assertEqual(self.bubble.updates, 1)
+        self.canvas.advance(30)
+        self.assertEqual(self.transcript.model.texts[self.index], "a b c d")
+        self.assertIsNotNone(self.bubble.first_text_at)
+
+    def test_final_text_and_errors(self):
+        self.stream._put("partial ")
+        self.stream.future.set_result("partial answer")
+        self.stream._put(_END)
+        self.canvas.advance(50)
+        self.assertEqual(self.transcript.model.texts[self.index], "partial answer")
+        self.assertEqual(self.canvas.pending, [])
+
+        index = self.transcript.append("…")
+        failing = TextStream()
+        StreamingBubble(self.transcript, index, failing, on_error=lambda e: f"[GPT-2 error: {e}]").start()
+        failing.future.set_exception(RuntimeError("boom"))
+        failing._put(_END)
+        self.canvas.advance(50)
+        self.assertEqual(self.transcript.model.texts[index], "[GPT-2 error: boom]")
+
+if __name__ == "__main__":
+    unittest.main()
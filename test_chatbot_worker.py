@@ -0,0 +1,81 @@
+import threading
+import time
+import unittest
+from chatbot_core import ChatBot
+from chatbot_worker import ResponseWorker
+
+class TestResponseWorker(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+        def respond(message):
+            if message.startswith("slow"):
+                self.release.wait(5)
+            return message.upper()
+
+        self.worker = ResponseWorker(respond)
+        self.done = []
+        self.cancelled = []
+
+    def tearDown(self):
+        self.release.set()
+        self.worker.shutdown()
+
+    def submit(self, message):
+        self.worker.submit(message, self.done.append, lambda: self.cancelled.append(message))
+
+    def wait_for(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.done) < count and time.monotonic() < deadline:
+            self.worker.poll()
+            time.sleep(0.005)
+
+    def test_delivers_on_poll_only(self):
+        self.submit("hello")
+        time.sleep(0.05)
+        self.assertEqual(self.done, [])
+        self.wait_for(1)
+        self.assertEqual(self.done, ["HELLO"])
+        self.assertEqual(self.worker.pending, 0)
+
+    def test_newer_message_skips_those_not_started(self):
+        self.submit("slow one")
+        time.sleep(0.05)  # started
+        self.submit("slow two")
+        self.submit("fast")
+        self.assertEqual(self.cancelled, ["slow two"])
+        self.release.set()
+        self.wait_for(2)
+        self.assertEqual(self.done, ["SLOW ONE", "FAST"])
+        self.assertEqual(self.worker.pending, 0)
+
+    def test_overlapping_messages_update_the_session_in_turn(self):
+        bot = ChatBot(memo=False)
+        active, most_active = [], []
+
+        def respond(message):
+            active.append(message)
+            most_active.append(len(active))
+            time.sleep(0.05)
+            try:
+                return bot.get_bot_response(message)
+            finally:
+                active.remove(message)
+        self.worker.respond = respond
+        self.submit("what is a list?")
+        time.sleep(0.01)
+        self.submit("what is a tuple?")
+        self.wait_for(2)
+        self.assertEqual(len(self.done), 2)
+        self.assertEqual(most_active, [1, 1])
+        self.assertEqual(bot.last_topic, "tuple")
+        self.assertEqual([text for _, text in bot.history][::2], ["what is a list?", "what is a tuple?"])
+
+    def test_errors_become_responses(self):
+        self.worker.respond = lambda message: 1 / 0
+        self.submit("boom")
+        self.wait_for(1)
+        self.assertIn("division by zero", self.done[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,11 @@
+"""Test doubles shared by the test_chatbot_* modules."""
+
+
+class FakeClock:
+    """A clock for code that takes one (time.monotonic and the like); tests move it by setting now."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now